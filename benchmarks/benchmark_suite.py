@@ -0,0 +1,333 @@
+'''
+Benchmark suite
+
+Times the stages of a porkchop run on the committed fixture ephemerides in
+benchmarks/fixtures, so no network access is needed:
+
+    lambert.*   lambert_solver per call, in several transfer geometries
+    reader.*    stateReader on the fixtures and on a large generated table
+    grid.*      porkchop_grid at several grid sizes, cold and with continuation
+    plot.*      both contour figures of interplanetary_porkchop, with pyplot
+                and headless rendering
+
+Every run is appended to a JSON lines history, and the median times are
+compared against a stored baseline: benchmarks slower than the baseline by
+more than the tolerance are flagged as regressions and make the script exit
+with status 1. Timings depend on the machine, so benchmarks/results is not
+versioned: the first run stores the baseline.
+
+Usage:
+    python3 benchmarks/benchmark_suite.py [--quick] [--only PREFIX] [--save-baseline]
+    python3 benchmarks/benchmark_suite.py --make-fixtures
+'''
+
+# Python Standard Libraries
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+# Headless figures
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+# Third-party Libraries
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'src'))
+
+# Porkchop-Plot-Generator Libraries
+from utils import planetary_data     as pd
+from utils import lambert_tools      as lt
+from utils import ephemeris_query    as eq
+from utils import analytic_ephemeris as ae
+from utils import grid_tools         as gt
+from utils import time_tools         as tt
+from lambert_comparison import transfers, MU
+
+FIXTURE_DIR = os.path.join(BENCH_DIR, 'fixtures')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# Earth departures and Mars arrivals of the 2020 opportunity, one day apart
+FIXTURES = {
+    'departure' : (pd.earth['ID'], '2020-06-01', '2021-03-01'),
+    'arrival'   : (pd.mars['ID'],  '2020-11-01', '2022-03-01')
+}
+
+# Transfer geometries of the Lambert benchmarks: transfer angles (deg) and
+# times of flight (days)
+GEOMETRIES = {
+    'short'      : ((20, 160),  (30, 400)),
+    'near_180'   : ((175, 185), (150, 600)),
+    'long_way'   : ((200, 340), (200, 900)),
+    'hyperbolic' : ((20, 160),  (5, 40))
+}
+
+GRID_SIZES = (32, 64, 128, 256)
+
+
+def fixture_path(name):
+    ID, start, stop = FIXTURES[name]
+    return os.path.join(FIXTURE_DIR, f'{ID}_{start}_{stop}.txt')
+
+def make_fixtures():
+    '''
+    Writes the fixture ephemerides as Horizons vector tables, from the
+    analytic ephemerides
+    '''
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+
+    for name, (ID, start, stop) in FIXTURES.items():
+        julianDates, states = ae.get_states(ID, start, stop, 1)
+
+        rows = []
+        for jd, state in zip(julianDates, states):
+            date = datetime.datetime(2000, 1, 1, 12) + datetime.timedelta(days=jd - 2451545.0)
+            rows.append(f"{jd:.9f}, A.D. {date:%Y-%b-%d %H:%M:%S}.0000, "
+                        + ", ".join(f"{value:.15E}" for value in state) + ",")
+
+        with open(fixture_path(name), 'w') as file:
+            file.write(f"Benchmark fixture: analytic ephemeris of body {ID}, {start} to {stop}, 1 day step\n"
+                       " JDTDB, Calendar Date (TDB), X, Y, Z, VX, VY, VZ,\n"
+                       "$$SOE\n" + "\n".join(rows) + "\n$$EOE\n")
+        print(f"Fixture saved to {fixture_path(name)}")
+
+def measure(function, repeat):
+    '''
+    Calls function repeat times and returns the wall times (s)
+    '''
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+def bench_lambert(repeat, quick):
+
+    n = 50 if quick else 200
+    results = {}
+
+    for name, (dtheta_range, tof_range) in GEOMETRIES.items():
+        R1, R2, dt = transfers(n, dtheta_range, tof_range)
+        failures = []
+
+        def solve():
+            failures.clear()
+            for k in range(n):
+                try:
+                    lt.lambert_solver(R1[k], R2[k], dt[k], MU)
+                except (ValueError, RuntimeError):
+                    failures.append(k)
+
+        with np.errstate(all='ignore'):
+            times = measure(solve, repeat)
+
+        # Per call
+        results[f'lambert.{name}'] = {
+            'times'  : [t / n for t in times],
+            'unit'   : 's/call',
+            'failed' : len(failures) / n
+        }
+
+    return results
+
+def bench_reader(repeat, quick):
+
+    results = {}
+
+    for name in FIXTURES:
+        results[f'reader.{name}'] = {
+            'times' : measure(lambda: eq.stateReader(fixture_path(name), sidecar=False), repeat),
+            'unit'  : 's'
+        }
+
+    # Large table: the fixture rows repeated
+    rows = 20000 if quick else 200000
+    with open(fixture_path('arrival')) as file:
+        text = file.read()
+    head, rest = text.split('$$SOE\n')
+    body = rest.split('$$EOE')[0].splitlines(keepends=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'large.txt')
+        with open(path, 'w') as file:
+            file.write(head + '$$SOE\n')
+            file.writelines(body[k % len(body)] for k in range(rows))
+            file.write('$$EOE\n')
+
+        results['reader.large'] = {
+            'times' : measure(lambda: eq.stateReader(path, sidecar=False), repeat),
+            'unit'  : 's',
+            'rows'  : rows
+        }
+
+        # Memory-mapped sidecar written by the first read
+        eq.stateReader(path)
+        results['reader.large_sidecar'] = {
+            'times' : measure(lambda: eq.stateReader(path), repeat),
+            'unit'  : 's',
+            'rows'  : rows
+        }
+
+    return results
+
+def _fixture_grid(size):
+    et_departures, states_depart = eq.stateReader(fixture_path('departure'), sidecar=False)
+    et_arrivals, states_arrive = eq.stateReader(fixture_path('arrival'), sidecar=False)
+    return et_departures[:size], states_depart[:size], et_arrivals[:size], states_arrive[:size]
+
+def bench_grid(repeat, quick):
+
+    results = {}
+
+    for size in GRID_SIZES[:3] if quick else GRID_SIZES:
+        args = _fixture_grid(size)
+
+        # Cold solves, and warm starts from the previous departure
+        for suffix, continuation in (('', False), ('_continuation', True)):
+            _, stats = gt.porkchop_grid(*args, MU, 20.0, return_stats=True, continuation=continuation)
+            solved = stats['converged'].any(axis=0)
+
+            results[f'grid.{size}x{size}{suffix}'] = {
+                'times'      : measure(lambda: gt.porkchop_grid(*args, MU, 20.0, continuation=continuation), repeat),
+                'unit'       : 's',
+                'iterations' : float(stats['iterations'][:, solved].mean())
+            }
+
+    return results
+
+def bench_plot(repeat, quick):
+
+    import porkchop
+
+    size = 64 if quick else 128
+    et_departures, states_depart, et_arrivals, states_arrive = _fixture_grid(size)
+    grids = gt.porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, MU, 20.0)
+
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for render, name in (('pyplot', 'figures'), ('headless', 'headless')):
+            def plot():
+                _config = porkchop._merge_config({
+                    'departure0'  : tt.jd_to_date(et_departures[0]),
+                    'arrival0'    : tt.jd_to_date(et_arrivals[0]),
+                    'show'        : False,
+                    'filename'    : os.path.join(tmp, 'c3.png'),
+                    'filename_dv' : os.path.join(tmp, 'dv.png'),
+                    'render'      : render
+                })
+                porkchop._plot_porkchop(_config, tmp, et_departures, et_arrivals, grids)
+
+            results[f'plot.{name}_{size}x{size}'] = {'times': measure(plot, repeat), 'unit': 's'}
+
+    return results
+
+BENCHMARKS = {
+    'lambert' : bench_lambert,
+    'reader'  : bench_reader,
+    'grid'    : bench_grid,
+    'plot'    : bench_plot
+}
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, tolerance):
+    '''
+    Benchmarks whose median time exceeds the baseline median by more than
+    tolerance (a fraction)
+    '''
+
+    regressions = {}
+    for name, result in results.items():
+        if name in baseline:
+            ratio = result['median'] / baseline[name]['median']
+            if ratio > 1 + tolerance:
+                regressions[name] = ratio
+    return regressions
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Porkchop Plot Generator benchmark suite')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions of every benchmark')
+    parser.add_argument('--quick', action='store_true', help='Smaller problems, for a fast check')
+    parser.add_argument('--only', nargs='*', default=None, help='Run only the benchmarks with these prefixes')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown against the baseline')
+    parser.add_argument('--history', default=os.path.join(RESULTS_DIR, 'history.jsonl'))
+    parser.add_argument('--baseline', default=os.path.join(RESULTS_DIR, 'baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--make-fixtures', action='store_true', help='Regenerate the fixture ephemerides')
+    args = parser.parse_args()
+
+    if args.make_fixtures:
+        make_fixtures()
+        return 0
+
+    results = {}
+    for group, bench in BENCHMARKS.items():
+        if args.only and group not in [prefix.split('.')[0] for prefix in args.only]:
+            continue
+
+        for name, result in bench(args.repeat, args.quick).items():
+            if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                continue
+            times = result.pop('times')
+            results[name] = dict(result, median=float(np.median(times)), min=float(np.min(times)))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+
+    regressions = compare(results, baseline, args.tolerance)
+
+    print(f"{'benchmark':<28} {'median':>12} {'min':>12} {'unit':>7} {'baseline':>9}")
+    for name, result in results.items():
+        ratio = f"{result['median'] / baseline[name]['median']:8.2f}x" if name in baseline else f"{'-':>9}"
+        flag = '  REGRESSION' if name in regressions else ''
+        print(f"{name:<28} {result['median']:12.4e} {result['min']:12.4e} {result['unit']:>7} {ratio}{flag}")
+
+    record = {
+        'timestamp'   : datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'revision'    : git_revision(),
+        'python'      : platform.python_version(),
+        'numpy'       : np.__version__,
+        'machine'     : platform.platform(),
+        'quick'       : args.quick,
+        'repeat'      : args.repeat,
+        'results'     : results,
+        'regressions' : regressions
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+    with open(args.history, 'a') as file:
+        file.write(json.dumps(record) + '\n')
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        # Keep the baseline entries of benchmarks that were not run
+        record['results'] = dict(baseline, **results)
+        with open(args.baseline, 'w') as file:
+            json.dump(record, file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%} of the baseline.")
+        return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+'''
+Accuracy and speed comparison of the Lambert solvers
+
+Solves the same batches of transfers with the Curtis solver (both root
+finders, and the compiled kernel of lambert_jit when Numba is installed) and
+Izzo's solver, and reports the time per transfer, the mean iteration count
+and the largest velocity difference from the reference (Izzo) solution. Accuracy is also checked independently of either solver by
+propagating the departure state with a universal-variable Kepler step and
+comparing against the arrival position.
+
+Usage:
+    python3 benchmarks/lambert_comparison.py
+'''
+
+# Python Standard Libraries
+import os
+import sys
+import time
+
+# Third-party Libraries
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+# Porkchop-Plot-Generator Libraries
+from utils import planetary_data as pd
+from utils import lambert_tools  as lt
+from utils import izzo_tools     as iz
+from utils import lambert_jit    as lj
+
+MU = pd.sun['mu']
+AU = pd.earth['sma']
+DAY = 3600.0 * 24.0
+
+
+def transfers(n, dtheta_range, tof_range, seed=0):
+    '''
+    Random Sun-centred transfers between 0.7 and 5.2 AU with transfer angles
+    and times of flight (days) drawn from the given ranges
+    '''
+
+    rng = np.random.default_rng(seed)
+    r1 = rng.uniform(0.7, 1.6, n) * AU
+    r2 = rng.uniform(0.7, 5.2, n) * AU
+    dtheta = np.radians(rng.uniform(*dtheta_range, n))
+    inc = np.radians(rng.uniform(-3.0, 3.0, n))
+
+    R1 = np.stack([r1, np.zeros(n), np.zeros(n)], axis=-1)
+    R2 = np.stack([
+        r2 * np.cos(dtheta),
+        r2 * np.sin(dtheta) * np.cos(inc),
+        r2 * np.sin(dtheta) * np.sin(inc)
+    ], axis=-1)
+
+    return R1, R2, rng.uniform(*tof_range, n) * DAY
+
+def kepler_residual(R1, V1, R2, dt):
+    '''
+    Relative position error after propagating (R1, V1) for dt, using
+    Lagrange coefficients in universal variables
+    '''
+
+    r1 = np.linalg.norm(R1, axis=-1)
+    v1 = np.linalg.norm(V1, axis=-1)
+    vr = np.sum(R1 * V1, axis=-1) / r1
+    alpha = 2 / r1 - v1 ** 2 / MU
+
+    def time_of_flight(chi):
+        z = alpha * chi ** 2
+        return (r1 * vr / np.sqrt(MU) * chi ** 2 * lt.C_vec(z)
+                + (1 - alpha * r1) * chi ** 3 * lt.S_vec(z) + r1 * chi) / np.sqrt(MU)
+
+    # The universal anomaly grows monotonically with time; bracket and bisect
+    with np.errstate(over='ignore', invalid='ignore'):
+        lo = np.zeros(dt.shape)
+        hi = np.sqrt(MU) * dt / r1
+        for _ in range(200):
+            short = time_of_flight(hi) < dt
+            if not short.any():
+                break
+            lo[short] = hi[short]
+            hi[short] *= 2
+
+        for _ in range(200):
+            chi = 0.5 * (lo + hi)
+            short = time_of_flight(chi) < dt
+            lo = np.where(short, chi, lo)
+            hi = np.where(short, hi, chi)
+
+    z = alpha * chi ** 2
+    f = 1 - chi ** 2 / r1 * lt.C_vec(z)
+    g = dt - chi ** 3 / np.sqrt(MU) * lt.S_vec(z)
+    R = f[:, None] * R1 + g[:, None] * V1
+
+    return np.linalg.norm(R - R2, axis=-1) / np.linalg.norm(R2, axis=-1)
+
+def _with_jit(enabled, solve, *args, **kwargs):
+    # Calls solve with the compiled Lambert kernels turned on or off
+    previous, lj.ENABLED = lj.ENABLED, enabled
+    try:
+        return solve(*args, **kwargs)
+    finally:
+        lj.ENABLED = previous
+
+def run(label, R1, R2, dt, revs=0):
+
+    solvers = {
+        'izzo'        : lambda: iz.izzo_solver_batch(R1, R2, dt, MU, revs=revs),
+        'safeguarded' : lambda: lt.lambert_solver_batch(R1, R2, dt, MU, method='safeguarded'),
+        'curtis'      : lambda: _with_jit(False, lt.lambert_solver_batch, R1, R2, dt, MU, method='curtis')
+    }
+
+    # The compiled kernel must agree with the NumPy path of the same method
+    if lj.AVAILABLE:
+        solvers['curtis_jit'] = lambda: _with_jit(True, lt.lambert_solver_batch, R1, R2, dt, MU, method='curtis')
+
+    print(f'\n{label} ({len(dt)} transfers)')
+    print(f"{'solver':>12} {'us/solve':>10} {'iters':>7} {'solved':>7} {'max |dV| km/s':>14} {'max pos err':>12}")
+
+    reference = None
+    for name, solve in solvers.items():
+        if revs and name != 'izzo':
+            continue
+
+        start = time.perf_counter()
+        with np.errstate(all='ignore'):
+            V1, V2, converged, iterations = solve()
+        elapsed = time.perf_counter() - start
+
+        if reference is None:
+            reference = V1
+        dv = np.nanmax(np.abs(V1 - reference)) if converged.any() else np.nan
+        err = np.nanmax(kepler_residual(R1[converged], V1[converged], R2[converged], dt[converged])) \
+            if converged.any() else np.nan
+
+        print(f'{name:>12} {elapsed / len(dt) * 1e6:10.2f} {iterations[converged].mean():7.2f} '
+              f'{converged.mean():7.1%} {dv:14.2e} {err:12.2e}')
+
+def main():
+
+    if lj.AVAILABLE:
+        # Compile the kernels before timing them
+        _with_jit(True, lt.lambert_solver_batch, *transfers(10, (20, 160), (30, 400)), MU)
+
+    n = 20000
+    run('Short transfers, 20-160 deg',   *transfers(n, (20, 160),    (30, 400)))
+    run('Near 180 deg, 175-185 deg',     *transfers(n, (175, 185),   (150, 600)))
+    run('Long way, 200-340 deg',         *transfers(n, (200, 340),   (200, 900)))
+    run('Fast hyperbolic, 20-160 deg',   *transfers(n, (20, 160),    (5, 40)))
+    run('One revolution, 20-340 deg',    *transfers(n, (20, 340),    (900, 3000)), revs=1)
+
+if __name__ == '__main__':
+    main()
@@ -1,42 +1,76 @@
+# Python Standard Libraries
+import argparse
+import json
+import sys
+
 # Porkchop-Plot-Generator Libraries
-from utils import planetary_data as pd
-from porkchop import interplanetary_porkchop
+from utils import config_tools   as cf
+import porkchop
 
 # Main script
 
-def main():
+def parse_args( argv = None ):
+
+    parser = argparse.ArgumentParser(
+        description = 'Porkchop plot generator. Without a configuration file the overrides of main.py are used.'
+    )
+    parser.add_argument(
+        'command', nargs = '?', default = 'porkchop', choices = ( 'porkchop', 'optimal', 'windows', 'survey', 'store', 'serve' ),
+        help = 'porkchop plots (default), optimal transfer, launch window scan, survey of the config "jobs", '
+               'grid solved into an on-disk store, or HTTP service with the config as defaults'
+    )
+    parser.add_argument( '-c', '--config', help = 'JSON or TOML configuration file' )
+    parser.add_argument(
+        '-s', '--set', action = 'append', default = [], metavar = 'KEY=VALUE',
+        help = 'Override a config parameter, e.g. -s step=2 -s planet1=venus (repeatable)'
+    )
+    parser.add_argument( '--plot', action = 'store_true', help = 'Draw the figures of the windows, survey and store commands' )
+    parser.add_argument( '--host', default = '127.0.0.1', help = 'Address of the serve command' )
+    parser.add_argument( '--port', type = int, default = 8050, help = 'Port of the serve command' )
+    parser.add_argument( '--processes', type = int, default = None, help = 'Worker processes of the serve command (default: all CPUs)' )
+    parser.add_argument( '--cache-size', type = float, default = 256, help = 'Memory of each serve command cache in MB' )
+
+    return parser.parse_args( argv )
 
-    # config parameters for porkchop plot generator
+def main( argv = None ):
+
+    args = parse_args( argv )
+
+    # Overrides of the porkchop defaults, see porkchop._merge_config
     config = {
-        'planet0'       : pd.earth[ 'ID' ],     # Departure planet
-        'planet1'       : pd.mars[ 'ID' ],      # Target planet
-        'departure0'    : '2020-07-01',         # Intial departure date
-        'departure1'    : '2020-09-01',         # Final departure date
-        'arrival0'      : '2020-11-01',         # Initial arrival date
-        'arrival1'      : '2022-01-24',         # Final arrival date
-        'mu'            : pd.sun[ 'mu' ],       # Gravitational parameter in km**3/s**2
-        'step'          : 5,                    # Step size in days
-        'frame'         : 'J2000',              # Ecliptic of J2000
-        'observer'      : '500@0',              # Solar Sytem Barycenter
-        'cutoff_v'      : 20.0,                 # Maximum vinf to consider             
-        'c3_levels'     : None,                 # C3 levels for contour plot
-        'vinf_levels'   : None,                 # vinf levels for contour plot
-        'tof_levels'    : None,                 # tof levels for contour plot
-        'dv_levels'     : None,                 # dv levels for contour plot
-        'dv_cmap'       : 'RdPu_r',             # color map for dv contours
         'figsize'       : ( 6, 10 ),            # figure size for contour plot
-        'lw'            : 1.5,                  # linewidth for contour lines
-        'title'         : 'Porkchop Plot',      # Plot title
-        'fontsize'      : 15,                   # Axes fontsize
-        'show'          : True,                 # For displaying the figure
-        'filename'      : None,                 # Specify filename for c3 plot
-        'filename_dv'   : None,                 # Specify filename for dv plot
-        'dpi'           : 300,                  # Specify target dpi
-        'load'          : False                 # Load existing ephemeris data
+        'show'          : True                  # For displaying the figure
     }
 
-    # Call porkchop plot generator
-    interplanetary_porkchop( config )
+    if args.config is not None:
+        # The file replaces the overrides above; missing keys take the porkchop defaults
+        config = cf.load_config( args.config )
+
+    config = cf.resolve_config( { **config, **dict( cf.parse_override( item ) for item in args.set ) } )
+
+    if args.command == 'porkchop':
+        # Call porkchop plot generator
+        porkchop.interplanetary_porkchop( config )
+
+    elif args.command == 'optimal':
+        best = porkchop.optimal_transfer( config )
+        print( json.dumps( best, indent = 2, default = lambda value: value.item() ) )
+
+    elif args.command == 'store':
+        porkchop.store_porkchop( config, plot = args.plot )
+
+    elif args.command == 'serve':
+        # Imported here so that the other commands do not load asyncio
+        import service
+        service.serve( config, args.host, args.port, workers = args.processes, cache_size = args.cache_size )
+
+    elif args.command == 'windows':
+        porkchop.scan_launch_windows( config, plot = args.plot )
+
+    else:
+        if not config.get( 'jobs' ):
+            sys.exit( "The survey command needs a config file with a 'jobs' list." )
+        porkchop.mission_survey( config.pop( 'jobs' ), config, plot = args.plot )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,23 +4,34 @@ Porkchop Plot Generator
 
 # Python Standard Libraries
 import os
+import time
 
 # 3rd Party Libraries
 import numpy as np
-import matplotlib.pyplot as plt
 
 # Porkchop-Plot-Generator libraries
-from utils import planetary_data  as pd
-from utils import lambert_tools   as lt
-from utils import ephemeris_query as eq
-from utils.numerical_tools import norm
-
-# Dark plotting background
-plt.style.use( 'dark_background' )
-
+from utils import planetary_data      as pd
+from utils import ephemeris_query     as eq
+from utils import ephemeris_store     as es
+from utils import analytic_ephemeris  as ae
+from utils import grid_tools          as gt
+from utils import cache_tools         as ct
+from utils import adaptive_tools      as at
+from utils import optimize_tools      as ot
+from utils import survey_tools        as st
+from utils import window_tools        as wt
+from utils import interpolation_tools as it
+from utils import report_tools        as rt
+from utils import lazy_grid           as lg
+from utils import grid_store          as gs
+from utils import time_tools          as tt
+
+
+def _merge_config( config ):
+    '''
+    Returns the default config dictionary overridden by config
+    '''
 
-def interplanetary_porkchop( config ):
-    
     # Default config dictionary
     _config = {
         'planet0'       : pd.earth[ 'ID' ],     # Departure planet
@@ -31,6 +42,7 @@ def interplanetary_porkchop( config ):
         'arrival1'      : '2022-01-24',         # Final arrival date
         'mu'            : pd.sun[ 'mu' ],       # Gravitational parameter in km**3/s**2
         'step'          : 5,                    # Step size in days
+        'grid_step'     : None,                 # Lambert grid step in days, interpolated (None for step)
         'frame'         : 'J2000',              # Ecliptic of J2000
         'observer'      : '500@0',              # Solar Sytem Barycenter
         'cutoff_v'      : 20.0,                 # Maximum vinf to consider             
@@ -47,15 +59,49 @@ def interplanetary_porkchop( config ):
         'filename'      : None,                 # Specify filename for c3 plot
         'filename_dv'   : None,                 # Specify filename for dv plot
         'dpi'           : 300,                  # Specify target dpi
-        'load'          : False                 # Load existing ephemeris data
+        'load'          : False,                # Load existing ephemeris data
+        'store'         : True,                 # Serve ephemerides from data/ephemeris_store
+        'fetch_workers' : 4,                    # Concurrent Horizons requests
+        'chunk_days'    : 2000,                 # Longest span of one Horizons request in days (None for no split)
+        'ephemeris'     : 'horizons',           # Ephemeris source ('horizons' or 'analytic')
+        'solver'        : 'curtis',             # Lambert solver ('curtis', 'safeguarded' or 'izzo')
+        'revs'          : 0,                    # Revolutions of the transfer ('izzo' only)
+        'low_path'      : True,                 # Low energy multi-revolution branch ('izzo' only)
+        'continuation'  : False,                # Start each cell from the z of the previous departure ('curtis' or 'safeguarded' only, faster with 'curtis' on large grids)
+        'workers'       : 1,                    # Number of processes for the grid (None for all CPUs)
+        'chunk_size'    : None,                 # Arrival rows per task
+        'tof_min'       : None,                 # Shortest time of flight to solve in days
+        'tof_max'       : None,                 # Longest time of flight to solve in days
+        'progress'      : None,                 # Callback progress( rows_done, rows_total )
+        'adaptive'      : False,                # Refine the grid only around low-energy regions
+        'coarse'        : 8,                    # Initial adaptive lattice spacing in grid cells
+        'refine_c3'     : None,                 # Refine tiles with C3 below this value
+        'refine_vinf'   : None,                 # Refine tiles with vinf below this value
+        'refine_dv'     : None,                 # Refine tiles with dv below this value (None for cutoff_v / 2)
+        'refine_jump'   : 2.0,                  # Refine tiles where dv changes by more than this (km/s)
+        'objective'     : 'dv',                 # Quantity minimized by optimal_transfer ('C3', 'v_inf' or 'dv')
+        'branch'        : None,                 # Transfer branch of optimal_transfer ('short', 'long' or None for both)
+        'seeds'         : 3,                    # Coarse grid minima refined by optimal_transfer per branch
+        'coarse_step'   : 10.0,                 # Epoch spacing of the coarse grid of optimal_transfer in days (None for every epoch)
+        'scan_step'     : None,                 # Coarse departure step of scan_launch_windows in days (None for synodic period / 60)
+        'scan_margin'   : 1.0,                  # dv above a window minimum still inside the window (km/s)
+        'scan_dv_max'   : None,                 # Drop windows whose minimum dv exceeds this (km/s)
+        'cache'         : True,                 # Reuse computed grids stored in data/grid_cache
+        'cache_size'    : 512,                  # Maximum size of the grid cache in MB
+        'report'        : False,                # Write stage timings and solver statistics as JSON next to the figures
+        'render'        : 'pyplot',             # Figure rendering ('pyplot' or 'headless' for Agg figures without pyplot)
+        'render_workers': None                  # Processes rendering the figures concurrently ('headless' only, None for all CPUs)
     }
-    
+
     # Overrides default config parameters
     for key in config.keys():
         _config[ key ] = config [ key ]
 
+    return _config
+
+def _data_dir():
     '''
-    Data handling and Ephemeris Query
+    Returns the data directory of the project, creating it if needed
     '''
 
     # Determine the directory for saving ephemeris data
@@ -67,165 +113,317 @@ def interplanetary_porkchop( config ):
     if not os.path.exists( data_dir ):
         os.makedirs( data_dir, exist_ok = True )
 
-    # Create subdirectories for departure and arrival data 
-    departure_dir = os.path.join( data_dir, 'departure_data' )
-    arrival_dir = os.path.join( data_dir, 'arrival_data')
-
-    # Create the data subdirectories if they doesn't exist
-    if not os.path.exists( departure_dir ):
-        os.makedirs( departure_dir, exist_ok = True )
-
-    if not os.path.exists( arrival_dir ):
-        os.makedirs( arrival_dir, exist_ok = True )
-
-    # Define target output path for departure and arrival data
-    departure_output_path = os.path.join(
-        departure_dir,
-        f"{ _config[ 'planet0' ] }_{ _config[ 'departure0' ] }_{ _config[ 'departure1' ] }.txt"
-    )
-    arrival_output_path = os.path.join(
-        arrival_dir,
-        f"{ _config[ 'planet1' ] }_{ _config[ 'arrival0' ] }_{ _config[ 'arrival1' ] }.txt"
-    )
+    return data_dir
 
+def _load_ephemerides( _config, data_dir, timings = None ):
     '''
-    Check if the load parameter is set to True and if the necessary data files exist. If both conditions are met, it will load the data from these files instead of querying the API. If not, it will proceed with the API requests as usua
+    Returns the ephemeris tables of the departure and arrival windows:
+    et_departures, states_depart, et_arrivals, states_arrive
     '''
-    if _config[ 'load' ] and os.path.exists( departure_output_path ) and os.path.exists( arrival_output_path ):
-        print('Loading ephemeris data from existing files.')
+
+    # Ephemeris windows, padded by one download step when the grid is interpolated
+    departure1 = _config[ 'departure1' ]
+    arrival1   = _config[ 'arrival1'   ]
+
+    if _config[ 'grid_step' ] is not None:
+        departure1 = tt.jd_to_date( tt.date_to_jd( departure1 ) + _config[ 'step' ] )
+        arrival1   = tt.jd_to_date( tt.date_to_jd( arrival1   ) + _config[ 'step' ] )
+
+    if _config[ 'ephemeris' ] == 'analytic':
+        # Compute both windows offline from mean Keplerian elements
+        with rt.stage( timings, 'ephemeris.analytic' ):
+            et_departures, states_depart = ae.get_states(
+                _config[ 'planet0' ],
+                _config[ 'departure0' ],
+                departure1,
+                _config[ 'step' ]
+            )
+            et_arrivals, states_arrive = ae.get_states(
+                _config[ 'planet1' ],
+                _config[ 'arrival0' ],
+                arrival1,
+                _config[ 'step' ]
+            )
+    elif _config[ 'store' ]:
+        # Serve both windows from the per-body ephemeris store, querying Horizons only for missing epochs
+        store_dir = os.path.join( data_dir, 'ephemeris_store' )
+
+        # Gaps of both bodies are downloaded concurrently
+        with rt.stage( timings, 'ephemeris.store' ):
+            ( ( et_departures, states_depart ),
+              ( et_arrivals,   states_arrive ) ) = es.get_states_many(
+                store_dir,
+                [ ( _config[ 'planet0' ], _config[ 'departure0' ], departure1, _config[ 'step' ] ),
+                  ( _config[ 'planet1' ], _config[ 'arrival0'   ], arrival1,   _config[ 'step' ] ) ],
+                max_workers = _config[ 'fetch_workers' ],
+                chunk_days  = _config[ 'chunk_days'    ]
+            )
     else:
-        # Generate URLs for querying ephemeris data from Horizons API
-        url_departure = eq.generate_url(
-            _config[ 'planet0' ],
-            _config[ 'departure0' ],
-            _config[ 'departure1' ],
-            _config[ 'step' ]
-        ) 
-        url_arrival   = eq.generate_url(
-            _config[ 'planet1' ],
-            _config[ 'arrival0' ],
-            _config[ 'arrival1' ],
-            _config[ 'step' ]
-        )
+        # Create subdirectories for departure and arrival data 
+        departure_dir = os.path.join( data_dir, 'departure_data' )
+        arrival_dir = os.path.join( data_dir, 'arrival_data')
+
+        # Create the data subdirectories if they doesn't exist
+        if not os.path.exists( departure_dir ):
+            os.makedirs( departure_dir, exist_ok = True )
+
+        if not os.path.exists( arrival_dir ):
+            os.makedirs( arrival_dir, exist_ok = True )
 
-        # Submit API request and save the response to text files in target paths
-        eq.save_query_to_file(
-            url_departure,
-            departure_output_path
+        # Define target output path for departure and arrival data
+        departure_output_path = os.path.join(
+            departure_dir,
+            f"{ _config[ 'planet0' ] }_{ _config[ 'departure0' ] }_{ departure1 }.txt"
         )
-        eq.save_query_to_file(
-            url_arrival,
-            arrival_output_path
+        arrival_output_path = os.path.join(
+            arrival_dir,
+            f"{ _config[ 'planet1' ] }_{ _config[ 'arrival0' ] }_{ arrival1 }.txt"
         )
 
+        '''
+        Check if the load parameter is set to True and if the necessary data files exist. If both conditions are met, it will load the data from these files instead of querying the API. If not, it will proceed with the API requests as usua
+        '''
+        if _config[ 'load' ] and os.path.exists( departure_output_path ) and os.path.exists( arrival_output_path ):
+            print('Loading ephemeris data from existing files.')
+        else:
+            # Query both windows concurrently and save the responses to text files in target paths
+            with rt.stage( timings, 'ephemeris.query' ):
+                eq.fetch_ephemerides(
+                    [ ( _config[ 'planet0' ], _config[ 'departure0' ], departure1, _config[ 'step' ], departure_output_path ),
+                      ( _config[ 'planet1' ], _config[ 'arrival0'   ], arrival1,   _config[ 'step' ], arrival_output_path   ) ],
+                    max_workers = _config[ 'fetch_workers' ],
+                    chunk_days  = _config[ 'chunk_days'    ]
+                )
+
+        # Get ephemeris times and states
+        with rt.stage( timings, 'ephemeris.parse' ):
+            et_departures, states_depart = eq.stateReader(departure_output_path)
+            et_arrivals, states_arrive   = eq.stateReader(arrival_output_path)
+
+    return et_departures, states_depart, et_arrivals, states_arrive
+
+def _grid_states( _config, ephemerides, timings = None ):
     '''
-    Calculations
+    Returns the epochs and states of the grid from the ephemeris tables
+    returned by _load_ephemerides, interpolated to the grid epochs when
+    grid_step is set: et_departures, states_depart, et_arrivals, states_arrive
     '''
 
-    # Define cutoff C3
-    cutoff_c3 = _config[ 'cutoff_v' ] ** 2
+    et_departures, states_depart, et_arrivals, states_arrive = ephemerides
 
-    # Get ephemeris times and states
-    et_departures, states_depart = eq.stateReader(departure_output_path)
-    et_arrivals, states_arrive   = eq.stateReader(arrival_output_path)
+    if _config[ 'grid_step' ] is not None:
+        # Interpolate the ephemeris tables to the Lambert grid epochs
+        for name, et, states in ( ( 'Departure', et_departures, states_depart ), ( 'Arrival', et_arrivals, states_arrive ) ):
+            pos_err, vel_err = it.interpolation_error( et, states )
+            print( '%s ephemeris interpolation error: %.3g km, %.3g km/s.' % ( name, pos_err, vel_err ) )
+
+        epochs_depart = tt.requested_epochs( _config[ 'departure0' ], _config[ 'departure1' ], _config[ 'grid_step' ] )
+        epochs_arrive = tt.requested_epochs( _config[ 'arrival0'   ], _config[ 'arrival1'   ], _config[ 'grid_step' ] )
+
+        with rt.stage( timings, 'interpolation' ):
+            states_depart = it.hermite_interpolate( et_departures, states_depart, epochs_depart )
+            states_arrive = it.hermite_interpolate( et_arrivals,   states_arrive, epochs_arrive )
+        et_departures = epochs_depart
+        et_arrivals   = epochs_arrive
+
+    return et_departures, states_depart, et_arrivals, states_arrive
+
+def _compute_grids( _config, data_dir, ephemerides, timings = None ):
+    '''
+    Solves the porkchop grids of the ephemeris tables returned by
+    _load_ephemerides, interpolating them to the grid epochs first when
+    grid_step is set, and reusing the grid cache when enabled.
+
+    Returns:
+    et_departures, et_arrivals, grids, stats, cached
+        Epochs of the grid, grid arrays, solver statistics, and whether the
+        grid was loaded from the cache
+    '''
+
+    et_departures, states_depart, et_arrivals, states_arrive = _grid_states( _config, ephemerides, timings )
 
-    # Number of days in each array and total combinations
     ds  = len( et_departures )
     as_ = len( et_arrivals   )
-    total = ds * as_
 
-    # Create empty array for C3, v_infinity, and tof to store data from lambert's solutions
-    C3_shorts     = np.zeros( (as_, ds) )
-    C3_longs      = np.zeros( (as_, ds) )
-    v_inf_shorts  = np.zeros( (as_, ds) )
-    v_inf_longs   = np.zeros( (as_, ds) )
-    tofs          = np.zeros( (as_, ds) )
-
-    # For each combination of departure and arrivals
-    for na, arr in enumerate( et_arrivals ):
-        for nd, dep in enumerate ( et_departures ):
-
-            if arr > dep: # Ensure arrival date is after departure date
-                # Calculate transfer time, seconds
-                tof = (arr - dep) * 3600 * 24
-
-            # Attempt to solve Lambert's problem for velocities
-
-            # Short way (prograde)
-            try:
-                v_sc_depart_short, v_sc_arrive_short = lt.lambert_solver(
-                    states_depart[ nd, :3 ],
-                    states_arrive[ na, :3 ],
-                    tof,
+    # Grids depend only on the ephemerides and the solver settings
+    cache_dir = os.path.join( data_dir, 'grid_cache' )
+    cache_key = ct.grid_key(
+        [ et_departures, states_depart, et_arrivals, states_arrive ],
+        {
+            'mu'        : _config[ 'mu'        ],
+            'cutoff_v'  : _config[ 'cutoff_v'  ],
+            'step'      : _config[ 'step'      ],
+            'grid_step' : _config[ 'grid_step' ],
+            'solver'    : _config[ 'solver'    ],
+            'revs'      : _config[ 'revs'      ],
+            'low_path'  : _config[ 'low_path'  ],
+            'tof_min'   : _config[ 'tof_min'   ],
+            'tof_max'   : _config[ 'tof_max'   ],
+            'adaptive'  : [ _config[ key ] for key in ( 'coarse', 'refine_c3', 'refine_vinf', 'refine_dv', 'refine_jump' ) ]
+                          if _config[ 'adaptive' ] else False,
+            'continuation' : _config[ 'continuation' ] and not _config[ 'adaptive' ]
+        }
+    )
+    with rt.stage( timings, 'cache.load' ):
+        cached = ct.load_grid( cache_dir, cache_key ) if _config[ 'cache' ] else None
+
+    if cached is not None:
+        print( 'Loading porkchop grid from cache.' )
+        grids = { key: cached[ key ] for key in gt.GRID_KEYS }
+        stats = { key: cached[ key ] for key in cached if key not in gt.GRID_KEYS }
+    else:
+        # Solve Lambert's problem for every combination of departures and arrivals
+        with rt.stage( timings, 'lambert' ):
+            if _config[ 'adaptive' ]:
+                grids, stats = at.adaptive_porkchop_grid(
+                    et_departures,
+                    states_depart,
+                    et_arrivals,
+                    states_arrive,
                     _config[ 'mu' ],
-                    trajectory='pro'
+                    _config[ 'cutoff_v' ],
+                    coarse       = _config[ 'coarse' ],
+                    c3_max       = _config[ 'refine_c3' ],
+                    vinf_max     = _config[ 'refine_vinf' ],
+                    dv_max       = _config[ 'refine_dv' ],
+                    jump         = _config[ 'refine_jump' ],
+                    solver       = _config[ 'solver' ],
+                    revs         = _config[ 'revs' ],
+                    low_path     = _config[ 'low_path' ],
+                    tof_min      = _config[ 'tof_min' ],
+                    tof_max      = _config[ 'tof_max' ],
+                    return_stats = True
                 )
-            except Exception as e:
-                print(f"Prograde Lambert solution failed: {e}")
-                v_sc_depart_short = np.array( [1000, 1000, 1000] )
-                v_sc_arrive_short = np.array( [1000, 1000, 1000] )
-            
-            # Long way (retrograde)
-            try:
-                v_sc_depart_long, v_sc_arrive_long = lt.lambert_solver(
-                    states_depart[ nd, :3 ],
-                    states_arrive[ na, :3 ],
-                    tof,
-                    _config[ 'mu' ],
-                    trajectory='retro'
+            else:
+                # Rows are solved in chunks, reporting progress after each one
+                grids, stats = gt.collect_grid(
+                    gt.iter_porkchop_grid(
+                        et_departures,
+                        states_depart,
+                        et_arrivals,
+                        states_arrive,
+                        _config[ 'mu' ],
+                        _config[ 'cutoff_v' ],
+                        workers      = _config[ 'workers' ],
+                        chunk_size   = _config[ 'chunk_size' ],
+                        progress     = _config[ 'progress' ],
+                        solver       = _config[ 'solver' ],
+                        revs         = _config[ 'revs' ],
+                        low_path     = _config[ 'low_path' ],
+                        tof_min      = _config[ 'tof_min' ],
+                        tof_max      = _config[ 'tof_max' ],
+                        continuation = _config[ 'continuation' ]
+                    ),
+                    ( as_, ds )
+                )
+
+        if _config[ 'cache' ]:
+            with rt.stage( timings, 'cache.save' ):
+                ct.save_grid(
+                    cache_dir,
+                    cache_key,
+                    { **grids, **stats },
+                    max_bytes = _config[ 'cache_size' ] * 1024 ** 2
                 )
-            except Exception as e:
-                print(f"Retrograde Lambert solution failed: {e}")
-                v_sc_depart_long = np.array( [1000, 1000, 1000] )
-                v_sc_arrive_long = np.array( [1000, 1000, 1000] )
 
-            # Calculate C3 values at departure
-            C3_short = norm( v_sc_depart_short - states_depart[ nd, 3: ] ) ** 2
-            C3_long  = norm( v_sc_depart_long  - states_depart[ nd, 3: ] ) ** 2
+    return et_departures, et_arrivals, grids, stats, cached is not None
+
+def interplanetary_porkchop( config ):
+
+    _config = _merge_config( config )
 
-            # Check for unreasonable values (C3)
-            if C3_short > cutoff_c3: C3_short = cutoff_c3
-            if C3_long  > cutoff_c3: C3_long = cutoff_c3
+    # Invalid plot settings fail before the grids are computed
+    _check_render( _config )
 
-            # Calculate v_infinity values at arrival
-            v_inf_short = norm( v_sc_arrive_short - states_arrive[ na, 3: ] ) 
-            v_inf_long  = norm( v_sc_arrive_long  - states_arrive[ na, 3: ] )
+    # Wall time of every stage, only recorded for the report
+    timings = {} if _config[ 'report' ] else None
+    start = time.perf_counter()
 
-            # Check for unreasonable values (v_infinity)
-            if v_inf_short > _config[ 'cutoff_v' ]: v_inf_short = _config[ 'cutoff_v' ]
-            if v_inf_long  > _config[ 'cutoff_v' ]: v_inf_long  = _config[ 'cutoff_v' ]
+    '''
+    Data handling and Ephemeris Query
+    '''
 
-            # Append values to corresponding arrays
-            C3_shorts    [ na, nd ] = C3_short
-            C3_longs     [ na, nd ] = C3_long
-            v_inf_shorts [ na, nd ] = v_inf_short
-            v_inf_longs  [ na, nd ] = v_inf_long
-            tofs         [ na, nd ] = tof
+    data_dir = _data_dir()
 
-        print( f'{na + 1} / {as_}.' )
+    ephemerides = _load_ephemerides( _config, data_dir, timings )
+
+    '''
+    Calculations
+    '''
+
+    et_departures, et_arrivals, grids, stats, cached = _compute_grids( _config, data_dir, ephemerides, timings )
+
+    # Number of days in each array and total combinations
+    ds  = len( et_departures )
+    as_ = len( et_arrivals   )
+    total = ds * as_
+
+    tofs = grids[ 'tofs' ]
 
     print( '\nDeparture days: %i.'     % ds    )
     print( 'Arrival days: %i.'         % as_   )
     print( 'Total Combinations: %i.'   % total )
 
-    # Convert tof from sec to days
-    tofs /= ( 3600.0 * 24.0 )
-
-    # Total delta-v
-    dv_shorts = v_inf_shorts + np.sqrt( C3_shorts )
-    dv_longs  = v_inf_longs  + np.sqrt( C3_longs  )
-    
+    # Pruned cells are NaN and never reach the solver
+    solved = ~np.isnan( tofs )
+    print( 'Feasible Combinations: %i.' % solved.sum() )
+
+    if 'evaluated' in stats:
+        # Adaptive grids only solve part of the combinations
+        solved &= stats[ 'evaluated' ]
+        print( 'Solved Combinations: %i (%.1f%%).' % ( solved.sum(), 100.0 * solved.mean() ) )
+
+    if solved.any():
+        print( 'Mean solver iterations: %.1f.' % stats[ 'iterations' ][ :, solved ].mean() )
+
+    if 'warm' in stats and solved.any():
+        print( 'Warm-started solves: %.1f%%.' % ( 100.0 * stats[ 'warm' ][ :, solved ].mean() ) )
+
+    with rt.stage( timings, 'plot' ):
+        _plot_porkchop( _config, data_dir, et_departures, et_arrivals, grids, timings )
+
+    if timings is not None:
+        timings[ 'total' ] = time.perf_counter() - start
+
+        # Named after the first figure, in the same directory
+        name = _config[ 'filename' ] or _config[ 'filename_dv' ] or 'porkchop.png'
+        report_path = os.path.join( data_dir, 'fig', os.path.splitext( name )[ 0 ] + '_report.json' )
+
+        rt.write_report( report_path, {
+            'config' : { key: _config[ key ] for key in (
+                'planet0', 'planet1', 'departure0', 'departure1', 'arrival0', 'arrival1', 'step', 'grid_step',
+                'cutoff_v', 'solver', 'revs', 'workers', 'adaptive', 'continuation', 'tof_min', 'tof_max', 'dpi' ) },
+            'grid'   : {
+                'departures' : ds,
+                'arrivals'   : as_,
+                'cells'      : total,
+                'feasible'   : int( np.sum( ~np.isnan( tofs ) ) ),
+                'cached'     : cached
+            },
+            'stages' : timings,
+            'solver' : rt.solver_report( grids, stats, _config[ 'cutoff_v' ] )
+        } )
+        print( 'Saved', report_path )
+
+def _figure_specs( _config, et_departures, et_arrivals, grids, timings = None ):
     '''
-    Plotting
+    Returns the specifications of the C3 and total delta-v figures of grids,
+    see plot_tools.draw_figure. The time spent computing the contour lines
+    is added to timings.
     '''
 
-    # Create subdirectories for figures
-    fig_dir = os.path.join( data_dir, 'fig' )
+    from utils import plot_tools as pt
 
-    # Create the fig subdirectory if it doesn't exist
-    if not os.path.exists( fig_dir ):
-        os.makedirs( fig_dir, exist_ok = True )
+    C3_shorts     = grids[ 'C3_shorts'    ]
+    C3_longs      = grids[ 'C3_longs'     ]
+    v_inf_shorts  = grids[ 'v_inf_shorts' ]
+    v_inf_longs   = grids[ 'v_inf_longs'  ]
+    tofs          = grids[ 'tofs'         ]
 
+    # Total delta-v
+    dv_shorts = v_inf_shorts + np.sqrt( C3_shorts )
+    dv_longs  = v_inf_longs  + np.sqrt( C3_longs  )
+    
     # Normalize the departure and arrival date grids 
     normed_departures = ( et_departures - et_departures[ 0 ] )
     normed_arrivals   = ( et_arrivals   - et_arrivals[ 0 ]   )
@@ -249,118 +447,462 @@ def interplanetary_porkchop( config ):
     # Define linewdith
     lw = _config[ 'lw' ]
 
-    # Create plots
+    # Contour lines, computed once and shared by both figures
+    with rt.stage( timings, 'plot.contour' ):
+        geometry = {
+            name: pt.contour_geometry( dep_mesh, arr_mesh, values, _config[ levels ] )
+            for name, values, levels in (
+                ( 'C3_shorts',    C3_shorts,    'c3_levels'   ),
+                ( 'C3_longs',     C3_longs,     'c3_levels'   ),
+                ( 'v_inf_shorts', v_inf_shorts, 'vinf_levels' ),
+                ( 'v_inf_longs',  v_inf_longs,  'vinf_levels' ),
+                ( 'dv_shorts',    dv_shorts,    'dv_levels'   ),
+                ( 'dv_longs',     dv_longs,     'dv_levels'   ),
+                ( 'tofs',         tofs,         'tof_levels'  )
+            )
+        }
+
+    # Figure specifications, see plot_tools.draw_figure
+    shared = {
+        'figsize'  : _config[ 'figsize' ],
+        'dpi'      : _config[ 'dpi' ],
+        'fontsize' : _config[ 'fontsize' ],
+        'xlim'     : ( normed_departures[ 0 ], normed_departures[ -1 ] ),
+        'ylim'     : ( normed_arrivals[ 0 ],   normed_arrivals[ -1 ]   ),
+        'xlabel'   : 'Departure (Days Past %s)' % _config[ 'departure0' ],
+        'ylabel'   : 'Arrival (Days Past %s)'   % _config[ 'arrival0'   ]
+    }
+
+    c3_spec = {
+        **shared,
+        'filename' : _config[ 'filename' ],
+        'title'    : _config[ 'title' ],
+        'layers'   : [
+            ( geometry[ 'C3_shorts'    ], '%i', { 'colors': 'm',           'linewidths': lw       } ),
+            ( geometry[ 'C3_longs'     ], '%i', { 'colors': 'm',           'linewidths': lw       } ),
+            ( geometry[ 'v_inf_shorts' ], '%i', { 'colors': 'deepskyblue', 'linewidths': lw       } ),
+            ( geometry[ 'v_inf_longs'  ], '%i', { 'colors': 'deepskyblue', 'linewidths': lw       } ),
+            ( geometry[ 'tofs'         ], '%i', { 'colors': 'white',       'linewidths': lw * 0.6 } )
+        ],
+        'legend'   : [
+            ( r'C3 ($\dfrac{km^2}{s^2}$)',         'm' ),
+            ( r'$V_{\infty}\; (\dfrac{km}{s})$', 'c' ),
+            ( r'Time of Flight (days)',           'w' )
+        ]
+    }
 
-    fig, ax = plt.subplots( figsize = _config[ 'figsize' ] )
+    dv_spec = {
+        **shared,
+        'filename' : _config[ 'filename_dv' ],
+        'title'    : r'$\Delta V$ Plot',
+        'layers'   : [
+            ( geometry[ 'dv_shorts' ], '%.1f', { 'cmap': _config[ 'dv_cmap' ], 'linewidths': lw       } ),
+            ( geometry[ 'dv_longs'  ], '%.1f', { 'cmap': _config[ 'dv_cmap' ], 'linewidths': lw       } ),
+            ( geometry[ 'tofs'      ], '%i',   { 'colors': 'c',                'linewidths': lw * 0.6 } )
+        ]
+    }
 
-    c0 = ax.contour(
-        dep_mesh,
-        arr_mesh,
-        C3_shorts,
-        levels = _config[ 'c3_levels' ], colors = 'm', linewidths = lw
-    )
-    c1 = ax.contour(
-        dep_mesh,
-        arr_mesh,
-        C3_longs,
-        levels = _config[ 'c3_levels' ], colors = 'm', linewidths = lw
-    )
-    c2 = ax.contour(
-        dep_mesh,
-        arr_mesh,
-        v_inf_shorts,
-        levels = _config[ 'vinf_levels' ], colors = 'deepskyblue', linewidths = lw
+    return c3_spec, dv_spec
+
+def _check_render( _config ):
+    '''
+    Raises a ValueError for an unknown 'render' mode, or for 'show' with
+    headless rendering, which has no figure window
+    '''
+
+    if _config[ 'render' ] not in ( 'pyplot', 'headless' ):
+        raise ValueError( "Unknown 'render' mode '%s', expected 'pyplot' or 'headless'." % _config[ 'render' ] )
+
+    if _config[ 'render' ] == 'headless' and _config[ 'show' ]:
+        raise ValueError( "'show' requires 'render': 'pyplot'; headless rendering only saves the figures." )
+
+def _plot_porkchop( _config, data_dir, et_departures, et_arrivals, grids, timings = None ):
+    '''
+    Draws and saves the C3 and total delta-v porkchop plots of grids. The
+    time spent in contour, clabel, savefig and show is added to timings.
+    '''
+
+    _check_render( _config )
+
+    # Plotting libraries are only imported when figures are drawn, so that
+    # compute-only runs and worker processes do not load matplotlib
+    import matplotlib.pyplot as plt
+    from utils import plot_tools as pt
+
+    '''
+    Plotting
+    '''
+
+    # Create subdirectories for figures
+    fig_dir = os.path.join( data_dir, 'fig' )
+
+    # Create the fig subdirectory if it doesn't exist
+    if not os.path.exists( fig_dir ):
+        os.makedirs( fig_dir, exist_ok = True )
+
+    c3_spec, dv_spec = _figure_specs( _config, et_departures, et_arrivals, grids, timings )
+
+    if _config[ 'render' ] == 'headless':
+        # Saved figures only, rendered concurrently without pyplot
+        specs = [
+            { **spec, 'path': os.path.join( fig_dir, spec[ 'filename' ] ) }
+            for spec in ( c3_spec, dv_spec ) if spec[ 'filename' ] is not None
+        ]
+
+        render_timings = pt.render_figures( specs, workers = _config[ 'render_workers' ] )
+
+        for spec in specs:
+            print( 'Saved', spec[ 'filename' ] )
+
+        if timings is not None:
+            for name, value in render_timings.items():
+                timings[ name ] = timings.get( name, 0.0 ) + value
+
+        return
+
+    for spec in ( c3_spec, dv_spec ):
+        with plt.style.context( pt.STYLE ):
+            fig, ax = plt.subplots( figsize = spec[ 'figsize' ] )
+
+            pt.draw_figure( fig, ax, spec, timings )
+
+            if spec[ 'filename' ] is not None:
+                with rt.stage( timings, 'plot.savefig' ):
+                    plt.savefig( os.path.join( fig_dir, spec[ 'filename' ] ), dpi = spec[ 'dpi' ] )
+                print( 'Saved', spec[ 'filename' ] )
+
+            if _config[ 'show' ]:
+                with rt.stage( timings, 'plot.show' ):
+                    plt.show()
+
+            plt.close()
+
+def optimal_transfer( config ):
+    '''
+    Finds the departure and arrival dates of the transfer minimizing
+    config[ 'objective' ] over continuous dates in the windows of config,
+    without building a porkchop grid.
+
+    Returns:
+    dict
+        See optimize_tools.optimize_transfer, plus 'departure_date' and
+        'arrival_date' strings
+    '''
+
+    _config = _merge_config( config )
+
+    et_departures, states_depart, et_arrivals, states_arrive = _load_ephemerides( _config, _data_dir() )
+
+    result = ot.optimize_transfer(
+        et_departures,
+        states_depart,
+        et_arrivals,
+        states_arrive,
+        _config[ 'mu' ],
+        objective   = _config[ 'objective'   ],
+        branch      = _config[ 'branch'      ],
+        seeds       = _config[ 'seeds'       ],
+        coarse_step = _config[ 'coarse_step' ],
+        solver      = _config[ 'solver'      ],
+        revs        = _config[ 'revs'        ],
+        low_path    = _config[ 'low_path'    ],
+        tof_min     = _config[ 'tof_min'     ],
+        tof_max     = _config[ 'tof_max'     ]
     )
-    c3 = ax.contour(
-        dep_mesh,
-        arr_mesh,
-        v_inf_longs,
-        levels = _config[ 'vinf_levels' ], colors = 'deepskyblue', linewidths = lw
+
+    result[ 'departure_date' ] = tt.jd_to_date( result[ 'departure' ] )
+    result[ 'arrival_date'   ] = tt.jd_to_date( result[ 'arrival'   ] )
+
+    return result
+
+def mission_survey( jobs, config = None, plot = False ):
+    '''
+    Computes the porkchop grids of many transfers at once and summarizes each
+    one by its best C3, arrival v_infinity and total delta-v.
+
+    The ephemeris of every body is loaded once, over the union of the
+    windows it appears in, and shared by all the jobs. Jobs are scheduled
+    across config[ 'workers' ] processes.
+
+    Parameters:
+    jobs : list of dict
+        Each with 'planet0', 'planet1', 'departure0', 'departure1',
+        'arrival0' and 'arrival1'
+    config : dict, optional
+        Settings shared by every job, as for interplanetary_porkchop
+    plot : bool, optional
+        Also draw the porkchop plots of every job. Figures are saved as
+        '<planet0>_<planet1>_<departure0>_c3.png' and '..._dv.png' unless
+        filename and filename_dv are set.
+
+    Returns:
+    list of dict
+        For every job, the 'job' and its 'summary' (see
+        survey_tools.grid_minima)
+    '''
+
+    _config = _merge_config( config or {} )
+    data_dir = _data_dir()
+
+    grid_step = _config[ 'grid_step' ] if _config[ 'grid_step' ] is not None else _config[ 'step' ]
+    jobs = [ { **job, 'step': grid_step } for job in jobs ]
+
+    # Union of the windows of each body, padded by one step for interpolation
+    spans = {}
+    for job in jobs:
+        for body, start, stop in ( ( job[ 'planet0' ], job[ 'departure0' ], job[ 'departure1' ] ),
+                                   ( job[ 'planet1' ], job[ 'arrival0'   ], job[ 'arrival1'   ] ) ):
+            start, stop = tt.date_to_jd( start ), tt.date_to_jd( stop )
+            first, last = spans.get( body, ( start, stop ) )
+            spans[ body ] = ( min( first, start ), max( last, stop ) )
+
+    requests = [
+        ( body, tt.jd_to_date( first ), tt.jd_to_date( last + _config[ 'step' ] ), _config[ 'step' ] )
+        for body, ( first, last ) in spans.items()
+    ]
+
+    tables = _load_tables( _config, data_dir, requests )
+
+    return _run_survey( _config, data_dir, jobs, tables, plot )
+
+def _load_tables( _config, data_dir, requests ):
+    '''
+    Loads the ephemeris table of every ( body, start, stop, step ) request,
+    keyed by body
+    '''
+
+    if _config[ 'ephemeris' ] == 'analytic':
+        loaded = [ ae.get_states( *request ) for request in requests ]
+    else:
+        loaded = es.get_states_many(
+            os.path.join( data_dir, 'ephemeris_store' ),
+            requests,
+            max_workers = _config[ 'fetch_workers' ],
+            chunk_days  = _config[ 'chunk_days'    ]
+        )
+
+    return { request[ 0 ]: table for request, table in zip( requests, loaded ) }
+
+def _run_survey( _config, data_dir, jobs, tables, plot ):
+    '''
+    Computes, summarizes and optionally plots the grids of survey jobs
+    '''
+
+    results = st.run_survey(
+        jobs,
+        tables,
+        _config[ 'mu' ],
+        _config[ 'cutoff_v' ],
+        workers    = _config[ 'workers' ],
+        keep_grids = plot,
+        solver     = _config[ 'solver' ],
+        revs       = _config[ 'revs' ],
+        low_path   = _config[ 'low_path' ],
+        tof_min    = _config[ 'tof_min' ],
+        tof_max    = _config[ 'tof_max' ]
     )
-    c4 = ax.contour(
-        dep_mesh,
-        arr_mesh,
-        tofs,
-        levels = _config[ 'tof_levels' ], colors = 'white', linewidths = lw * 0.6
+
+    print( st.format_summary( results ) )
+
+    if plot:
+        for result in results:
+            job = result[ 'job' ]
+            name = '%s_%s_%s' % ( job[ 'planet0' ], job[ 'planet1' ], job[ 'departure0' ][ :10 ] )
+
+            job_config = { **_config, **job }
+            if _config[ 'filename' ] is None:
+                job_config[ 'filename' ] = name + '_c3.png'
+            if _config[ 'filename_dv' ] is None:
+                job_config[ 'filename_dv' ] = name + '_dv.png'
+
+            _plot_porkchop( job_config, data_dir, result.pop( 'et_departures' ), result.pop( 'et_arrivals' ), result.pop( 'grids' ) )
+
+    return results
+
+def scan_launch_windows( config = None, plot = False ):
+    '''
+    Finds every launch opportunity from planet0 to planet1 with a departure
+    between departure0 and departure1, which may span decades, and computes
+    full-resolution grids only inside them.
+
+    Synodic periods and Hohmann times of flight from planetary_data set up a
+    coarse pass over the whole span. Each of its delta-v minima, half a
+    synodic period apart at least, becomes a window covering the transfers
+    within scan_margin of the minimum. The arrival dates of config are not
+    used; times of flight default to 0.4 to 1.6 times the Hohmann time of
+    flight unless tof_min and tof_max are set.
+
+    Returns:
+    list of dict
+        For every window, the 'job' with its dates and its 'summary', see
+        mission_survey
+    '''
+
+    _config = _merge_config( config or {} )
+    data_dir = _data_dir()
+
+    planet0, planet1 = _config[ 'planet0' ], _config[ 'planet1' ]
+    body0, body1 = ae.find_body( planet0 ), ae.find_body( planet1 )
+
+    synodic   = wt.synodic_period( body0, body1, _config[ 'mu' ] )
+    t_hohmann = wt.hohmann_tof( body0, body1, _config[ 'mu' ] )
+    tof_min = _config[ 'tof_min' ] if _config[ 'tof_min' ] is not None else 0.4 * t_hohmann
+    tof_max = _config[ 'tof_max' ] if _config[ 'tof_max' ] is not None else 1.6 * t_hohmann
+
+    print( 'Synodic period: %.0f days. Hohmann time of flight: %.0f days.' % ( synodic, t_hohmann ) )
+
+    # Both bodies over the whole span, padded for interpolation
+    start = tt.date_to_jd( _config[ 'departure0' ] )
+    stop  = tt.date_to_jd( _config[ 'departure1' ] )
+    pad   = _config[ 'step' ] + 1
+
+    tables = _load_tables( _config, data_dir, [
+        ( planet0, tt.jd_to_date( start ), tt.jd_to_date( stop + pad ), _config[ 'step' ] ),
+        ( planet1, tt.jd_to_date( np.floor( start + tof_min - 0.5 ) + 0.5 ), tt.jd_to_date( np.ceil( stop + tof_max - 0.5 ) + 0.5 + pad ), _config[ 'step' ] )
+    ] )
+
+    # Cheap pass over the whole span
+    et_departures, tofs, dv = wt.coarse_scan(
+        ( start, stop ),
+        tables,
+        planet0,
+        planet1,
+        _config[ 'mu' ],
+        step      = _config[ 'scan_step' ],
+        tof_range = ( tof_min, tof_max ),
+        solver    = _config[ 'solver' ]
     )
 
-    plt.clabel( c0, fmt = '%i')
-    plt.clabel( c1, fmt = '%i')
-    plt.clabel( c2, fmt = '%i')
-    plt.clabel( c3, fmt = '%i')
-    plt.clabel( c4, fmt = '%i')
-
-    plt.plot( [ 0 ], [ 0 ], 'm' )
-    plt.plot( [ 0 ], [ 0 ], 'c' )
-    plt.plot( [ 0 ], [ 0 ], 'w' )
-
-    plt.legend(
-        [
-            r'C3 ($\dfrac{km^2}{s^2}$)',
-            r'$V_{\infty}\; (\dfrac{km}{s})$',
-            r'Time of Flight (days)'
-        ],
-        bbox_to_anchor = ( 1.005, 1.01 ),
-        fontsize = 10
+    windows = wt.detect_windows(
+        et_departures,
+        tofs,
+        dv,
+        synodic,
+        margin = _config[ 'scan_margin' ],
+        dv_max = _config[ 'scan_dv_max' ]
     )
 
-    ax.set_title( _config[ 'title' ], fontsize = _config[ 'fontsize' ] )
-    ax.set_ylabel( 'Arrival (Days Past %s)' % _config[ 'arrival0' ], fontsize = _config[ 'fontsize' ] )
-    ax.set_xlabel( 'Departure (Days Past %s)' % _config[ 'departure0' ], fontsize = _config[ 'fontsize' ] )
+    print( 'Launch windows found: %i.' % len( windows ) )
 
-    if _config[ 'filename' ] is not None:
-        plt.savefig( os.path.join( fig_dir, _config[ 'filename' ] ), dpi = _config[ 'dpi' ] )
-        print( 'Saved', _config[ 'filename' ] )
+    # Full-resolution grids inside the windows only
+    grid_step = _config[ 'grid_step' ] if _config[ 'grid_step' ] is not None else _config[ 'step' ]
+    jobs = [
+        { 'planet0': planet0, 'planet1': planet1, 'step': grid_step,
+          **{ key: window[ key ] for key in ( 'departure0', 'departure1', 'arrival0', 'arrival1' ) } }
+        for window in windows
+    ]
 
-    if _config[ 'show' ]:
-        plt.show()
-    
-    plt.close()
+    return _run_survey( _config, data_dir, jobs, tables, plot )
 
+def lazy_porkchop( config = None ):
     '''
-    Total delta V plot
+    Returns a lazy_grid.LazyGrid over the departure and arrival windows of
+    config, which solves cells only when they are requested and remembers
+    them, so that zooming into part of the windows at a finer step solves
+    only the new cells.
     '''
 
-    fig, ax = plt.subplots( figsize = _config[ 'figsize' ] )
+    _config = _merge_config( config or {} )
 
-    c0 = ax.contour(
-        dep_mesh,
-        arr_mesh,
-        dv_shorts,
-        levels = _config[ 'dv_levels' ],
-        cmap = _config[ 'dv_cmap' ], 
-        linewidths = lw
+    # Tables padded by one step, so that epochs up to the end of the windows
+    # can be interpolated
+    et_departures, states_depart, et_arrivals, states_arrive = _load_ephemerides(
+        { **_config, 'grid_step': _config[ 'step' ] }, _data_dir()
     )
-    c1 = ax.contour(
-        dep_mesh,
-        arr_mesh,
-        dv_longs,
-        levels = _config[ 'dv_levels' ],
-        cmap = _config[ 'dv_cmap' ], 
-        linewidths = lw
+
+    return lg.LazyGrid(
+        ( et_departures, states_depart ),
+        ( et_arrivals,   states_arrive ),
+        _config[ 'mu' ],
+        _config[ 'cutoff_v' ],
+        tof_min  = _config[ 'tof_min'  ],
+        tof_max  = _config[ 'tof_max'  ],
+        solver   = _config[ 'solver'   ],
+        revs     = _config[ 'revs'     ],
+        low_path = _config[ 'low_path' ]
     )
-    c2 = ax.contour(
-        dep_mesh,
-        arr_mesh,
-        tofs,
-        levels = _config[ 'tof_levels' ],
-        colors = 'c', 
-        linewidths = lw * 0.6
+
+def plot_grids( config, et_departures, et_arrivals, grids ):
+    '''
+    Draws the porkchop plots of grids computed outside of
+    interplanetary_porkchop, such as the windows of a LazyGrid, with the
+    plot settings of config.
+    '''
+
+    _config = _merge_config( {
+        **config,
+        'departure0' : tt.jd_to_date( et_departures[ 0 ] ),
+        'arrival0'   : tt.jd_to_date( et_arrivals[ 0 ] )
+    } )
+
+    _plot_porkchop( _config, _data_dir(), et_departures, et_arrivals, grids )
+
+def store_porkchop( config = None, path = None, plot = False ):
+    '''
+    Solves the porkchop grid of config straight into an on-disk
+    grid_store.GridStore, one block of arrival rows at a time, so that
+    memory stays bounded for grids of any size. A run that is interrupted
+    resumes from the blocks already stored. Adaptive refinement and the grid
+    cache are not used.
+
+    Parameters:
+    config : dict, optional
+        As for interplanetary_porkchop
+    path : str, optional
+        Directory of the store, data/grid_store/<planet0>_<planet1>_<windows>_<step> by default
+    plot : bool, optional
+        Draw the porkchop plots from an overview of the store, see
+        GridStore.overview
+
+    Returns:
+    GridStore
+    '''
+
+    _config = _merge_config( config or {} )
+    data_dir = _data_dir()
+
+    et_departures, states_depart, et_arrivals, states_arrive = _grid_states(
+        _config, _load_ephemerides( _config, data_dir )
     )
 
-    plt.clabel( c0, fmt = '%.1f' )
-    plt.clabel( c1, fmt = '%.1f' )
-    plt.clabel( c2, fmt = '%i' )
+    grid_step = _config[ 'grid_step' ] if _config[ 'grid_step' ] is not None else _config[ 'step' ]
 
-    ax.set_title( r'$\Delta V$ Plot', fontsize = _config[ 'fontsize' ] )
-    ax.set_ylabel( 'Arrival (Days Past %s)' % _config[ 'arrival0' ], fontsize = _config[ 'fontsize' ] )
-    ax.set_xlabel( 'Departure (Days Past %s)' % _config[ 'departure0' ], fontsize = _config[ 'fontsize' ] )
+    if path is None:
+        path = os.path.join( data_dir, 'grid_store', '%s_%s_%s_%s_%s_%s_%gd' % (
+            _config[ 'planet0' ], _config[ 'planet1' ], _config[ 'departure0' ], _config[ 'departure1' ],
+            _config[ 'arrival0' ], _config[ 'arrival1' ], grid_step ) )
 
-    if _config[ 'filename_dv' ] is not None:
-        plt.savefig( os.path.join( fig_dir, _config[ 'filename_dv' ] ), dpi = _config[ 'dpi' ] )
-        print( 'Saved', _config[ 'filename_dv' ] )
+    store = gs.GridStore.create(
+        path,
+        et_departures,
+        et_arrivals,
+        { key: _config[ key ] for key in (
+            'planet0', 'planet1', 'departure0', 'departure1', 'arrival0', 'arrival1', 'step', 'grid_step',
+            'ephemeris', 'mu', 'cutoff_v', 'solver', 'revs', 'low_path', 'continuation', 'tof_min', 'tof_max' ) }
+    )
+
+    print( 'Grid store: %s (%i x %i cells).' % ( path, store.shape[ 0 ], store.shape[ 1 ] ) )
+
+    gs.write_grid(
+        store,
+        et_departures,
+        states_depart,
+        et_arrivals,
+        states_arrive,
+        _config[ 'mu' ],
+        _config[ 'cutoff_v' ],
+        workers      = _config[ 'workers' ],
+        progress     = _config[ 'progress' ],
+        solver       = _config[ 'solver' ],
+        revs         = _config[ 'revs' ],
+        low_path     = _config[ 'low_path' ],
+        tof_min      = _config[ 'tof_min' ],
+        tof_max      = _config[ 'tof_max' ],
+        continuation = _config[ 'continuation' ]
+    )
 
-    if _config[ 'show' ]:
-        plt.show()
+    if plot:
+        et_departures, et_arrivals, grids = store.overview( gt.GRID_KEYS )
+        plot_grids( config or {}, et_departures, et_arrivals, grids )
 
-    plt.close()
\ No newline at end of file
+    return store
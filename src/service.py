@@ -0,0 +1,319 @@
+'''
+Porkchop computation service
+
+Long-running asyncio HTTP server answering porkchop requests. Parsed
+ephemerides, computed grids and rendered figures are kept in size-bounded
+in-memory LRU caches, concurrent identical requests share one computation,
+and the grids and figures are computed in a process pool so the event loop
+never blocks.
+
+Endpoints (GET with the config as URL parameters, or POST with a JSON body):
+
+    /grid?planet1=venus&step=2&format=json       grid arrays as JSON (NaN as null)
+    /grid?...&format=npz                         grid arrays as a NumPy .npz archive
+    /grid?...&format=npy&array=C3_shorts         one grid array as a NumPy .npy file
+    /figure?...&kind=c3                          C3 figure ('c3' or 'dv') as PNG
+    /status                                      cache and coalescing statistics
+
+Usage:
+    python3 main.py serve [--host HOST] [--port PORT]
+'''
+
+# Python Standard Libraries
+import asyncio
+import io
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# 3rd Party Libraries
+import numpy as np
+
+# Porkchop-Plot-Generator libraries
+from utils import config_tools  as cf
+from utils import service_tools as sv
+import porkchop
+
+# Config keys selecting the ephemeris tables of a grid
+EPHEMERIS_KEYS = (
+    'planet0', 'planet1', 'departure0', 'departure1', 'arrival0', 'arrival1',
+    'step', 'grid_step', 'ephemeris', 'store', 'load'
+)
+
+# Config keys changing the grid computed from the ephemerides
+GRID_KEYS = EPHEMERIS_KEYS + (
+    'mu', 'cutoff_v', 'solver', 'revs', 'low_path', 'continuation', 'tof_min', 'tof_max',
+    'adaptive', 'coarse', 'refine_c3', 'refine_vinf', 'refine_dv', 'refine_jump'
+)
+
+# Config keys changing the figures drawn from a grid
+FIGURE_KEYS = GRID_KEYS + (
+    'c3_levels', 'vinf_levels', 'tof_levels', 'dv_levels', 'dv_cmap',
+    'figsize', 'lw', 'title', 'fontsize', 'dpi'
+)
+
+# Config keys a request may override. Other keys, such as the number of
+# processes or the paths written to, are set by the service only.
+OVERRIDE_KEYS = FIGURE_KEYS
+
+# Request parameters that are not config keys
+REQUEST_KEYS = ( 'format', 'array', 'kind' )
+
+FIGURE_KINDS = ( 'c3', 'dv' )
+
+
+def _grid_job( _config, ephemerides ):
+    '''
+    Computes the grid of _config from its ephemerides, in a worker process.
+    Returns the epochs, grid arrays and solver statistics in one dict.
+    '''
+
+    et_departures, et_arrivals, grids, stats, _ = porkchop._compute_grids( _config, porkchop._data_dir(), ephemerides )
+
+    return { 'et_departures': et_departures, 'et_arrivals': et_arrivals, **grids, **stats }
+
+def _figure_job( _config, grid, kind ):
+    '''
+    Renders the figure kind ('c3' or 'dv') of a grid headlessly, in a
+    worker process. Returns the PNG bytes.
+    '''
+
+    from utils import plot_tools as pt
+
+    c3_spec, dv_spec = porkchop._figure_specs( _config, grid[ 'et_departures' ], grid[ 'et_arrivals' ], grid )
+
+    buffer = io.BytesIO()
+    pt.render_figure( { **( c3_spec if kind == 'c3' else dv_spec ), 'path': buffer } )
+
+    return buffer.getvalue()
+
+def _encode_grid( grid, fmt, array ):
+    '''
+    Encodes a grid as ( body, content type ) in format fmt
+    '''
+
+    if fmt == 'json':
+        arrays = {
+            name: np.where( np.isnan( values ), None, values ).tolist() if values.dtype.kind == 'f' else values.tolist()
+            for name, values in grid.items()
+        }
+        return json.dumps( arrays ).encode(), 'application/json'
+
+    buffer = io.BytesIO()
+
+    if fmt == 'npz':
+        np.savez_compressed( buffer, **grid )
+    else:
+        np.save( buffer, grid[ array ] )
+
+    return buffer.getvalue(), 'application/octet-stream'
+
+class PorkchopService:
+    '''
+    Porkchop requests served from in-memory caches, coalesced, and computed
+    in a process pool.
+
+    Parameters:
+    config : dict, optional
+        Defaults of every request, overriding the porkchop defaults
+    workers : int, optional
+        Processes computing grids and figures (None for all CPUs)
+    cache_size : float
+        Memory of each of the ephemeris, grid and figure caches in MB
+    '''
+
+    def __init__( self, config = None, workers = None, cache_size = 256 ):
+        self.config = dict( config or {} )
+
+        max_bytes = int( cache_size * 1024 ** 2 )
+        self.ephemerides = sv.LRUCache( max_bytes )
+        self.grids       = sv.LRUCache( max_bytes )
+        self.figures     = sv.LRUCache( max_bytes )
+        self.coalescer   = sv.Coalescer()
+
+        # Workers are spawned rather than forked: forking the threads of the
+        # event loop and of the ephemeris reader can deadlock the children
+        self.executor = ProcessPoolExecutor( max_workers = workers, mp_context = multiprocessing.get_context( 'spawn' ) )
+
+        # Ephemerides are read and downloaded one request at a time, so that
+        # the ephemeris store is never written concurrently
+        self.io_executor = ThreadPoolExecutor( max_workers = 1 )
+
+    def close( self ):
+        self.executor.shutdown()
+        self.io_executor.shutdown()
+
+    def request_config( self, query, body ):
+        '''
+        Returns the config of a request: the service defaults overridden by
+        the URL parameters, read as in main.py -s KEY=VALUE, and by the JSON
+        body. Only the keys of OVERRIDE_KEYS can be overridden; any other
+        key is rejected with a 400.
+        '''
+
+        overrides = dict(
+            cf.parse_override( '%s=%s' % ( key, value ) ) for key, value in query.items() if key not in REQUEST_KEYS
+        )
+
+        if body:
+            try:
+                body = json.loads( body )
+            except ( json.JSONDecodeError, TypeError, ValueError ) as err:
+                raise sv.HTTPError( 400, 'Malformed JSON body: %s' % err ) from err
+
+            if not isinstance( body, dict ):
+                raise sv.HTTPError( 400, 'The JSON body must be an object of config parameters.' )
+
+            overrides.update( body )
+
+        rejected = sorted( key for key in overrides if key not in OVERRIDE_KEYS )
+        if rejected:
+            raise sv.HTTPError( 400, 'Parameters that cannot be set by a request: %s.' % ', '.join( rejected ) )
+
+        config = { **self.config, **overrides }
+
+        try:
+            _config = porkchop._merge_config( cf.resolve_config( config ) )
+        except ValueError as err:
+            raise sv.HTTPError( 400, str( err ) ) from err
+
+        # Requests run without interaction and without writing figures
+        _config.update( { 'show': False, 'progress': None, 'report': False } )
+
+        return _config
+
+    async def _cached( self, cache, key, compute ):
+        # Serve from cache, or compute once for all concurrent requests of key
+        value = cache.get( key )
+        if value is not None:
+            return value
+
+        async def factory():
+            value = await compute()
+            cache.put( key, value )
+            return value
+
+        return await self.coalescer.run( key, factory )
+
+    async def get_ephemerides( self, _config ):
+        key = ( 'ephemerides', sv.request_key( { k: _config[ k ] for k in EPHEMERIS_KEYS } ) )
+        loop = asyncio.get_running_loop()
+
+        return await self._cached( self.ephemerides, key, lambda: loop.run_in_executor(
+            self.io_executor, porkchop._load_ephemerides, _config, porkchop._data_dir()
+        ) )
+
+    async def get_grid( self, _config ):
+        key = ( 'grid', sv.request_key( { k: _config[ k ] for k in GRID_KEYS } ) )
+        loop = asyncio.get_running_loop()
+
+        async def compute():
+            ephemerides = await self.get_ephemerides( _config )
+            return await loop.run_in_executor( self.executor, _grid_job, _config, ephemerides )
+
+        return await self._cached( self.grids, key, compute )
+
+    async def get_figure( self, _config, kind ):
+        key = ( 'figure', kind, sv.request_key( { k: _config[ k ] for k in FIGURE_KEYS } ) )
+        loop = asyncio.get_running_loop()
+
+        async def compute():
+            grid = await self.get_grid( _config )
+            return await loop.run_in_executor( self.executor, _figure_job, _config, grid, kind )
+
+        return await self._cached( self.figures, key, compute )
+
+    def status( self ):
+        return {
+            'ephemerides' : self.ephemerides.stats(),
+            'grids'       : self.grids.stats(),
+            'figures'     : self.figures.stats(),
+            'in_flight'   : len( self.coalescer ),
+            'coalesced'   : self.coalescer.coalesced
+        }
+
+    async def dispatch( self, method, path, query, body ):
+        '''
+        Answers a request as ( status, body, content type )
+        '''
+
+        if method not in ( 'GET', 'POST' ):
+            raise sv.HTTPError( 405, "Method '%s' not allowed." % method )
+
+        if path == '/status':
+            return 200, self.status(), 'application/json'
+
+        if path == '/grid':
+            fmt   = query.get( 'format', 'json' )
+            array = query.get( 'array' )
+
+            if fmt not in ( 'json', 'npz', 'npy' ):
+                raise sv.HTTPError( 400, "Unknown format '%s', expected 'json', 'npz' or 'npy'." % fmt )
+
+            if fmt == 'npy' and array is None:
+                raise sv.HTTPError( 400, "The npy format needs an 'array' parameter." )
+
+            grid = await self.get_grid( self.request_config( query, body ) )
+
+            if fmt == 'npy' and array not in grid:
+                raise sv.HTTPError( 400, "Unknown array '%s', expected one of %s." % ( array, ', '.join( grid ) ) )
+
+            # Large grids are encoded off the event loop
+            payload, content_type = await asyncio.get_running_loop().run_in_executor( None, _encode_grid, grid, fmt, array )
+            return 200, payload, content_type
+
+        if path == '/figure':
+            kind = query.get( 'kind', 'c3' )
+
+            if kind not in FIGURE_KINDS:
+                raise sv.HTTPError( 400, "Unknown figure kind '%s', expected 'c3' or 'dv'." % kind )
+
+            return 200, await self.get_figure( self.request_config( query, body ), kind ), 'image/png'
+
+        raise sv.HTTPError( 404, "Unknown path '%s'." % path )
+
+    async def handle( self, reader, writer ):
+        '''
+        Connection callback of asyncio.start_server
+        '''
+
+        try:
+            try:
+                status, payload, content_type = await self.dispatch( *await sv.read_request( reader ) )
+            except sv.HTTPError as err:
+                status, payload, content_type = err.status, { 'error': str( err ) }, 'application/json'
+            except Exception as err:
+                status, payload, content_type = 500, { 'error': '%s: %s' % ( type( err ).__name__, err ) }, 'application/json'
+
+            writer.write( sv.response( status, payload, content_type ) )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+async def run_service( config = None, host = '127.0.0.1', port = 8050, workers = None, cache_size = 256 ):
+    '''
+    Serves porkchop requests on host:port until cancelled
+    '''
+
+    service = PorkchopService( config, workers = workers, cache_size = cache_size )
+    server  = await asyncio.start_server( service.handle, host, port, limit = sv.MAX_HEAD )
+
+    print( 'Serving porkchop requests on http://%s:%i' % ( host, port ) )
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def serve( config = None, host = '127.0.0.1', port = 8050, workers = None, cache_size = 256 ):
+    '''
+    Runs the porkchop service until interrupted, see PorkchopService
+    '''
+
+    try:
+        asyncio.run( run_service( config, host, port, workers, cache_size ) )
+    except KeyboardInterrupt:
+        pass
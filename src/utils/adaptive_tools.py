@@ -0,0 +1,221 @@
+'''
+Adaptive porkchop grids
+
+Evaluates a coarse lattice of the porkchop grid first, then refines it
+quadtree-style only inside the tiles that reach low C3, v_infinity or total
+delta-v, or where those values change sharply. Cells that are never solved
+are filled by bilinear interpolation from the corners of their tile, so the
+output has the same shape as porkchop_grid and can be contoured directly.
+'''
+
+# Third-party Libraries
+import numpy as np
+
+# Porkchop-Plot-Generator Libraries
+from utils import grid_tools as gt
+
+
+def _initial_tiles(n, coarse):
+    # Tile edges every coarse cells, the last tile ending on the grid edge
+    edges = np.unique(np.r_[np.arange(0, n, coarse), n - 1])
+    if edges.size == 1:
+        edges = np.array([0, 0])
+    return edges[:-1], edges[1:]
+
+def _split(lo, hi):
+    # Split [lo, hi] at its midpoint; spans of at most one cell are kept whole
+    mid = (lo + hi) // 2
+    whole = hi - lo <= 1
+    return [(lo, np.where(whole, hi, mid)), (mid, hi)], whole
+
+def _refine(values, i0, i1, j0, j1, c3_max, vinf_max, dv_max, jump):
+    # Tiles whose corners reach a threshold or change by more than jump, and
+    # tiles straddling the edge of the feasible region
+    corners = [values[key][:, rows, cols] for rows in (i0, i1) for cols in (j0, j1) for key in ('C3', 'v_inf', 'dv')]
+    C3, v_inf, dv = (np.stack(corners[k::3]) for k in range(3))
+
+    pruned = np.isnan(C3[:, 0])
+    refine = np.any(pruned, axis=0) & ~np.all(pruned, axis=0)
+
+    for metric, limit in ((C3, c3_max), (v_inf, vinf_max), (dv, dv_max)):
+        if limit is not None:
+            refine |= np.any(metric.min(axis=0) < limit, axis=0)
+
+    if jump is not None:
+        refine |= np.any(dv.max(axis=0) - dv.min(axis=0) > jump, axis=0)
+
+    return refine
+
+def adaptive_porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, cutoff_v, coarse=8,
+                           c3_max=None, vinf_max=None, dv_max=None, jump=2.0, tof_min=None, tof_max=None,
+                           return_stats=False, **kwargs):
+    '''
+    Computes the grids of porkchop_grid by adaptive quadtree refinement.
+
+    The grid is first solved every coarse cells. Each tile is then split into
+    four until it is one cell wide, but only while one of its corners has a
+    C3 below c3_max, a v_infinity below vinf_max or a total delta-v below
+    dv_max, or while the total delta-v across its corners changes by more
+    than jump. Both branches are tested. Cells inside tiles that are not
+    refined are interpolated from the tile corners. Tiles crossing the edge
+    of the feasible region, see porkchop_grid, are refined down to single
+    cells, and infeasible cells are NaN.
+
+    Parameters:
+    et_departures, states_depart, et_arrivals, states_arrive, mu, cutoff_v :
+        See porkchop_grid. The ephemerides are those of the finest grid.
+    coarse : int, optional
+        Spacing of the initial lattice in grid cells
+    c3_max : float, optional
+        Refine tiles reaching a C3 below this value (km^2/s^2)
+    vinf_max : float, optional
+        Refine tiles reaching a v_infinity below this value (km/s)
+    dv_max : float, optional
+        Refine tiles reaching a total delta-v below this value (km/s). If no
+        threshold is given, defaults to half of cutoff_v.
+    jump : float, optional
+        Refine tiles whose total delta-v changes by more than this across
+        their corners (km/s); None to disable
+    tof_min, tof_max : float, optional
+        Shortest and longest time of flight to solve (days)
+    return_stats : bool, optional
+        Also return the solver statistics
+    kwargs :
+        Further keyword arguments passed to porkchop_pairs (tol, maxiter,
+        solver, revs, low_path)
+
+    Returns:
+    grids : dict
+        float32 arrays of shape (arrivals, departures) keyed by GRID_KEYS
+    stats : dict
+        Only if return_stats is True. 'iterations', 'converged' and
+        'outcomes' arrays of shape (2, arrivals, departures), zero and False
+        where the cell was interpolated or pruned, and the 'evaluated' mask of
+        cells that were not interpolated.
+    '''
+
+    if not isinstance(coarse, (int, np.integer)) or coarse <= 0:
+        raise ValueError("'coarse' must be a positive integer.")
+
+    if c3_max is None and vinf_max is None and dv_max is None:
+        dv_max = cutoff_v / 2
+
+    et_departures = np.asarray(et_departures, dtype=float)
+    et_arrivals = np.asarray(et_arrivals, dtype=float)
+    states_depart = np.asarray(states_depart, dtype=float)
+    states_arrive = np.asarray(states_arrive, dtype=float)
+
+    shape = (len(et_arrivals), len(et_departures))
+
+    C3 = np.zeros((2,) + shape)
+    v_inf = np.zeros((2,) + shape)
+    iterations = np.zeros((2,) + shape, dtype=int)
+    converged = np.zeros((2,) + shape, dtype=bool)
+    outcomes = np.zeros((2,) + shape, dtype=np.int8)
+    evaluated = np.zeros(shape, dtype=bool)
+
+    def solve(i0, i1, j0, j1):
+        # Solve every corner of the tiles that is not solved yet
+        rows = np.concatenate([i0, i0, i1, i1])
+        cols = np.concatenate([j0, j1, j0, j1])
+        todo = np.zeros(shape, dtype=bool)
+        todo[rows, cols] = True
+        rows, cols = np.nonzero(todo & ~evaluated)
+
+        if not rows.size:
+            return
+
+        grids, stats = gt.porkchop_pairs(
+            et_departures[cols],
+            states_depart[cols],
+            et_arrivals[rows],
+            states_arrive[rows],
+            mu,
+            cutoff_v,
+            tof_min = tof_min,
+            tof_max = tof_max,
+            **kwargs
+        )
+
+        C3[:, rows, cols] = np.stack([grids['C3_shorts'], grids['C3_longs']])
+        v_inf[:, rows, cols] = np.stack([grids['v_inf_shorts'], grids['v_inf_longs']])
+        iterations[:, rows, cols] = stats['iterations']
+        converged[:, rows, cols] = stats['converged']
+        outcomes[:, rows, cols] = stats['outcomes']
+        evaluated[rows, cols] = True
+
+    # Initial lattice of tiles, as index arrays of their corners
+    i0, i1 = _initial_tiles(shape[0], coarse)
+    j0, j1 = _initial_tiles(shape[1], coarse)
+    i0, j0 = (a.ravel() for a in np.meshgrid(i0, j0, indexing='ij'))
+    i1, j1 = (a.ravel() for a in np.meshgrid(i1, j1, indexing='ij'))
+
+    leaves = []
+
+    while i0.size:
+        solve(i0, i1, j0, j1)
+
+        values = {'C3': C3, 'v_inf': v_inf, 'dv': np.sqrt(C3) + v_inf}
+        refine = _refine(values, i0, i1, j0, j1, c3_max, vinf_max, dv_max, jump)
+
+        # Tiles one cell wide cannot be split further
+        refine &= (i1 - i0 > 1) | (j1 - j0 > 1)
+        leaves.append((i0[~refine], i1[~refine], j0[~refine], j1[~refine]))
+
+        i0, i1, j0, j1 = i0[refine], i1[refine], j0[refine], j1[refine]
+        rows, whole_rows = _split(i0, i1)
+        cols, whole_cols = _split(j0, j1)
+
+        # Four children per tile, dropping the duplicates of unsplit spans
+        children = []
+        for k, (ri0, ri1) in enumerate(rows):
+            for l, (cj0, cj1) in enumerate(cols):
+                keep = ~((k == 1) & whole_rows) & ~((l == 1) & whole_cols)
+                children.append((ri0[keep], ri1[keep], cj0[keep], cj1[keep]))
+
+        i0, i1, j0, j1 = (np.concatenate(parts) for parts in zip(*children))
+
+    # Bilinear fill of the cells inside unrefined tiles, tiles of equal size
+    # at once. Only solved corners are read.
+    i0, i1, j0, j1 = (np.concatenate(parts) for parts in zip(*leaves))
+    sizes = np.stack([i1 - i0, j1 - j0], axis=1)
+
+    for h, w in np.unique(sizes, axis=0):
+        if h <= 1 and w <= 1:
+            continue
+
+        group = np.all(sizes == (h, w), axis=1)
+        rows = i0[group, None] + np.arange(h + 1)
+        cols = j0[group, None] + np.arange(w + 1)
+        u = (np.arange(h + 1) / max(h, 1))[None, :, None]
+        v = (np.arange(w + 1) / max(w, 1))[None, None, :]
+
+        rows, cols = rows[:, :, None], cols[:, None, :]
+        r0, r1 = i0[group, None, None], i1[group, None, None]
+        c0, c1 = j0[group, None, None], j1[group, None, None]
+        inside = ~evaluated[rows, cols]
+
+        for values in (C3, v_inf):
+            tile = ((1 - u) * (1 - v) * values[:, r0, c0] +
+                    (1 - u) * v * values[:, r0, c1] +
+                    u * (1 - v) * values[:, r1, c0] +
+                    u * v * values[:, r1, c1])
+            values[:, rows, cols] = np.where(inside, tile, values[:, rows, cols])
+
+    grids = {
+        'C3_shorts'    : C3[0],
+        'C3_longs'     : C3[1],
+        'v_inf_shorts' : v_inf[0],
+        'v_inf_longs'  : v_inf[1],
+        'tofs'         : et_arrivals[:, None] - et_departures[None, :]
+    }
+
+    # Same storage as porkchop_grid
+    tofs_feasible = gt.feasible(grids['tofs'], tof_min, tof_max)
+    for key in gt.GRID_KEYS:
+        grids[key] = np.where(tofs_feasible, grids[key], np.nan).astype(np.float32)
+
+    if return_stats:
+        return grids, {'iterations': iterations, 'converged': converged, 'outcomes': outcomes, 'evaluated': evaluated}
+
+    return grids
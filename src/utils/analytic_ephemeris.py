@@ -0,0 +1,127 @@
+'''
+Offline analytic ephemerides
+
+Heliocentric states of the planets from the mean Keplerian elements stored in
+planetary_data, for preliminary surveys that do not need JPL-grade states.
+Positions are typically good to a few thousand km for the inner planets over
+1800-2050. No network access or files are needed.
+'''
+
+# Third-party Libraries
+import numpy as np
+
+# Porkchop-Plot-Generator Libraries
+from utils import planetary_data as pd
+from utils.time_tools import requested_epochs
+
+# Julian date of the J2000 epoch
+JD_J2000 = 2451545.0
+
+# Bodies with mean elements
+BODIES = [
+    pd.mercury, pd.venus, pd.earth, pd.mars, pd.jupiter,
+    pd.saturn, pd.uranus, pd.neptune, pd.pluto ]
+
+
+def find_body(ID):
+    '''
+    Returns the planetary_data dictionary of the body with Horizons ID.
+    '''
+
+    for body in BODIES:
+        if str(body['ID']) == str(ID):
+            return body
+
+    raise ValueError(f"No mean Keplerian elements for body '{ID}'.")
+
+def solve_kepler(M, e, tol=1e-12, maxiter=50):
+    '''
+    Solves Kepler's equation E - e*sin(E) = M for arrays of mean anomalies (rad).
+    '''
+
+    E = M + e * np.sin(M)
+
+    for _ in range(maxiter):
+        dE = (E - e * np.sin(E) - M) / (1 - e * np.cos(E))
+        E = E - dE
+        if np.all(np.abs(dE) < tol):
+            break
+
+    return E
+
+def analytic_states(ID, julianDates):
+    '''
+    Computes heliocentric states of a body at arbitrary epochs in one
+    vectorized pass.
+
+    Parameters:
+    ID (int or str): Horizons ID of the body
+    julianDates (ndarray): Epochs (Julian dates, TDB)
+
+    Returns:
+    julianDates : ndarray
+        An array of Julian dates.
+    states : ndarray
+        An array of state vectors (x, y, z, vx, vy, vz) in the ecliptic of
+        J2000 (km, km/s).
+    '''
+
+    body = find_body(ID)
+    julianDates = np.atleast_1d(np.asarray(julianDates, dtype=float))
+
+    # Elements at each epoch
+    T = (julianDates - JD_J2000) / 36525.0
+    elements = np.asarray(body['elements'])[:, None] + np.asarray(body['element_rates'])[:, None] * T
+    a, e, inc, L, varpi, Omega = elements
+
+    a = a * pd.AU
+    inc = np.radians(inc)
+    Omega = np.radians(Omega)
+    omega = np.radians(varpi) - Omega
+    M = np.remainder(np.radians(L - varpi) + np.pi, 2 * np.pi) - np.pi
+
+    E = solve_kepler(M, e)
+
+    # Mean motion implied by the element rates (rad/s), so that velocities
+    # are the time derivative of the positions
+    rates = np.asarray(body['element_rates'])
+    n = np.radians(rates[3] - rates[4]) / (36525.0 * 86400.0)
+
+    # Position and velocity in the orbital plane
+    r = a * (1 - e * np.cos(E))
+    x = a * (np.cos(E) - e)
+    y = a * np.sqrt(1 - e ** 2) * np.sin(E)
+    vx = -n * a ** 2 / r * np.sin(E)
+    vy = n * a ** 2 / r * np.sqrt(1 - e ** 2) * np.cos(E)
+
+    # Rotate to the ecliptic of J2000
+    cO, sO = np.cos(Omega), np.sin(Omega)
+    co, so = np.cos(omega), np.sin(omega)
+    ci, si = np.cos(inc), np.sin(inc)
+
+    P = np.stack([cO * co - sO * so * ci, sO * co + cO * so * ci, so * si])
+    Q = np.stack([-cO * so - sO * co * ci, -sO * so + cO * co * ci, co * si])
+
+    W = np.stack([sO * si, -cO * si, ci])
+
+    position = x * P + y * Q
+    velocity = vx * P + vy * Q
+
+    # Apsidal and nodal precession rotate the orbit about its normal and
+    # about the ecliptic pole
+    omega_dot = np.radians(rates[4] - rates[5]) / (36525.0 * 86400.0)
+    Omega_dot = np.radians(rates[5]) / (36525.0 * 86400.0)
+    pole = np.array([0.0, 0.0, 1.0])[:, None]
+    velocity = velocity + omega_dot * np.cross(W, position, axis=0) + Omega_dot * np.cross(pole, position, axis=0)
+
+    states = np.concatenate([position.T, velocity.T], axis=1)
+
+    return julianDates, states
+
+def get_states(ID, start, stop, step):
+    '''
+    Analytic counterpart of ephemeris_store.get_states: states of a body from
+    start to stop ('YYYY-MM-DD') every step days.
+    '''
+
+    return analytic_states(ID, requested_epochs(start, stop, step))
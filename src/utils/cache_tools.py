@@ -0,0 +1,124 @@
+'''
+Persistent cache for computed porkchop grids
+'''
+
+# Python Standard Libraries
+import os
+import hashlib
+import json
+
+# Third-party Libraries
+import numpy as np
+
+# Layout of the cached arrays, bumped whenever it changes so that older
+# entries miss (2: per-cell solver outcomes)
+FORMAT = 2
+
+def grid_key(arrays, settings):
+    '''
+    Content hash identifying a porkchop grid computation.
+
+    Parameters:
+    arrays : list of ndarray
+        Ephemeris epochs and states the grid is computed from
+    settings : dict
+        JSON-serializable parameters that change the result (mu, cutoff_v,
+        solver settings, step, ...)
+
+    Returns:
+    str: Hexadecimal SHA-256 digest
+    '''
+
+    digest = hashlib.sha256(f'format {FORMAT}'.encode())
+
+    for array in arrays:
+        array = np.ascontiguousarray(array, dtype=float)
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+
+    return digest.hexdigest()
+
+def load_grid(cache_dir, key):
+    '''
+    Loads the arrays cached under key.
+
+    Parameters:
+    cache_dir (str): Cache directory
+    key (str): Output of grid_key
+
+    Returns:
+    dict or None: The cached arrays, or None on a cache miss
+    '''
+
+    path = os.path.join(cache_dir, f'{key}.npz')
+
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+    except (OSError, ValueError):
+        # Corrupt or partially written entries are dropped
+        os.remove(path)
+        return None
+
+    # Mark the entry as recently used
+    os.utime(path)
+
+    return arrays
+
+def save_grid(cache_dir, key, arrays, max_bytes=None):
+    '''
+    Stores arrays under key, then evicts the least recently used entries
+    until the cache fits in max_bytes.
+
+    Parameters:
+    cache_dir (str): Cache directory
+    key (str): Output of grid_key
+    arrays (dict): Arrays to store
+    max_bytes (int, optional): Maximum total size of the cache
+    '''
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    path = os.path.join(cache_dir, f'{key}.npz')
+    tmp_path = os.path.join(cache_dir, f'{key}.tmp.npz')
+
+    # Write to a temporary file first so readers never see a partial entry
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+    if max_bytes is not None:
+        evict(cache_dir, max_bytes, keep=path)
+
+def evict(cache_dir, max_bytes, keep=None):
+    '''
+    Removes the least recently used cache entries until the total size of
+    the cache is at most max_bytes.
+
+    Parameters:
+    cache_dir (str): Cache directory
+    max_bytes (int): Maximum total size of the cache
+    keep (str, optional): Path of an entry that must not be evicted
+    '''
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.npz') and not name.endswith('.tmp.npz'):
+            path = os.path.join(cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+
+    # Oldest first
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        os.remove(path)
+        total -= size
@@ -0,0 +1,115 @@
+'''
+Configuration files
+
+Reads porkchop configurations from JSON or TOML files and command line
+overrides. Bodies may be given by name ("earth") instead of Horizons ID, and
+the gravitational parameter by the name of the central body ("sun").
+'''
+
+# Python Standard Libraries
+import json
+import os
+
+# Porkchop-Plot-Generator Libraries
+from utils import planetary_data as pd
+
+# Config keys holding a Horizons body ID
+BODY_KEYS = ('planet0', 'planet1')
+
+
+def _body(name, key):
+    # Entry key of the planetary data dictionary of a body name
+    body = getattr(pd, name.strip().lower(), None)
+
+    if not isinstance(body, dict) or key not in body:
+        raise ValueError(f"Unknown body '{name}'.")
+
+    return body[key]
+
+def resolve_config(config):
+    '''
+    Returns a copy of config with body names replaced by Horizons IDs, mu
+    names by gravitational parameters, and lists by tuples.
+    '''
+
+    config = dict(config)
+
+    for key in BODY_KEYS:
+        if isinstance(config.get(key), str):
+            config[key] = _body(config[key], 'ID')
+
+    if isinstance(config.get('mu'), str):
+        config['mu'] = _body(config['mu'], 'mu')
+
+    for key, value in config.items():
+        if isinstance(value, list) and key != 'jobs':
+            config[key] = tuple(value)
+
+    for job in config.get('jobs', []):
+        for key in BODY_KEYS:
+            if isinstance(job.get(key), str):
+                job[key] = _body(job[key], 'ID')
+
+    return config
+
+def load_config(path):
+    '''
+    Reads a configuration file, JSON or TOML depending on its extension.
+
+    Parameters:
+    path : str
+        Path of the .json or .toml file
+
+    Returns:
+    dict
+        The configuration, see resolve_config
+
+    Raises:
+    ValueError
+        If the file type is not supported or the file cannot be parsed
+    '''
+
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.json':
+        with open(path) as file:
+            try:
+                config = json.load(file)
+            except json.JSONDecodeError as err:
+                raise ValueError(f"load_config: malformed JSON in '{path}': {err}") from err
+    elif extension == '.toml':
+        try:
+            import tomllib
+        except ImportError as err:
+            raise ValueError("load_config: TOML configuration files require Python 3.11 or later.") from err
+
+        with open(path, 'rb') as file:
+            try:
+                config = tomllib.load(file)
+            except tomllib.TOMLDecodeError as err:
+                raise ValueError(f"load_config: malformed TOML in '{path}': {err}") from err
+    else:
+        raise ValueError(f"load_config: unsupported configuration file '{path}', expected .json or .toml.")
+
+    return resolve_config(config)
+
+def parse_override(item):
+    '''
+    Parses a KEY=VALUE command line override. The value is read as JSON
+    (numbers, true, false, null, lists) and kept as a string otherwise.
+
+    Returns:
+    key, value
+    '''
+
+    key, sep, value = item.partition('=')
+
+    if not sep or not key:
+        raise ValueError(f"Expected KEY=VALUE, got '{item}'.")
+
+    try:
+        value = json.loads(value)
+    except json.JSONDecodeError:
+        pass
+
+    return key.strip(), value
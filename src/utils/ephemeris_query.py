@@ -3,15 +3,29 @@ Module containing functions related to querying the SSD Horizons API
 '''
 
 # Python Standard Libraries
-import sys
-import requests
-import csv
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Third-Party Libraries
 import numpy as np
 
 
-def generate_url(ID, start_time, stop_time, step_size):
+# Horizons API endpoint
+HORIZONS_URL = "https://ssd.jpl.nasa.gov/api/horizons.api"
+
+# HTTP status codes worth retrying
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class HorizonsError(RuntimeError):
+    '''
+    Raised when a Horizons query fails or returns no ephemeris table.
+    '''
+
+
+def generate_url(ID, start_time, stop_time, step_size, base_url=HORIZONS_URL):
     '''
     Generates a URL for querying the Horizons API.
 
@@ -20,11 +34,12 @@ def generate_url(ID, start_time, stop_time, step_size):
     start_time (str): The start time for the ephemeris data.
     stop_time (str): The stop time for the ephemeris data.
     step_size (str): The step_size for the ephemeris data.
+    base_url (str, optional): The Horizons API endpoint.
 
     Returns:
         str: The generated URL. 
     '''
-    base_url = "https://ssd.jpl.nasa.gov/api/horizons.api?format=text"
+    base_url = f"{base_url}?format=text"
     params = {
         "COMMAND"       : f"'{ID}'",
         "OBJ_DATA"      : "'NO'",
@@ -46,42 +61,205 @@ def generate_url(ID, start_time, stop_time, step_size):
     return f"{base_url}&{query_string}"
 
 
-def save_query_to_file(url, output_filename):
+def create_session(pool_size=8):
+    '''
+    Creates an HTTP session whose connection pool is shared by concurrent queries.
+
+    Parameters:
+    pool_size (int, optional): Maximum number of pooled connections.
+
+    Returns:
+        requests.Session: The session.
+    '''
+    # requests is only needed to query Horizons, not to read ephemeris files
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch(url, session=None, retries=3, backoff=1.0, timeout=60):
+    '''
+    Submits an API request and returns the ephemeris text, retrying transient
+    failures with exponential backoff.
+
+    Parameters:
+    url (str): The URL to query
+    session (requests.Session, optional): Session to reuse connections from
+    retries (int, optional): Number of retries after the first attempt
+    backoff (float, optional): Delay before the first retry, doubled after each retry (s)
+    timeout (float, optional): Timeout of each attempt (s)
+
+    Returns:
+        str: The response text.
+
+    Raises:
+    HorizonsError
+        If the request keeps failing or the response has no ephemeris table.
+    '''
+
+    import requests
+
+    getter = session.get if session is not None else requests.get
+
+    for attempt in range(retries + 1):
+        try:
+            response = getter(url, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as err:
+            error = f"{type(err).__name__}: {err}"
+        else:
+            if response.status_code == 200:
+                # Horizons reports bad queries as text with a 200 status
+                if "$$SOE" not in response.text:
+                    raise HorizonsError(f"Horizons returned no ephemeris table:\n{response.text[:500]}")
+                return response.text
+
+            error = f"Response code {response.status_code}: {response.text[:500]}"
+
+            if response.status_code not in RETRY_STATUS:
+                break
+
+        if attempt < retries:
+            time.sleep(backoff * 2 ** attempt)
+
+    raise HorizonsError(f"Request failed: {error}")
+
+
+def save_query_to_file(url, output_filename, session=None, retries=3, backoff=1.0):
     '''
     Submits API request and saves the response text to a file.
 
     Parameters:
     url (str): The URL to query
     output_filename (str): The name of the output text file.
+    session (requests.Session, optional): Session to reuse connections from
+    retries (int, optional): Number of retries of transient failures
+    backoff (float, optional): Delay before the first retry (s)
+
+    Raises:
+    HorizonsError
+        If the request fails.
     '''
 
-    response = requests.get(url)
+    text = fetch(url, session, retries, backoff)
 
-    if response.status_code == 200:
-        try:
-            with open(output_filename, "w") as file:
-                file.write(response.text)
+    with open(output_filename, "w") as file:
+        file.write(text)
+        print(f"Ephemeris data saved to {output_filename}")
+
+
+def _chunks(start_jd, stop_jd, step, chunk_days):
+    # Split [start_jd, stop_jd] into spans of whole steps, at most chunk_days long
+    if chunk_days is None:
+        return [(start_jd, stop_jd)]
+
+    per_chunk = max(1, int(chunk_days // step))
+    n = int(np.floor((stop_jd - start_jd) / step + 1e-6)) + 1
+
+    spans = []
+    for first in range(0, n, per_chunk):
+        last = min(first + per_chunk, n) - 1
+        spans.append((start_jd + first * step, start_jd + last * step))
+
+    # Keep the requested stop so Horizons returns the same final epoch
+    spans[-1] = (spans[-1][0], stop_jd)
+
+    return spans
+
+
+def _stitch(texts):
+    # Join chunked responses into one table: header of the first, rows of all, footer of the last
+    rows = []
+    for text in texts:
+        start = text.index("$$SOE")
+        start = text.index("\n", start) + 1
+        end = text.index("$$EOE")
+        rows.append(text[start:end])
+
+    head = texts[0][:texts[0].index("$$SOE")]
+    tail = texts[-1][texts[-1].index("$$EOE"):]
+
+    return head + "$$SOE\n" + "".join(rows) + tail
+
+
+def fetch_ephemerides(queries, session=None, max_workers=4, chunk_days=2000,
+                      base_url=HORIZONS_URL, retries=3, backoff=1.0):
+    '''
+    Downloads several ephemeris tables concurrently over a shared pooled
+    session, and saves each one to a file.
+
+    Spans longer than chunk_days are split into chunks that are downloaded in
+    parallel and stitched back into a single table.
+
+    Parameters:
+    queries (list): (ID, start_time, stop_time, step_size, output_filename)
+        tuples, with times as 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS'
+    session (requests.Session, optional): Session to use (default creates one)
+    max_workers (int, optional): Maximum number of concurrent requests
+    chunk_days (float, optional): Longest span of a single request (None to
+        never split)
+    base_url (str, optional): The Horizons API endpoint
+    retries (int, optional): Number of retries of transient failures
+    backoff (float, optional): Delay before the first retry (s)
+
+    Raises:
+    HorizonsError
+        If any request fails.
+    '''
+
+    from utils.time_tools import date_to_jd, jd_to_date
+
+    own_session = session is None
+    if own_session:
+        session = create_session(max_workers)
+
+    # One task per chunk of every query
+    tasks = []
+    for ID, start_time, stop_time, step_size, output_filename in queries:
+        spans = _chunks(date_to_jd(start_time), date_to_jd(stop_time), step_size, chunk_days)
+        tasks.append([
+            generate_url(ID, jd_to_date(first), jd_to_date(last), step_size, base_url)
+            for first, last in spans
+        ])
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                [executor.submit(fetch, url, session, retries, backoff) for url in urls]
+                for urls in tasks
+            ]
+
+            for query, chunk_futures in zip(queries, futures):
+                text = _stitch([future.result() for future in chunk_futures])
+                output_filename = query[4]
+                with open(output_filename, "w") as file:
+                    file.write(text)
                 print(f"Ephemeris data saved to {output_filename}")
-        except OSError as err:
-            print(f"Unable to open file '{output_filename}'")
-    else:
-        print("Error: Request failed")
-        print(f"Response code: {response.status_code}")
-        print(response.text)
-        sys.exit(1)
+    finally:
+        if own_session:
+            session.close()
 
-def stateReader(filespec):
+def stateReader(filespec, sidecar=True):
     '''
     Reads ephemeris data from a text file in CSV format and extracts Julian dates and state vectors.
 
     The function expects the file to contain ephemeris data in a specific format.
-    It looks for the start ("SOE") and end ("EOE") markers to determine the data range
-    and extracts the data between these markers. The extracted data is then converted
-    to numpy arrays for further processing.
+    The file is read once and the data range is located between the start ("$$SOE")
+    and end ("$$EOE") markers. The numeric columns of the data range are then
+    parsed in a single vectorized step.
+
+    On the first read the parsed table is written to an .npy sidecar next to the
+    text file. Later reads memory-map the sidecar instead of parsing the text, as
+    long as the sidecar is not older than the text file.
 
     Parameters:
     filespec : str
         The file path to the txt file containing the ephemeris data.
+    sidecar : bool, optional
+        Read and write the .npy sidecar (default is True)
 
     Returns:
     julianDates : ndarray
@@ -89,61 +267,57 @@ def stateReader(filespec):
     states : ndarray
         An array of state vectors, where each state vector contains position and velocity
         components (x, y, z, vx, vy, vz).
+
+    Raises:
+    ValueError
+        If the file is not a Horizons vector table or its data cannot be parsed.
     '''
 
-    # Initialize lists to store Julian Dates and states
-    julianDates = []
-    states = []
+    sidecar_path = os.path.splitext(filespec)[0] + '.npy'
 
-    expr1 = 'SOE' # text to look for in the file
-    expr2 = 'EOE' # text to look for in the file
+    if sidecar and os.path.exists(sidecar_path) \
+            and os.path.getmtime(sidecar_path) >= os.path.getmtime(filespec):
+        table = np.load(sidecar_path, mmap_mode='r')
+        return table[:, 0], table[:, 1:]
 
-    # Loop to find where the data range is at
-    N = 0 # line count
-    idx1 = None
-    idx2 = None
+    with open(filespec, 'rb') as file:
+        content = file.read()
 
-    with open(filespec,'r') as file:
-        while True:
-            dataline = file.readline() # read one line at a time
+    # Locate the data range between the markers
+    start = content.find(b'$$SOE')
+    end = content.find(b'$$EOE', start + 1)
 
-            N = N + 1 # find the line number
+    if start < 0 or end < 0:
+        # Horizons reports errors as plain text in place of the table
+        preview = content[:300].decode(errors='replace').strip()
+        raise ValueError(
+            f"stateReader: '{filespec}' has no $$SOE/$$EOE data markers; "
+            f"not a Horizons vector table. File begins with:\n{preview}"
+        )
 
-            if isinstance(dataline, str): # if the line is a string
+    start = content.find(b'\n', start) + 1
+    block = content[start:end]
 
-                # found the 1st string that I'm seeking
-                if expr1 in dataline:
-                    idx1 = N
-                
-                # found the 2nd string that I'm seeking
-                if expr2 in dataline:
-                    idx2 = N
+    if not block.strip():
+        raise ValueError(f"stateReader: '{filespec}' contains no data between $$SOE and $$EOE.")
 
-            # break loop if both indices are found
-            if (idx1 is not None) and (idx2 is not None):
-                break
-        
-        # scan through data, skipping header, and collecting data
-        with open(filespec, 'r') as file:
-            reader = csv.reader(file,delimiter=',')
-
-            # skip header lines to idx1
-            for _ in range(idx1):
-                next(reader)
-
-            # collect data starting from line idx1 to idx2
-            for row in reader:
-                if reader.line_num >= idx2:
-                    break
-
-                julianDates.append(float(row[0]))
-                states.append([float(value) for value in row[2:8]])
-            
-        # Convert lists to numpy arrays for further processing
-        julianDates = np.array(julianDates)
-        states = np.array(states)
-
-    return julianDates, states
+    # Columns: JDTDB, calendar date, X, Y, Z, VX, VY, VZ
+    try:
+        table = np.loadtxt(io.BytesIO(block), delimiter=',', usecols=(0, 2, 3, 4, 5, 6, 7), ndmin=2)
+    except ValueError as err:
+        raise ValueError(f"stateReader: malformed data in '{filespec}': {err}") from err
+
+    if sidecar:
+        try:
+            tmp_path = sidecar_path + '.tmp'
+            with open(tmp_path, 'wb') as file:
+                np.save(file, table)
+            os.replace(tmp_path, sidecar_path)
+        except OSError:
+            # The text file remains usable without a sidecar
+            pass
+
+    return table[:, 0], table[:, 1:]
 
 def encode_value(value):
     '''
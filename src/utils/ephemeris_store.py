@@ -0,0 +1,192 @@
+'''
+Range-aware ephemeris store
+
+Keeps every state downloaded for a body in a single indexed file, so that any
+sub-range or coarser step of what is already on disk is served without a new
+Horizons query. Only the epochs that are missing are fetched, and the new
+downloads are merged into the store.
+'''
+
+# Python Standard Libraries
+import os
+
+# Third-party Libraries
+import numpy as np
+
+# Porkchop-Plot-Generator Libraries
+from utils import ephemeris_query as eq
+from utils.time_tools import EPOCH_TOL, jd_to_date, requested_epochs
+
+
+def load_body(store_dir, body):
+    '''
+    Loads all epochs and states stored for a body.
+
+    Returns:
+    julianDates : ndarray
+        Sorted Julian dates (empty if nothing is stored)
+    states : ndarray
+        States at those dates, shape (n, 6)
+    '''
+
+    path = os.path.join(store_dir, f'{body}.npz')
+
+    if not os.path.exists(path):
+        return np.empty(0), np.empty((0, 6))
+
+    with np.load(path) as data:
+        return data['jd'], data['states']
+
+def merge_body(store_dir, body, julianDates, states):
+    '''
+    Merges new epochs and states into the store of a body. Epochs already
+    stored are kept.
+    '''
+
+    os.makedirs(store_dir, exist_ok=True)
+
+    jd_old, states_old = load_body(store_dir, body)
+    jd = np.concatenate([jd_old, julianDates])
+    states = np.concatenate([states_old, states])
+
+    # Sort, then drop duplicated epochs keeping the first occurrence
+    order = np.argsort(jd, kind='stable')
+    jd, states = jd[order], states[order]
+    keep = np.concatenate([[True], np.diff(jd) > EPOCH_TOL])
+    jd, states = jd[keep], states[keep]
+
+    path = os.path.join(store_dir, f'{body}.npz')
+    tmp_path = os.path.join(store_dir, f'{body}.tmp.npz')
+    np.savez(tmp_path, jd=jd, states=states)
+    os.replace(tmp_path, path)
+
+    return jd, states
+
+def import_file(store_dir, body, filespec):
+    '''
+    Adds an existing Horizons text file to the store of a body.
+    '''
+
+    julianDates, states = eq.stateReader(filespec)
+    return merge_body(store_dir, body, julianDates, states)
+
+def _lookup(jd_store, epochs):
+    # Index into jd_store of every epoch, -1 where the epoch is missing
+    if not jd_store.size:
+        return np.full(epochs.shape, -1)
+
+    idx = np.clip(np.searchsorted(jd_store, epochs), 1, jd_store.size - 1)
+    left = idx - 1
+    nearest = np.where(np.abs(jd_store[left] - epochs) <= np.abs(jd_store[idx] - epochs), left, idx)
+    return np.where(np.abs(jd_store[nearest] - epochs) <= EPOCH_TOL, nearest, -1)
+
+def missing_ranges(jd_store, epochs):
+    '''
+    Groups the epochs missing from the store into contiguous runs.
+
+    Returns:
+    list of (first, last) index pairs into epochs
+    '''
+
+    missing = _lookup(jd_store, epochs) < 0
+    ranges = []
+    start = None
+
+    for i, miss in enumerate(missing):
+        if miss and start is None:
+            start = i
+        elif not miss and start is not None:
+            ranges.append((start, i - 1))
+            start = None
+
+    if start is not None:
+        ranges.append((start, len(epochs) - 1))
+
+    return ranges
+
+def get_states(store_dir, body, start, stop, step, fetch=True, **fetch_kwargs):
+    '''
+    Returns the states of a body from start to stop every step days, querying
+    Horizons only for the epochs that are not already stored.
+
+    Parameters:
+    store_dir (str): Directory of the ephemeris store
+    body (int or str): Horizons ID of the body
+    start, stop (str): First and last date ('YYYY-MM-DD')
+    step (float): Step size in days
+    fetch (bool, optional): Query Horizons for missing epochs. If False a
+        missing epoch raises a LookupError.
+    fetch_kwargs : Further keyword arguments passed to eq.fetch_ephemerides
+
+    Returns:
+    julianDates : ndarray
+        An array of Julian dates.
+    states : ndarray
+        An array of state vectors (x, y, z, vx, vy, vz).
+    '''
+
+    return get_states_many(store_dir, [(body, start, stop, step)], fetch, **fetch_kwargs)[0]
+
+def get_states_many(store_dir, requests, fetch=True, **fetch_kwargs):
+    '''
+    Batched get_states: the missing epochs of every request are downloaded
+    concurrently over one pooled session before any request is served.
+
+    Parameters:
+    store_dir (str): Directory of the ephemeris store
+    requests (list): (body, start, stop, step) tuples, see get_states
+    fetch (bool, optional): Query Horizons for missing epochs
+    fetch_kwargs : Further keyword arguments passed to eq.fetch_ephemerides
+        (max_workers, chunk_days, session, ...)
+
+    Returns:
+    list of (julianDates, states), in the order of requests
+    '''
+
+    epochs = [requested_epochs(start, stop, step) for _, start, stop, step in requests]
+
+    # Horizons queries for the gaps of every request
+    queries = []
+    bodies = []
+    raw_dir = os.path.join(store_dir, 'raw')
+
+    for (body, _, _, step), request_epochs in zip(requests, epochs):
+        jd_store, _ = load_body(store_dir, body)
+        gaps = missing_ranges(jd_store, request_epochs)
+
+        if gaps and not fetch:
+            raise LookupError(f"Ephemeris store has no data for body {body} on {len(gaps)} range(s) of the request.")
+
+        for first, last in gaps:
+            gap_start = jd_to_date(request_epochs[first])
+            gap_stop = jd_to_date(request_epochs[last])
+
+            # A single epoch still needs a non-empty span for Horizons
+            if first == last:
+                gap_stop = jd_to_date(request_epochs[last] + step)
+
+            output_path = os.path.join(
+                raw_dir,
+                f"{body}_{request_epochs[first]:.6f}_{request_epochs[last]:.6f}_{step}.txt"
+            )
+            queries.append((body, gap_start, gap_stop, step, output_path))
+            bodies.append(body)
+
+    if queries:
+        os.makedirs(raw_dir, exist_ok=True)
+        eq.fetch_ephemerides(queries, **fetch_kwargs)
+
+        for body, query in zip(bodies, queries):
+            import_file(store_dir, body, query[4])
+
+    results = []
+    for (body, _, _, _), request_epochs in zip(requests, epochs):
+        jd_store, states_store = load_body(store_dir, body)
+        idx = _lookup(jd_store, request_epochs)
+
+        if np.any(idx < 0):
+            raise LookupError(f"Horizons did not return every requested epoch for body {body}.")
+
+        results.append((jd_store[idx], states_store[idx]))
+
+    return results
@@ -0,0 +1,302 @@
+'''
+Out-of-core porkchop grids
+
+A GridStore keeps a porkchop grid on disk as compressed tiles of arrival
+rows and departure columns, with the epochs and the metadata of the
+computation (bodies, windows, mu, cutoff, solver settings). Grids are written
+block of rows by block of rows as they are solved, so memory stays bounded
+whatever the size of the grid, and readers load only the tiles covering the
+rows and columns they ask for. A computation that is interrupted resumes
+from the blocks already written.
+
+Layout of a store directory:
+
+    metadata.json           shape, tile size, arrays and computation settings
+    et_departures.npy       departure Julian dates
+    et_arrivals.npy         arrival Julian dates
+    tiles/r<i>_c<j>.npz     compressed tile of every array
+    tiles/r<i>.done         written once every tile of row block i is stored
+'''
+
+# Python Standard Libraries
+import json
+import os
+
+# Third-party Libraries
+import numpy as np
+
+# Porkchop-Plot-Generator Libraries
+from utils import grid_tools as gt
+
+# Version of the store layout
+FORMAT = 1
+
+# Arrays of a store: grids of shape (arrivals, departures) and solver
+# statistics of shape (2, arrivals, departures)
+ARRAYS = {
+    'C3_shorts'    : 'float32',
+    'C3_longs'     : 'float32',
+    'v_inf_shorts' : 'float32',
+    'v_inf_longs'  : 'float32',
+    'tofs'         : 'float32',
+    'iterations'   : 'int32',
+    'converged'    : 'bool',
+    'outcomes'     : 'int8'
+}
+
+# Default number of cells of a block of rows, solved and held in memory at once
+BLOCK_CELLS = 2 ** 18
+
+# Default number of departure columns of a tile
+TILE_COLS = 1024
+
+
+def _fill(name):
+    # Value of cells that are not stored
+    return np.nan if ARRAYS[name] == 'float32' else 0
+
+def _indices(index, n):
+    # Indices selected by a slice or an array of indices along an axis of n
+    if isinstance(index, slice):
+        return np.arange(*index.indices(n))
+    return np.arange(n)[np.asarray(index)]
+
+class GridStore:
+    '''
+    Porkchop grid stored on disk as compressed tiles. Open an existing store
+    with GridStore(path) and create one with GridStore.create.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(os.path.join(path, 'metadata.json')) as file:
+            self.metadata = json.load(file)
+
+        if self.metadata.get('format') != FORMAT:
+            raise ValueError(f"Unsupported grid store format in '{path}'.")
+
+        self.et_departures = np.load(os.path.join(path, 'et_departures.npy'))
+        self.et_arrivals = np.load(os.path.join(path, 'et_arrivals.npy'))
+
+        self.shape = tuple(self.metadata['shape'])
+        self.tile_rows, self.tile_cols = self.metadata['tile']
+
+    @classmethod
+    def create(cls, path, et_departures, et_arrivals, settings, tile_rows=None, tile_cols=TILE_COLS):
+        '''
+        Creates a store for the grid of et_departures and et_arrivals, or
+        opens the store at path if it was created for the same epochs and
+        settings, so that an interrupted computation can resume.
+
+        Parameters:
+        path : str
+            Directory of the store
+        et_departures, et_arrivals : ndarray
+            Departure and arrival Julian dates of the grid
+        settings : dict
+            JSON-serializable metadata of the computation (bodies, windows,
+            mu, cutoff, solver settings)
+        tile_rows : int, optional
+            Arrival rows per block, about BLOCK_CELLS cells by default
+        tile_cols : int, optional
+            Departure columns per tile
+
+        Raises:
+        ValueError
+            If path holds a store of another grid
+        '''
+
+        et_departures = np.asarray(et_departures, dtype=float)
+        et_arrivals = np.asarray(et_arrivals, dtype=float)
+
+        if tile_rows is None:
+            tile_rows = max(1, BLOCK_CELLS // max(et_departures.size, 1))
+
+        # Round-tripped through JSON, as it is compared with the stored copy
+        settings = json.loads(json.dumps(settings, default=str))
+
+        if os.path.exists(os.path.join(path, 'metadata.json')):
+            store = cls(path)
+            if (store.metadata['settings'] != settings
+                    or not np.array_equal(store.et_departures, et_departures)
+                    or not np.array_equal(store.et_arrivals, et_arrivals)):
+                raise ValueError(f"'{path}' holds the grid store of another computation.")
+            return store
+
+        os.makedirs(os.path.join(path, 'tiles'), exist_ok=True)
+        np.save(os.path.join(path, 'et_departures.npy'), et_departures)
+        np.save(os.path.join(path, 'et_arrivals.npy'), et_arrivals)
+
+        metadata = {
+            'format'   : FORMAT,
+            'shape'    : [et_arrivals.size, et_departures.size],
+            'tile'     : [tile_rows, tile_cols],
+            'arrays'   : ARRAYS,
+            'settings' : settings
+        }
+
+        # Written last: a directory without metadata is not a store yet
+        with open(os.path.join(path, 'metadata.tmp.json'), 'w') as file:
+            json.dump(metadata, file, indent=2)
+        os.replace(os.path.join(path, 'metadata.tmp.json'), os.path.join(path, 'metadata.json'))
+
+        return cls(path)
+
+    def _tile_path(self, i, j):
+        return os.path.join(self.path, 'tiles', f'r{i}_c{j}.npz')
+
+    def _done_path(self, i):
+        return os.path.join(self.path, 'tiles', f'r{i}.done')
+
+    def blocks(self):
+        '''
+        Arrival rows [start, stop) of every block of the store
+        '''
+
+        return [(start, min(start + self.tile_rows, self.shape[0])) for start in range(0, self.shape[0], self.tile_rows)]
+
+    def complete(self, start):
+        '''
+        Whether the block of rows starting at start is stored
+        '''
+
+        return os.path.exists(self._done_path(start // self.tile_rows))
+
+    def write_rows(self, start, stop, grids, stats):
+        '''
+        Stores the block of rows [start, stop), as yielded by
+        grid_tools.iter_porkchop_grid. start must be the start of a block.
+        '''
+
+        if start % self.tile_rows or stop - start > self.tile_rows:
+            raise ValueError(f"Rows [{start}, {stop}) are not a block of the grid store.")
+
+        i = start // self.tile_rows
+
+        for j, col in enumerate(range(0, self.shape[1], self.tile_cols)):
+            cols = slice(col, col + self.tile_cols)
+            tile = {name: grids[name][:, cols].astype(ARRAYS[name]) for name in gt.GRID_KEYS}
+            tile.update({name: stats[name][:, :, cols].astype(ARRAYS[name]) for name in stats if name in ARRAYS})
+
+            # Written under a temporary name so readers never see a partial tile
+            tmp_path = os.path.join(self.path, 'tiles', f'r{i}_c{j}.tmp.npz')
+            np.savez_compressed(tmp_path, **tile)
+            os.replace(tmp_path, self._tile_path(i, j))
+
+        open(self._done_path(i), 'w').close()
+
+    def read(self, names=None, rows=slice(None), cols=slice(None)):
+        '''
+        Reads part of the stored arrays, loading only the tiles it covers.
+        Cells of blocks that are not stored yet are NaN, or zero and False
+        for the solver statistics.
+
+        Parameters:
+        names : list of str, optional
+            Arrays to read, all of ARRAYS by default
+        rows, cols : slice or array of int, optional
+            Arrival rows and departure columns to read, e.g. slice(None,
+            None, 4) for every fourth row
+
+        Returns:
+        dict
+            The arrays, of shape (rows, cols) or (2, rows, cols) for the
+            solver statistics
+        '''
+
+        names = list(ARRAYS) if names is None else list(names)
+        rows = _indices(rows, self.shape[0])
+        cols = _indices(cols, self.shape[1])
+
+        arrays = {}
+        for name in names:
+            shape = (len(rows), len(cols)) if name in gt.GRID_KEYS else (2, len(rows), len(cols))
+            arrays[name] = np.full(shape, _fill(name), dtype=ARRAYS[name])
+
+        for i in np.unique(rows // self.tile_rows):
+            out_rows = np.flatnonzero(rows // self.tile_rows == i)
+            tile_rows = rows[out_rows] - i * self.tile_rows
+
+            for j in np.unique(cols // self.tile_cols):
+                path = self._tile_path(i, j)
+                if not os.path.exists(path):
+                    continue
+
+                out_cols = np.flatnonzero(cols // self.tile_cols == j)
+                tile_cols = cols[out_cols] - j * self.tile_cols
+
+                with np.load(path) as tile:
+                    for name in names:
+                        values = tile[name]
+                        arrays[name][..., out_rows[:, None], out_cols] = values[..., tile_rows[:, None], tile_cols]
+
+        return arrays
+
+    def overview(self, names=None, max_size=1000):
+        '''
+        Reads every stride-th row and column of the store, with the smallest
+        stride giving at most max_size rows and columns, for plotting grids
+        larger than the figure resolution.
+
+        Returns:
+        et_departures, et_arrivals, arrays
+        '''
+
+        strides = [-(-n // max_size) for n in self.shape]
+        rows, cols = slice(None, None, strides[0]), slice(None, None, strides[1])
+
+        return self.et_departures[cols], self.et_arrivals[rows], self.read(names, rows, cols)
+
+def write_grid(store, et_departures, states_depart, et_arrivals, states_arrive, mu, cutoff_v,
+               workers=1, progress=None, **kwargs):
+    '''
+    Solves the grid of a GridStore block by block into the store, skipping
+    the blocks already stored, without holding more than two blocks per
+    worker in memory.
+
+    Parameters:
+    store : GridStore
+        Store created for et_departures and et_arrivals
+    et_departures, states_depart, et_arrivals, states_arrive, mu, cutoff_v :
+        See grid_tools.porkchop_grid
+    workers : int, optional
+        Number of worker processes, see grid_tools.iter_porkchop_grid
+    progress : callable, optional
+        Called as progress(rows_done, rows_total) after every block
+    kwargs :
+        Further keyword arguments passed to porkchop_grid
+    '''
+
+    as_ = store.shape[0]
+    done = sum(stop - start for start, stop in store.blocks() if store.complete(start))
+
+    # Consecutive blocks still to solve
+    runs = []
+    for start, stop in store.blocks():
+        if store.complete(start):
+            continue
+        if runs and runs[-1][1] == start:
+            runs[-1][1] = stop
+        else:
+            runs.append([start, stop])
+
+    for run_start, run_stop in runs:
+        chunks = gt.iter_porkchop_grid(
+            et_departures,
+            states_depart,
+            et_arrivals[run_start:run_stop],
+            states_arrive[run_start:run_stop],
+            mu,
+            cutoff_v,
+            workers    = workers,
+            chunk_size = store.tile_rows,
+            **kwargs
+        )
+
+        for start, stop, grids, stats in chunks:
+            store.write_rows(run_start + start, run_start + stop, grids, stats)
+
+            done += stop - start
+            if progress is not None:
+                progress(done, as_)
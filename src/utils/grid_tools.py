@@ -0,0 +1,468 @@
+'''
+Porkchop Grid Tools
+'''
+
+# Python Standard Libraries
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Third-party Libraries
+import numpy as np
+
+# Porkchop-Plot-Generator Libraries
+from utils import lambert_tools as lt
+
+# Keys of the grid dictionary, in the order they are computed
+GRID_KEYS = ('C3_shorts', 'C3_longs', 'v_inf_shorts', 'v_inf_longs', 'tofs')
+
+
+def porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, cutoff_v, tol=1e-6, maxiter=10000,
+                  solver='curtis', revs=0, low_path=True, tof_min=None, tof_max=None, return_stats=False,
+                  continuation=False):
+    '''
+    Computes the departure C3, arrival v_infinity and time of flight for every
+    (arrival, departure) pair of a porkchop plot, for both the short way
+    (prograde) and long way (retrograde) transfers.
+
+    Cells that arrive before departing, or whose time of flight is outside
+    [tof_min, tof_max], are pruned before the Lambert solver is called and
+    are NaN in the grids.
+
+    Parameters:
+    et_departures, et_arrivals : ndarray
+        Departure and arrival Julian dates
+    states_depart, states_arrive : ndarray
+        Heliocentric states (x, y, z, vx, vy, vz) of the departure and arrival
+        bodies at those dates (km, km/s)
+    mu : float
+        Gravitational parameter (km^3/s^2)
+    cutoff_v : float
+        Maximum v_infinity to consider; C3 is clamped at cutoff_v**2
+    tol : float, optional
+        Tolerance for the Lambert solver
+    maxiter : int, optional
+        Maximum number of iterations for the Lambert solver
+    solver : str, optional
+        Lambert solver, 'curtis', 'safeguarded' or 'izzo'
+    revs : int, optional
+        Number of complete revolutions of the transfers ('izzo' only)
+    low_path : bool, optional
+        Low or high energy multi-revolution branch ('izzo' only)
+    tof_min, tof_max : float, optional
+        Shortest and longest time of flight to solve (days)
+    return_stats : bool, optional
+        Also return the solver statistics
+    continuation : bool, optional
+        Sweep the departures in order and start every cell from the
+        converged z of the previous departure, see
+        lambert_tools.lambert_continuation ('curtis' and 'safeguarded' only).
+        Continuation solves zero-revolution transfers only, so revs must be
+        0, and low_path is not used.
+
+    Returns:
+    grids : dict
+        float32 arrays of shape (arrivals, departures) keyed by GRID_KEYS,
+        NaN in pruned cells. Time of flight is in days.
+    stats : dict
+        Only if return_stats is True. Per-cell 'iterations', 'converged' and
+        'outcomes' (see numerical_tools.outcome_codes) arrays of shape
+        (2, arrivals, departures), short way first, zero and False in pruned
+        cells. With continuation, also the 'warm' mask of the cells solved
+        from the z of their neighbour.
+
+    Raises:
+    ValueError
+        If continuation is combined with revs > 0
+    '''
+
+    et_departures = np.asarray(et_departures, dtype=float)
+    et_arrivals = np.asarray(et_arrivals, dtype=float)
+    states_depart = np.asarray(states_depart, dtype=float)
+    states_arrive = np.asarray(states_arrive, dtype=float)
+
+    shape = (et_arrivals.size, et_departures.size)
+
+    # Only feasible cells reach the solver
+    tofs = et_arrivals[:, None] - et_departures[None, :]
+
+    if continuation:
+        if revs:
+            raise ValueError("Continuation solves zero-revolution transfers only; 'revs' must be 0.")
+        return _continuation_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, cutoff_v, tol,
+                                  maxiter, solver, tofs, feasible(tofs, tof_min, tof_max), return_stats)
+
+    rows, cols = np.nonzero(feasible(tofs, tof_min, tof_max))
+
+    pairs, pair_stats = porkchop_pairs(
+        et_departures[cols],
+        states_depart[cols],
+        et_arrivals[rows],
+        states_arrive[rows],
+        mu,
+        cutoff_v,
+        tol,
+        maxiter,
+        solver   = solver,
+        revs     = revs,
+        low_path = low_path
+    )
+
+    grids = {}
+    for key in GRID_KEYS:
+        grids[key] = np.full(shape, np.nan, dtype=np.float32)
+        grids[key][rows, cols] = pairs[key]
+
+    if return_stats:
+        stats = {key: np.zeros((2,) + shape, dtype=value.dtype) for key, value in pair_stats.items()}
+        for key in stats:
+            stats[key][:, rows, cols] = pair_stats[key]
+        return grids, stats
+
+    return grids
+
+def _continuation_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, cutoff_v, tol, maxiter, solver,
+                       tofs, keep, return_stats):
+    # porkchop_grid solved by continuation along the departures; pruned cells
+    # have no time of flight, so the solver skips them
+    V1, V2, converged, iterations, outcomes, warm = lt.lambert_continuation(
+        states_depart[:, :3],
+        states_arrive[:, :3],
+        np.where(keep, tofs, np.nan) * 3600 * 24,
+        mu,
+        tol,
+        maxiter,
+        method          = solver,
+        return_outcomes = True
+    )
+
+    C3, v_inf = _energies(
+        V1, V2,
+        states_depart[None, None, :, 3:],
+        states_arrive[None, :, None, 3:],
+        converged,
+        cutoff_v
+    )
+
+    grids = {}
+    for key, values in zip(GRID_KEYS, (C3[0], C3[1], v_inf[0], v_inf[1], tofs)):
+        grids[key] = np.where(keep, values, np.nan).astype(np.float32)
+
+    if return_stats:
+        stats = {'iterations': iterations, 'converged': converged, 'outcomes': outcomes, 'warm': warm}
+        for key in stats:
+            stats[key] = np.where(keep, stats[key], 0).astype(stats[key].dtype)
+        return grids, stats
+
+    return grids
+
+def feasible(tofs, tof_min=None, tof_max=None):
+    '''
+    Mask of the cells with a positive time of flight within [tof_min, tof_max]
+    (days).
+    '''
+
+    mask = tofs > 0
+
+    if tof_min is not None:
+        mask &= tofs >= tof_min
+
+    if tof_max is not None:
+        mask &= tofs <= tof_max
+
+    return mask
+
+def _energies(V1, V2, v_depart, v_arrive, converged, cutoff_v):
+    # Departure C3 and arrival v_infinity, unsolved cells and unreasonable
+    # values clamped to the cutoff
+    cutoff_c3 = cutoff_v ** 2
+
+    with np.errstate(invalid='ignore'):
+        C3 = np.sum((V1 - v_depart) ** 2, axis=-1)
+        v_inf = np.linalg.norm(V2 - v_arrive, axis=-1)
+
+    C3 = np.where(converged, np.minimum(C3, cutoff_c3), cutoff_c3)
+    v_inf = np.where(converged, np.minimum(v_inf, cutoff_v), cutoff_v)
+
+    return C3, v_inf
+
+def porkchop_pairs(et_departures, states_depart, et_arrivals, states_arrive, mu, cutoff_v, tol=1e-6, maxiter=10000,
+                   solver='curtis', revs=0, low_path=True, tof_min=None, tof_max=None):
+    '''
+    Same as porkchop_grid for a list of (departure, arrival) pairs rather
+    than every combination: element i of the departure arrays is paired with
+    element i of the arrival arrays. Values are float64.
+
+    Returns:
+    grids : dict
+        Arrays of shape (pairs,) keyed by GRID_KEYS, NaN in pruned pairs
+    stats : dict
+        Per-pair 'iterations', 'converged' and 'outcomes' arrays of shape
+        (2, pairs)
+    '''
+
+    states_depart = np.asarray(states_depart, dtype=float)
+    states_arrive = np.asarray(states_arrive, dtype=float)
+
+    tofs = np.asarray(et_arrivals, dtype=float) - np.asarray(et_departures, dtype=float)
+    keep = feasible(tofs, tof_min, tof_max)
+
+    C3 = np.full((2,) + tofs.shape, np.nan)
+    v_inf = np.full((2,) + tofs.shape, np.nan)
+    iterations = np.zeros((2,) + tofs.shape, dtype=int)
+    converged = np.zeros((2,) + tofs.shape, dtype=bool)
+    outcomes = np.zeros((2,) + tofs.shape, dtype=np.int8)
+
+    if np.any(keep):
+        V1, V2, converged[:, keep], iterations[:, keep], outcomes[:, keep] = lt.lambert_pairs(
+            states_depart[keep, :3],
+            states_arrive[keep, :3],
+            tofs[keep] * 3600 * 24,
+            mu,
+            tol,
+            maxiter,
+            method          = solver,
+            revs            = revs,
+            low_path        = low_path,
+            return_outcomes = True
+        )
+
+        C3[:, keep], v_inf[:, keep] = _energies(
+            V1, V2,
+            states_depart[None, keep, 3:],
+            states_arrive[None, keep, 3:],
+            converged[:, keep],
+            cutoff_v
+        )
+
+    grids = {
+        'C3_shorts'    : C3[0],
+        'C3_longs'     : C3[1],
+        'v_inf_shorts' : v_inf[0],
+        'v_inf_longs'  : v_inf[1],
+        'tofs'         : np.where(keep, tofs, np.nan)
+    }
+
+    return grids, {'iterations': iterations, 'converged': converged, 'outcomes': outcomes}
+
+# Ephemerides shared by the grid worker processes, set once per worker
+_worker_data = {}
+
+def _init_worker(et_departures, states_depart, et_arrivals, states_arrive, kwargs):
+    _worker_data.update(
+        et_departures = et_departures,
+        states_depart = states_depart,
+        et_arrivals   = et_arrivals,
+        states_arrive = states_arrive,
+        kwargs        = kwargs
+    )
+
+def _solve_rows(rows):
+    # Solve the arrival rows [start, stop) of the grid inside a worker
+    start, stop = rows
+    d = _worker_data
+    return porkchop_grid(
+        d['et_departures'],
+        d['states_depart'],
+        d['et_arrivals'][start:stop],
+        d['states_arrive'][start:stop],
+        **d['kwargs']
+    )
+
+def _chunking(as_, ds, workers, chunk_size):
+    # Validated number of workers and arrival rows per chunk
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if not isinstance(workers, int) or workers <= 0:
+        raise ValueError("Number of 'workers' must be a positive integer.")
+
+    if chunk_size is None:
+        if workers == 1:
+            # Chunks of about 2**16 cells keep the vectorized solver efficient
+            chunk_size = max(1, 2 ** 16 // max(ds, 1))
+        else:
+            # About four tasks per worker
+            chunk_size = max(1, -(-as_ // (4 * workers)))
+
+    if not isinstance(chunk_size, int) or chunk_size <= 0:
+        raise ValueError("'chunk_size' must be a positive integer.")
+
+    return workers, chunk_size
+
+def iter_porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, cutoff_v,
+                       workers=1, chunk_size=None, progress=None, **kwargs):
+    '''
+    Computes the grids of porkchop_grid in chunks of arrival rows, yielding
+    each chunk as soon as it is solved so that partial results can be saved
+    or plotted while the rest of the grid is computed.
+
+    Closing the generator, e.g. by breaking out of the loop over it, cancels
+    the chunks that have not started yet.
+
+    Parameters:
+    et_departures, states_depart, et_arrivals, states_arrive, mu, cutoff_v :
+        See porkchop_grid
+    workers : int, optional
+        Number of worker processes; 1 solves the chunks in this process and
+        None uses all CPUs. With several workers chunks are yielded in the
+        order they finish, and at most two chunks per worker are solved
+        ahead of the consumer.
+    chunk_size : int, optional
+        Number of arrival rows per chunk
+    progress : callable, optional
+        Called as progress(rows_done, rows_total) after every chunk
+    kwargs :
+        Further keyword arguments passed to porkchop_grid
+
+    Yields:
+    start, stop : int
+        Arrival rows [start, stop) of the chunk
+    grids, stats : dict
+        The chunk of the grids and solver statistics, see porkchop_grid
+    '''
+
+    as_ = len(et_arrivals)
+    workers, chunk_size = _chunking(as_, len(et_departures), workers, chunk_size)
+
+    kwargs = dict(kwargs, mu=mu, cutoff_v=cutoff_v, return_stats=True)
+    chunks = [(start, min(start + chunk_size, as_)) for start in range(0, as_, chunk_size)]
+    done = 0
+
+    if workers == 1:
+        for start, stop in chunks:
+            grids, stats = porkchop_grid(
+                et_departures,
+                states_depart,
+                et_arrivals[start:stop],
+                states_arrive[start:stop],
+                **kwargs
+            )
+            done += stop - start
+            if progress is not None:
+                progress(done, as_)
+            yield start, stop, grids, stats
+        return
+
+    with ProcessPoolExecutor(
+        max_workers = workers,
+        initializer = _init_worker,
+        initargs    = (
+            np.asarray(et_departures, dtype=float),
+            np.asarray(states_depart, dtype=float),
+            np.asarray(et_arrivals, dtype=float),
+            np.asarray(states_arrive, dtype=float),
+            kwargs
+        )
+    ) as executor:
+        # At most two chunks per worker are in flight, and a chunk is released
+        # once yielded, so memory does not grow with the grid
+        chunks = iter(chunks)
+        pending = {}
+
+        try:
+            while True:
+                while len(pending) < 2 * workers:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    pending[executor.submit(_solve_rows, chunk)] = chunk
+
+                if not pending:
+                    break
+
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                while finished:
+                    future = finished.pop()
+                    start, stop = pending.pop(future)
+                    grids, stats = future.result()
+                    del future
+
+                    done += stop - start
+                    if progress is not None:
+                        progress(done, as_)
+                    yield start, stop, grids, stats
+        finally:
+            for future in pending:
+                future.cancel()
+
+def collect_grid(chunks, shape):
+    '''
+    Assembles the chunks yielded by iter_porkchop_grid into full grids.
+
+    Parameters:
+    chunks : iterable
+        (start, stop, grids, stats) tuples
+    shape : tuple
+        Shape of the full grid, (arrivals, departures)
+
+    Returns:
+    grids, stats : dict
+        See porkchop_grid
+    '''
+
+    grids = {}
+    stats = {}
+
+    for start, stop, chunk_grids, chunk_stats in chunks:
+        for key, value in chunk_grids.items():
+            if key not in grids:
+                grids[key] = np.empty(shape, dtype=value.dtype)
+            grids[key][start:stop] = value
+
+        for key, value in chunk_stats.items():
+            if key not in stats:
+                stats[key] = np.empty((2,) + tuple(shape), dtype=value.dtype)
+            stats[key][:, start:stop] = value
+
+    return grids, stats
+
+def parallel_porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, cutoff_v,
+                           workers=None, chunk_size=None, return_stats=False, **kwargs):
+    '''
+    Computes the same grids as porkchop_grid on a pool of worker processes.
+
+    The grid is split into chunks of arrival rows. The ephemerides are sent
+    to each worker once, when the worker starts, so a task only carries its
+    row range. Rows are reassembled in order, so the result is identical to
+    the serial computation.
+
+    Parameters:
+    et_departures, states_depart, et_arrivals, states_arrive, mu, cutoff_v :
+        See porkchop_grid
+    workers : int, optional
+        Number of worker processes (default is the number of CPUs)
+    chunk_size : int, optional
+        Number of arrival rows per task (default splits the grid into about
+        four tasks per worker)
+    return_stats : bool, optional
+        Also return the solver statistics
+    kwargs :
+        Further keyword arguments passed to iter_porkchop_grid and
+        porkchop_grid
+
+    Returns:
+    Same as porkchop_grid
+    '''
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    grids, stats = collect_grid(
+        iter_porkchop_grid(
+            et_departures,
+            states_depart,
+            et_arrivals,
+            states_arrive,
+            mu,
+            cutoff_v,
+            workers    = workers,
+            chunk_size = chunk_size,
+            **kwargs
+        ),
+        (len(et_arrivals), len(et_departures))
+    )
+
+    if return_stats:
+        return grids, stats
+
+    return grids
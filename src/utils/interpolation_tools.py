@@ -0,0 +1,108 @@
+'''
+Ephemeris Interpolation Tools
+
+Cubic Hermite interpolation of ephemeris tables. Horizons vector tables
+(VEC_TABLE=2) give both position and velocity at every epoch, so each interval
+is interpolated by the unique cubic matching both ends, with position errors
+of order h**4 and velocity errors of order h**3 in the table step h.
+'''
+
+# Third-party Libraries
+import numpy as np
+
+# Seconds per day
+DAY = 3600.0 * 24.0
+
+
+def hermite_interpolate(julianDates, states, epochs):
+    '''
+    Interpolates a table of states to arbitrary epochs.
+
+    Parameters:
+    julianDates : ndarray
+        Increasing Julian dates of the table
+    states : ndarray
+        States (x, y, z, vx, vy, vz) at those dates (km, km/s), shape (n, 6)
+    epochs : ndarray
+        Julian dates to interpolate to, within the table
+
+    Returns:
+    states : ndarray
+        Interpolated states at epochs, shape (len(epochs), 6)
+    '''
+
+    julianDates = np.asarray(julianDates, dtype=float)
+    states = np.asarray(states, dtype=float)
+    epochs = np.atleast_1d(np.asarray(epochs, dtype=float))
+
+    if julianDates.size < 2:
+        raise ValueError("Interpolation needs at least two epochs.")
+
+    # Guard against rounding at the ends of the table
+    tol = 1e-9 * (julianDates[-1] - julianDates[0])
+    if epochs.min() < julianDates[0] - tol or epochs.max() > julianDates[-1] + tol:
+        raise ValueError("Interpolation epochs fall outside the ephemeris table.")
+
+    i = np.clip(np.searchsorted(julianDates, epochs, side='right') - 1, 0, julianDates.size - 2)
+
+    # Interval length (days) and normalized time in the interval
+    h = julianDates[i + 1] - julianDates[i]
+    s = ((epochs - julianDates[i]) / h)[:, None]
+    hd = (h * DAY)[:, None]
+
+    p0, p1 = states[i, :3], states[i + 1, :3]
+    m0, m1 = states[i, 3:] * hd, states[i + 1, 3:] * hd
+
+    # Hermite basis functions and their derivatives
+    h00 = 2 * s ** 3 - 3 * s ** 2 + 1
+    h10 = s ** 3 - 2 * s ** 2 + s
+    h01 = -2 * s ** 3 + 3 * s ** 2
+    h11 = s ** 3 - s ** 2
+
+    d00 = 6 * s ** 2 - 6 * s
+    d10 = 3 * s ** 2 - 4 * s + 1
+    d01 = -6 * s ** 2 + 6 * s
+    d11 = 3 * s ** 2 - 2 * s
+
+    position = h00 * p0 + h10 * m0 + h01 * p1 + h11 * m1
+    velocity = (d00 * p0 + d10 * m0 + d01 * p1 + d11 * m1) / hd
+
+    return np.hstack([position, velocity])
+
+def interpolation_error(julianDates, states):
+    '''
+    Estimates the worst-case interpolation error of a table from its own data.
+
+    Every other epoch is interpolated from its neighbours at twice the table
+    step. Those midpoint errors are scaled back to the table step by the h**4
+    convergence of the interpolant. The velocity error follows from the shape
+    of the cubic error term, whose derivative peaks away from the midpoint.
+
+    Returns:
+    position_error : float
+        Estimated maximum position error (km)
+    velocity_error : float
+        Estimated maximum velocity error (km/s)
+    '''
+
+    julianDates = np.asarray(julianDates, dtype=float)
+    states = np.asarray(states, dtype=float)
+
+    if julianDates.size < 3:
+        return np.nan, np.nan
+
+    even = slice(0, None, 2)
+    odd = slice(1, 2 * ((julianDates.size - 1) // 2), 2)
+
+    estimate = hermite_interpolate(julianDates[even], states[even], julianDates[odd])
+    error = np.linalg.norm(estimate[:, :3] - states[odd, :3], axis=1)
+
+    # Midpoint error at step h, from the midpoint error at step 2h
+    position_error = np.max(error) / 2 ** 4
+
+    # The error term is proportional to s**2 (1 - s)**2: 1/16 at the midpoint,
+    # while its slope peaks at 0.19245 / h
+    step = np.max(np.diff(julianDates)) * DAY
+    velocity_error = position_error * 16 * 0.19245 / step
+
+    return position_error, velocity_error
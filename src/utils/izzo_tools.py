@@ -0,0 +1,343 @@
+'''
+Izzo's Lambert Solver
+
+Vectorized implementation of the algorithm in "Revisiting Lambert's problem",
+D. Izzo, Celestial Mechanics and Dynamical Astronomy 121 (2015). The time of
+flight equation is written in terms of a single variable x, started from an
+analytic initial guess and refined with Householder (third-order) iterations.
+Multi-revolution transfers are supported.
+'''
+
+# Third-party Libraries
+import numpy as np
+
+# Porkchop-Plot-Generator Libraries
+from utils.numerical_tools import outcome_codes
+
+
+def izzo_geometry(R1, R2):
+    '''
+    Computes the nondimensional transfer geometry of a batch of Lambert
+    problems, shared by the prograde and retrograde solutions.
+
+    Parameters:
+    R1, R2 : ndarray
+        Initial and final position vectors (km), shape (..., 3)
+
+    Returns:
+    geometry : dict
+        Norms, semiperimeter 's', lambda parameter 'll' and radial and
+        tangential unit vectors, for the prograde transfer
+    '''
+
+    r1 = np.linalg.norm(R1, axis=-1)
+    r2 = np.linalg.norm(R2, axis=-1)
+    c = np.linalg.norm(R2 - R1, axis=-1)
+    s = (r1 + r2 + c) / 2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        i_r1 = R1 / r1[..., None]
+        i_r2 = R2 / r2[..., None]
+        i_h = np.cross(i_r1, i_r2)
+        i_h = i_h / np.linalg.norm(i_h, axis=-1)[..., None]
+
+    ll = np.sqrt(1 - np.minimum(1.0, c / s))
+
+    # Transfers whose angular momentum points south sweep the long way
+    south = i_h[..., 2] < 0
+    ll = np.where(south, -ll, ll)
+    i_h = np.where(south[..., None], -i_h, i_h)
+
+    return {
+        'r1'   : r1,
+        'r2'   : r2,
+        'c'    : c,
+        's'    : s,
+        'll'   : ll,
+        'i_r1' : i_r1,
+        'i_r2' : i_r2,
+        'i_t1' : np.cross(i_h, i_r1),
+        'i_t2' : np.cross(i_h, i_r2)
+    }
+
+def hyp2f1b(x):
+    '''
+    Hypergeometric function 2F1(3, 1, 5/2, x), for x < 1
+    '''
+
+    x = np.asarray(x, dtype=float)
+    res = np.ones(x.shape)
+    term = np.ones(x.shape)
+
+    for ii in range(200):
+        term = term * (3 + ii) * (1 + ii) / (5 / 2 + ii) * x / (ii + 1)
+        res_old = res
+        res = res + term
+        if np.all(res_old == res):
+            break
+
+    return res
+
+def _compute_y(x, ll):
+    return np.sqrt(1 - ll ** 2 * (1 - x ** 2))
+
+def _compute_psi(x, y, ll):
+    elliptic = np.arccos(np.clip(x * y + ll * (1 - x ** 2), -1.0, 1.0))
+    hyperbolic = np.arcsinh((y - x * ll) * np.sqrt(np.abs(x ** 2 - 1)))
+    return np.where(x < 1, elliptic, np.where(x > 1, hyperbolic, 0.0))
+
+def _tof_equation_y(x, y, T0, ll, M):
+    '''
+    Nondimensional time of flight at x, minus the target T0
+    '''
+
+    # Near x = 1 the general expression loses precision; use the series form
+    near_one = (M == 0) & (x > np.sqrt(0.6)) & (x < np.sqrt(1.4))
+
+    eta = y - ll * x
+    S_1 = (1 - ll - x * eta) * 0.5
+    Q = 4 / 3 * hyp2f1b(np.where(near_one, S_1, 0.0))
+    T_series = (eta ** 3 * Q + 4 * ll * eta) * 0.5
+
+    psi = _compute_psi(x, y, ll)
+    T_general = ((psi + M * np.pi) / np.sqrt(np.abs(1 - x ** 2)) - x + ll * y) / (1 - x ** 2)
+
+    return np.where(near_one, T_series, T_general) - T0
+
+def _tof_equation_p(x, y, T, ll):
+    return (3 * T * x - 2 + 2 * ll ** 3 * x / y) / (1 - x ** 2)
+
+def _tof_equation_p2(x, y, T, dT, ll):
+    return (3 * T + 5 * x * dT + 2 * (1 - ll ** 2) * ll ** 3 / y ** 3) / (1 - x ** 2)
+
+def _tof_equation_p3(x, y, dT, ddT, ll):
+    return (7 * x * ddT + 8 * dT - 6 * (1 - ll ** 2) * ll ** 5 * x / y ** 5) / (1 - x ** 2)
+
+def _initial_guess(T, ll, M, low_path):
+    '''
+    Analytic initial guess for x
+    '''
+
+    if M == 0:
+        T_0 = np.arccos(ll) + ll * np.sqrt(1 - ll ** 2)
+        T_1 = 2 * (1 - ll ** 3) / 3
+        return np.where(
+            T >= T_0,
+            (T_0 / T) ** (2 / 3) - 1,
+            np.where(
+                T < T_1,
+                5 / 2 * T_1 / T * (T_1 - T) / (1 - ll ** 5) + 1,
+                (T_0 / T) ** np.log2(T_1 / T_0) - 1
+            )
+        )
+
+    x_0l = (((M * np.pi + np.pi) / (8 * T)) ** (2 / 3) - 1) / (((M * np.pi + np.pi) / (8 * T)) ** (2 / 3) + 1)
+    x_0r = (((8 * T) / (M * np.pi)) ** (2 / 3) - 1) / (((8 * T) / (M * np.pi)) ** (2 / 3) + 1)
+
+    return np.maximum(x_0l, x_0r) if low_path else np.minimum(x_0l, x_0r)
+
+def _compute_T_min(ll, M, tol, maxiter):
+    '''
+    Minimum nondimensional time of flight of the M revolution transfers,
+    found with Halley iterations on dT/dx = 0
+    '''
+
+    x = np.full(ll.shape, 0.1)
+    T = _tof_equation_y(x, _compute_y(x, ll), 0.0, ll, M)
+    iterations = np.zeros(ll.shape, dtype=int)
+
+    idx = np.arange(ll.size)
+    for _ in range(maxiter):
+        if not idx.size:
+            break
+
+        xi, Ti, li = x[idx], T[idx], ll[idx]
+        y = _compute_y(xi, li)
+        fder = _tof_equation_p(xi, y, Ti, li)
+        fder2 = _tof_equation_p2(xi, y, Ti, fder, li)
+        fder3 = _tof_equation_p3(xi, y, fder, fder2, li)
+        x_new = xi - 2 * fder * fder2 / (2 * fder2 ** 2 - fder * fder3)
+
+        x[idx] = x_new
+        T[idx] = _tof_equation_y(x_new, _compute_y(x_new, li), 0.0, li, M)
+        iterations[idx] += 1
+
+        done = ~np.isfinite(x_new) | (np.abs(x_new - xi) < tol)
+        idx = idx[~done]
+
+    return T, iterations
+
+def _householder(x, T0, ll, M, tol, maxiter):
+    '''
+    Solves the time of flight equation for x with Householder iterations
+    '''
+
+    x = x.copy()
+    converged = np.zeros(x.shape, dtype=bool)
+    iterations = np.zeros(x.shape, dtype=int)
+
+    idx = np.arange(x.size)
+    for _ in range(maxiter):
+        if not idx.size:
+            break
+
+        xi, T0i, li = x[idx], T0[idx], ll[idx]
+        y = _compute_y(xi, li)
+        fval = _tof_equation_y(xi, y, T0i, li, M)
+        T = fval + T0i
+        fder = _tof_equation_p(xi, y, T, li)
+        fder2 = _tof_equation_p2(xi, y, T, fder, li)
+        fder3 = _tof_equation_p3(xi, y, fder, fder2, li)
+        x_new = xi - fval * ((fder ** 2 - fval * fder2 / 2)
+                             / (fder * (fder ** 2 - fval * fder2) + fder3 * fval ** 2 / 6))
+
+        x[idx] = x_new
+        iterations[idx] += 1
+
+        bad = ~np.isfinite(x_new)
+        done = bad | (np.abs(x_new - xi) < tol)
+        converged[idx[done & ~bad]] = True
+        idx = idx[~done]
+
+    return x, converged, iterations
+
+def izzo_solver_batch(R1, R2, dt, mu, tol=1e-8, maxiter=35, trajectory='pro', revs=0, low_path=True, geometry=None,
+                      return_outcomes=False):
+    '''
+    Solves a batch of Lambert problems with Izzo's algorithm.
+
+    Parameters:
+    R1, R2 : ndarray
+        Initial and final position vectors (km), shape (..., 3)
+    dt : ndarray
+        Time of flight from R1 to R2 (s), broadcastable to shape (...)
+    mu : float
+        Gravitational parameter (km^3/s^2)
+    tol : float, optional
+        Tolerance on x for the Householder iterations
+    maxiter : int, optional
+        Maximum number of Householder iterations
+    trajectory : str, optional
+        'pro' for prograde orbit, 'retro' for retrograde orbit (default is 'pro')
+    revs : int, optional
+        Number of complete revolutions of the transfer (default is 0)
+    low_path : bool, optional
+        For multi-revolution transfers, choose the low energy (left) branch
+        rather than the high energy (right) branch
+    geometry : dict, optional
+        Precomputed output of izzo_geometry(R1, R2)
+    return_outcomes : bool, optional
+        Also return the outcome of every cell
+
+    Returns:
+    V1, V2 : ndarray
+        Initial and final velocity vectors (km/s), shape (..., 3)
+    converged : ndarray
+        Boolean mask of the cells that produced a solution. Cells whose time
+        of flight is too short for the requested revolutions do not converge.
+        Velocities of the remaining cells are NaN.
+    iterations : ndarray
+        Number of iterations spent on each cell
+    outcomes : ndarray
+        Only if return_outcomes is True. int8 outcome code of each cell, see
+        numerical_tools.outcome_codes. Cells whose time of flight is too short
+        for the requested revolutions are UNBRACKETED.
+    '''
+
+    if not isinstance(revs, (int, np.integer)) or revs < 0:
+        raise ValueError("Number of revolutions 'revs' must be a non-negative integer.")
+
+    if trajectory not in ('pro', 'retro'):
+        raise ValueError("Please indicate whether trajectory is prograde or retrograde with keyword argument.")
+
+    R1 = np.asarray(R1, dtype=float)
+    R2 = np.asarray(R2, dtype=float)
+
+    if geometry is None:
+        geometry = izzo_geometry(R1, R2)
+
+    shape = np.broadcast_shapes(geometry['ll'].shape, np.shape(dt))
+
+    # Flatten all per-cell quantities
+    r1, r2, c, s, ll = (
+        np.broadcast_to(geometry[key], shape).ravel() for key in ('r1', 'r2', 'c', 's', 'll')
+    )
+    i_r1, i_r2, i_t1, i_t2 = (
+        np.broadcast_to(geometry[key], shape + (3,)).reshape(-1, 3) for key in ('i_r1', 'i_r2', 'i_t1', 'i_t2')
+    )
+    dt = np.broadcast_to(np.asarray(dt, dtype=float), shape).ravel()
+
+    if trajectory == 'retro':
+        ll = -ll
+        i_t1 = -i_t1
+        i_t2 = -i_t2
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+
+        # Nondimensional time of flight
+        T = np.sqrt(2 * mu / s ** 3) * dt
+
+        # Degenerate geometries and negative times have no solution
+        invalid = ~(dt > 0) | ~(np.abs(ll) < 1) | ~(c > 0) | ~np.isfinite(i_t1).all(axis=-1)
+        failed = invalid.copy()
+        unbracketed = np.zeros(dt.shape, dtype=bool)
+
+        x = np.full(dt.shape, np.nan)
+        iterations = np.zeros(dt.shape, dtype=int)
+        idx = np.flatnonzero(~failed)
+
+        # Multi-revolution transfers only exist above a minimum time of flight
+        if revs > 0:
+            T_min, its = _compute_T_min(ll[idx], revs, tol, maxiter)
+            iterations[idx] += its
+            short = ~(T[idx] >= T_min)
+            failed[idx[short]] = True
+            unbracketed[idx[short]] = True
+            idx = idx[~short]
+
+        x_0 = _initial_guess(T[idx], ll[idx], revs, low_path)
+        x[idx], ok, its = _householder(x_0, T[idx], ll[idx], revs, tol, maxiter)
+        iterations[idx] += its
+        failed[idx[~ok]] = True
+
+        # Reconstruct the velocities
+        y = _compute_y(x, ll)
+        gamma = np.sqrt(mu * s / 2)
+        rho = (r1 - r2) / c
+        sigma = np.sqrt(1 - rho ** 2)
+
+        V_r1 = gamma * ((ll * y - x) - rho * (ll * y + x)) / r1
+        V_r2 = -gamma * ((ll * y - x) + rho * (ll * y + x)) / r2
+        V_t1 = gamma * sigma * (y + ll * x) / r1
+        V_t2 = gamma * sigma * (y + ll * x) / r2
+
+        V1 = V_r1[:, None] * i_r1 + V_t1[:, None] * i_t1
+        V2 = V_r2[:, None] * i_r2 + V_t2[:, None] * i_t2
+
+    converged = ~failed & np.isfinite(V1).all(axis=-1) & np.isfinite(V2).all(axis=-1)
+    V1[~converged] = np.nan
+    V2[~converged] = np.nan
+
+    solution = V1.reshape(shape + (3,)), V2.reshape(shape + (3,)), converged.reshape(shape), iterations.reshape(shape)
+
+    if return_outcomes:
+        return solution + (outcome_codes(converged, invalid, unbracketed).reshape(shape),)
+
+    return solution
+
+def izzo_solver(R1, R2, dt, mu, tol=1e-8, maxiter=35, trajectory='pro', revs=0, low_path=True):
+    '''
+    Solves Lambert's problem for a single pair of position vectors with
+    Izzo's algorithm. See izzo_solver_batch.
+
+    Returns:
+    V1, V2 : ndarray
+        Initial and final velocity vectors (km/s)
+    '''
+
+    V1, V2, converged, _ = izzo_solver_batch(R1, R2, dt, mu, tol, maxiter, trajectory, revs, low_path)
+
+    if not converged:
+        raise RuntimeError("izzo_solver: No solution found for the requested revolutions and time of flight.")
+
+    return V1, V2
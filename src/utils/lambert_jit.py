@@ -0,0 +1,151 @@
+'''
+Compiled Lambert kernels
+
+Numba versions of the Stumpff functions, F(z), dF/dz and the z iteration of
+the Curtis solver (Algorithm 5.2), looping over every cell of a batch in
+native code instead of masking NumPy arrays at each iteration. Numba is an
+optional dependency: when it cannot be imported AVAILABLE is False and
+lambert_tools uses its NumPy implementation. The kernels can also be turned
+off by setting ENABLED to False, or the environment variable
+PORKCHOP_DISABLE_JIT to 1 before import.
+'''
+
+# Python Standard Libraries
+import os
+
+# Third-party Libraries
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+AVAILABLE = njit is not None
+
+# Whether lambert_tools uses the kernels
+ENABLED = AVAILABLE and os.environ.get('PORKCHOP_DISABLE_JIT', '0') in ('', '0')
+
+
+def _jit(function):
+    # NumPy error semantics (NaN and inf instead of exceptions), cached on disk
+    # so that worker processes do not compile again
+    if njit is None:
+        return function
+    return njit(cache=True, error_model='numpy')(function)
+
+@_jit
+def stumpff_C(z):
+    '''
+    Stumpff function C(z)
+    '''
+
+    if z > 0:
+        return (1 - np.cos(np.sqrt(z))) / z
+    elif z < 0:
+        return (np.cosh(np.sqrt(-z)) - 1) / (-z)
+    else:
+        return 1 / 2
+
+@_jit
+def stumpff_S(z):
+    '''
+    Stumpff function S(z)
+    '''
+
+    if z > 0:
+        sz = np.sqrt(z)
+        return (sz - np.sin(sz)) / sz ** 3
+    elif z < 0:
+        sz = np.sqrt(-z)
+        return (np.sinh(sz) - sz) / sz ** 3
+    else:
+        return 1 / 6
+
+@_jit
+def _y(z, r1, r2, A):
+    return r1 + r2 + A * (z * stumpff_S(z) - 1) / np.sqrt(stumpff_C(z))
+
+@_jit
+def _F(z, r1, r2, A, sqrt_mu_dt):
+    y = _y(z, r1, r2, A)
+    return (y / stumpff_C(z)) ** 1.5 * stumpff_S(z) + A * np.sqrt(y) - sqrt_mu_dt
+
+@_jit
+def _dFdz(z, r1, r2, A):
+    y = _y(z, r1, r2, A)
+
+    if z == 0:
+        return np.sqrt(2) / 40 * y ** 1.5 + A / 8 * (np.sqrt(y) + A * np.sqrt(1 / 2 / y))
+
+    Cz = stumpff_C(z)
+    Sz = stumpff_S(z)
+    return (y / Cz) ** 1.5 * (1 / 2 / z * (Cz - 3 * Sz / 2 / Cz) + 3 * Sz ** 2 / 4 / Cz) \
+        + A / 8 * (3 * Sz / Cz * np.sqrt(y) + A * np.sqrt(Cz / y))
+
+@_jit
+def solve_z_curtis(r1, r2, A, sqrt_mu_dt, failed, tol, maxiter):
+    '''
+    Finds z for every cell with the bracketing and Newton iteration of
+    Algorithm 5.2, as lambert_tools._solve_z_curtis: z is increased by 0.1
+    from 0.1 until F(z) changes sign, then refined by Newton's method.
+
+    Parameters:
+    r1, r2, A, sqrt_mu_dt : ndarray
+        Per-cell quantities of the time of flight equation
+    failed : ndarray
+        Cells without a solution; updated in place
+    tol : float
+        Convergence tolerance on z
+    maxiter : int
+        Maximum number of Newton iterations
+
+    Returns:
+    z, failed, iterations, unbracketed : ndarray
+    '''
+
+    n = sqrt_mu_dt.size
+    z = np.full(n, 0.1)
+    iterations = np.zeros(n, dtype=np.int64)
+    unbracketed = np.zeros(n, dtype=np.bool_)
+
+    for i in range(n):
+        if failed[i]:
+            continue
+
+        # Determine approximately where F(z,dt) changes sign
+        iterations[i] += 1
+        zi = 0.1
+        while _F(zi, r1[i], r2[i], A[i], sqrt_mu_dt[i]) < 0:
+            zi += 0.1
+            if zi > 1e6:
+                failed[i] = True
+                unbracketed[i] = True
+                break
+            iterations[i] += 1
+
+        z[i] = zi
+        if failed[i]:
+            continue
+
+        # Newton's method until convergence within the error tolerance
+        done = False
+        for _ in range(maxiter):
+            z_new = zi - _F(zi, r1[i], r2[i], A[i], sqrt_mu_dt[i]) / _dFdz(zi, r1[i], r2[i], A[i])
+            iterations[i] += 1
+
+            if not np.isfinite(z_new):
+                failed[i] = True
+                done = True
+            elif abs(z_new - zi) < tol:
+                done = True
+
+            zi = z_new
+            if done:
+                break
+
+        z[i] = zi
+        if not done:
+            failed[i] = True
+
+    return z, failed, iterations, unbracketed
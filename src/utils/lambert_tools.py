@@ -6,7 +6,8 @@ Lambert's Problem Tools
 import numpy as np
 
 # Porkchop-Plot-Generator Libraries
-from utils.numerical_tools import newtonRaphson
+from utils.numerical_tools import newtonRaphson, bracketedNewton, outcome_codes
+from utils import izzo_tools
 
 
 def lambert_solver(R1, R2, dt, mu, tol=1e-6, maxiter=10000, trajectory='pro'):
@@ -113,6 +114,532 @@ def lambert_solver(R1, R2, dt, mu, tol=1e-6, maxiter=10000, trajectory='pro'):
         print('Lambert solver did not converge.')
         return np.array([0, 0, 0]), np.array([0, 0, 0])
 
+def lambert_geometry(R1, R2):
+    '''
+    Computes the transfer geometry shared by the prograde and retrograde
+    solutions of a batch of Lambert problems.
+
+    Parameters:
+    R1, R2 : ndarray
+        Initial and final position vectors (km), shape (..., 3)
+
+    Returns:
+    r1, r2 : ndarray
+        Magnitudes of R1 and R2 (km), shape (...)
+    dtheta_pro, dtheta_retro : ndarray
+        Change in true anomaly for the prograde and retrograde transfers (rad)
+    '''
+
+    # Magnitudes of R1 and R2
+    r1 = np.linalg.norm(R1, axis=-1)
+    r2 = np.linalg.norm(R2, axis=-1)
+
+    # Compute the cross product between R1 and R2
+    cross12 = np.cross(R1, R2)
+
+    # Compute the change in true anomaly
+    cos_dtheta = np.clip(np.sum(R1 * R2, axis=-1) / (r1 * r2), -1.0, 1.0)
+    dtheta = np.arccos(cos_dtheta)
+
+    # Prograde transfers sweep past 180 deg when the orbit normal points south,
+    # retrograde transfers when it points north
+    dtheta_pro = np.where(cross12[..., 2] < 0, 2 * np.pi - dtheta, dtheta)
+    dtheta_retro = np.where(cross12[..., 2] >= 0, 2 * np.pi - dtheta, dtheta)
+
+    return r1, r2, dtheta_pro, dtheta_retro
+
+def _y_vec(z, r1, r2, A):
+    return r1 + r2 + A * (z * S_vec(z) - 1) / np.sqrt(C_vec(z))
+
+def _F_vec(z, r1, r2, A, sqrt_mu_dt):
+    y = _y_vec(z, r1, r2, A)
+    return (y / C_vec(z)) ** 1.5 * S_vec(z) + A * np.sqrt(y) - sqrt_mu_dt
+
+def _dFdz_vec(z, r1, r2, A):
+    y = _y_vec(z, r1, r2, A)
+    Cz = C_vec(z)
+    Sz = S_vec(z)
+
+    # Avoid dividing by zero on the z = 0 branch, which is replaced below
+    z_safe = np.where(z == 0, 1.0, z)
+    general = (y / Cz) ** 1.5 * (1 / 2 / z_safe * (Cz - 3 * Sz / 2 / Cz) + 3 * Sz ** 2 / 4 / Cz) \
+        + A / 8 * (3 * Sz / Cz * np.sqrt(y) + A * np.sqrt(Cz / y))
+    at_zero = np.sqrt(2) / 40 * y ** 1.5 + A / 8 * (np.sqrt(y) + A * np.sqrt(1 / 2 / y))
+
+    return np.where(z == 0, at_zero, general)
+
+def _newton_step_vec(z, r1, r2, A, sqrt_mu_dt):
+    # Newton step z - F/F' and y(z), evaluating the Stumpff functions once
+    Cz = C_vec(z)
+    Sz = S_vec(z)
+    y = r1 + r2 + A * (z * Sz - 1) / np.sqrt(Cz)
+    F = (y / Cz) ** 1.5 * Sz + A * np.sqrt(y) - sqrt_mu_dt
+
+    z_safe = np.where(z == 0, 1.0, z)
+    dFdz = np.where(
+        z == 0,
+        np.sqrt(2) / 40 * y ** 1.5 + A / 8 * (np.sqrt(y) + A * np.sqrt(1 / 2 / y)),
+        (y / Cz) ** 1.5 * (1 / 2 / z_safe * (Cz - 3 * Sz / 2 / Cz) + 3 * Sz ** 2 / 4 / Cz)
+        + A / 8 * (3 * Sz / Cz * np.sqrt(y) + A * np.sqrt(Cz / y))
+    )
+
+    return z - F / dFdz, y
+
+def _solve_z_curtis(r1, r2, A, sqrt_mu_dt, dtheta, failed, tol, maxiter):
+    '''
+    Finds z for every cell with the bracketing and Newton iteration of
+    Algorithm 5.2: z is increased by 0.1 from 0.1 until F(z) changes sign.
+    Runs in the compiled kernel of lambert_jit when it is enabled.
+    '''
+
+    # Imported on first use, as importing Numba is slow
+    from utils import lambert_jit
+
+    if lambert_jit.ENABLED:
+        return lambert_jit.solve_z_curtis(r1, r2, A, sqrt_mu_dt, failed, float(tol), int(maxiter))
+
+    iterations = np.zeros(sqrt_mu_dt.shape, dtype=int)
+    unbracketed = np.zeros(sqrt_mu_dt.shape, dtype=bool)
+
+    # Determine approximately where F(z,dt) changes sign, and
+    # use that value of z as the starting value for z:
+    z = np.full(sqrt_mu_dt.shape, 0.1)
+    idx = np.flatnonzero(~failed)
+    iterations[idx] += 1
+    idx = idx[_F_vec(z[idx], r1[idx], r2[idx], A[idx], sqrt_mu_dt[idx]) < 0]
+    while idx.size:
+        z[idx] += 0.1
+
+        # Prevent infinite loop in case of an issue
+        too_far = z[idx] > 1e6
+        failed[idx[too_far]] = True
+        unbracketed[idx[too_far]] = True
+        idx = idx[~too_far]
+
+        iterations[idx] += 1
+        idx = idx[_F_vec(z[idx], r1[idx], r2[idx], A[idx], sqrt_mu_dt[idx]) < 0]
+
+    # Find z by iterating using Newton's method until convergence within the error tolerance:
+    idx = np.flatnonzero(~failed)
+    for _ in range(maxiter):
+        if not idx.size:
+            break
+
+        zi = z[idx]
+        z_new = zi - _F_vec(zi, r1[idx], r2[idx], A[idx], sqrt_mu_dt[idx]) \
+            / _dFdz_vec(zi, r1[idx], r2[idx], A[idx])
+        z[idx] = z_new
+        iterations[idx] += 1
+
+        # Diverged cells are dropped, converged cells are done
+        bad = ~np.isfinite(z_new)
+        failed[idx[bad]] = True
+        done = bad | (np.abs(z_new - zi) < tol)
+        idx = idx[~done]
+
+    # Cells still iterating after maxiter did not converge
+    failed[idx] = True
+
+    return z, failed, iterations, unbracketed
+
+def _solve_z_safeguarded(r1, r2, A, sqrt_mu_dt, dtheta, failed, tol, maxiter):
+    '''
+    Finds z for every cell with a bisection-safeguarded Newton iteration.
+
+    F(z) increases monotonically on the single revolution branch, from
+    -sqrt(mu)*dt where y(z) vanishes to +infinity at z = 4*pi**2. The root is
+    bracketed analytically and the iteration starts from an interpolation
+    between the parabolic (z = 0) and minimum-energy transfers, whose flight
+    times are known in closed form.
+    '''
+
+    iterations = np.zeros(sqrt_mu_dt.shape, dtype=int)
+    z = np.zeros(sqrt_mu_dt.shape)
+    unbracketed = np.zeros(sqrt_mu_dt.shape, dtype=bool)
+
+    idx = np.flatnonzero(~failed)
+    r1, r2, A, sqrt_mu_dt, dtheta = r1[idx], r2[idx], A[idx], sqrt_mu_dt[idx], dtheta[idx]
+
+    def F(z, i):
+        # Below the domain of y(z) the transfer time collapses to zero
+        y = _y_vec(z, r1[i], r2[i], A[i])
+        f = _F_vec(z, r1[i], r2[i], A[i], sqrt_mu_dt[i])
+        return np.where(y > 0, f, -sqrt_mu_dt[i])
+
+    def dFdz(z, i):
+        return _dFdz_vec(z, r1[i], r2[i], A[i])
+
+    every = np.arange(idx.size)
+
+    # Parabolic flight time (scaled by sqrt(mu))
+    t_p = F(np.zeros(idx.size), every) + sqrt_mu_dt
+
+    # Minimum-energy transfer flight time (scaled by sqrt(mu)) and its z
+    c = np.sqrt(r1 ** 2 + r2 ** 2 - 2 * r1 * r2 * np.cos(dtheta))
+    s = (r1 + r2 + c) / 2
+    beta = 2 * np.arcsin(np.sqrt(np.clip((s - c) / s, 0.0, 1.0)))
+    beta = np.where(dtheta > np.pi, -beta, beta)
+    t_m = np.sqrt(s ** 3 / 8) * (np.pi - beta + np.sin(beta))
+    z_m = (np.pi - beta) ** 2
+
+    # Interpolated initial guess
+    z_max = 4 * np.pi ** 2
+    guess = np.where(
+        sqrt_mu_dt > t_m,
+        z_max - (z_max - z_m) * t_m / sqrt_mu_dt,
+        z_m * (sqrt_mu_dt - t_p) / (t_m - t_p)
+    )
+
+    # Elliptic transfers are bracketed by [0, 4*pi**2), hyperbolic ones need a
+    # lower bound found by geometric expansion
+    lower = np.where(sqrt_mu_dt > t_p, 0.0, -1.0)
+    upper = np.where(sqrt_mu_dt > t_p, z_max, 0.0)
+    count = np.ones(idx.size, dtype=int)
+    expand = np.flatnonzero(sqrt_mu_dt <= t_p)
+    for _ in range(8):
+        if not expand.size:
+            break
+        count[expand] += 1
+        above = F(lower[expand], expand) > 0
+        upper[expand[above]] = lower[expand[above]]
+        lower[expand[above]] *= 4
+        expand = expand[above]
+
+    # Roots more hyperbolic than the last bound are not attempted
+    unbracketed[idx[expand]] = True
+
+    zi, converged, its = bracketedNewton(F, dFdz, guess, lower, upper, tol, maxiter)
+
+    z[idx] = zi
+    failed[idx] = unbracketed[idx] | ~converged
+    iterations[idx] = count + its
+
+    return z, failed, iterations, unbracketed
+
+# Root finders for F(z) = 0, selected by the 'method' keyword of the batch solvers
+_Z_SOLVERS = {
+    'curtis'      : _solve_z_curtis,
+    'safeguarded' : _solve_z_safeguarded
+}
+
+# Newton iterations allowed from a warm start before falling back to the cold path
+WARM_MAXITER = 20
+
+def _solve_z_warm(method, r1, r2, A, sqrt_mu_dt, dtheta, failed, tol, maxiter, z0):
+    '''
+    Finds z for every cell by Newton's method started from z0, e.g. the
+    converged z of a neighbouring cell. Cells without a finite z0, or whose
+    iteration leaves the domain of y(z) or does not converge within
+    WARM_MAXITER iterations, are solved again by the cold root finder of
+    method. Also returns the mask of the cells solved from z0.
+    '''
+
+    iterations = np.zeros(sqrt_mu_dt.shape, dtype=int)
+    z = np.where(np.isfinite(z0), z0, 0.0)
+    warm = np.zeros(sqrt_mu_dt.shape, dtype=bool)
+
+    idx = np.flatnonzero(~failed & np.isfinite(z0))
+    for _ in range(WARM_MAXITER):
+        if not idx.size:
+            break
+
+        zi = z[idx]
+        z_new, y = _newton_step_vec(zi, r1[idx], r2[idx], A[idx], sqrt_mu_dt[idx])
+        z[idx] = z_new
+        iterations[idx] += 1
+
+        # Diverged cells go to the cold path, converged cells are done
+        bad = ~np.isfinite(z_new) | ~(y > 0)
+        done = ~bad & (np.abs(z_new - zi) < tol)
+        warm[idx[done]] = True
+        idx = idx[~(bad | done)]
+
+    # Cold path for everything else; warm cells are skipped as if failed
+    cold = ~failed & ~warm
+    if not cold.any():
+        return z, failed, iterations, cold, warm
+
+    z_cold, failed_cold, iterations_cold, unbracketed = _Z_SOLVERS[method](
+        r1, r2, A, sqrt_mu_dt, dtheta, ~cold, tol, maxiter
+    )
+
+    z[cold] = z_cold[cold]
+    iterations[cold] += iterations_cold[cold]
+
+    return z, failed | (cold & failed_cold), iterations, cold & unbracketed, warm
+
+def lambert_solver_batch(R1, R2, dt, mu, tol=1e-6, maxiter=10000, trajectory='pro', geometry=None, method='curtis',
+                         return_outcomes=False, z0=None, return_z=False):
+    '''
+    Solves a batch of Lambert problems at once. Array-valued counterpart of
+    lambert_solver: the root finding for z is carried out on every cell
+    simultaneously, with a per-cell convergence mask.
+
+    Parameters:
+    R1, R2 : ndarray
+        Initial and final position vectors (km), shape (..., 3)
+    dt : ndarray
+        Time of flight from R1 to R2 (s), broadcastable to shape (...)
+    mu : float
+        Gravitational parameter (km^3/s^2)
+    tol : float, optional
+        Tolerance for the solver
+    maxiter : int, optional
+        Maximum number of iterations for Newton's method
+    trajectory : str, optional
+        'pro' for prograde orbit, 'retro' for retrograde orbit (default is 'pro')
+    geometry : tuple, optional
+        Precomputed output of lambert_geometry(R1, R2)
+    method : str, optional
+        'curtis' for the linear z bracketing and Newton iteration of
+        Algorithm 5.2, 'safeguarded' for an analytic initial guess refined by
+        a bracketed Newton iteration, bounded by maxiter iterations
+    return_outcomes : bool, optional
+        Also return the outcome of every cell
+    z0 : ndarray, optional
+        Initial z of every cell, broadcastable to shape (...), e.g. the
+        converged z of neighbouring cells. Cells are solved by Newton's
+        method from z0 and fall back to method where that fails or z0 is NaN.
+    return_z : bool, optional
+        Also return z and the warm start mask
+
+    Returns:
+    V1, V2 : ndarray
+        Initial and final velocity vectors (km/s), shape (..., 3)
+    converged : ndarray
+        Boolean mask of the cells that produced a solution. Velocities of the
+        remaining cells are NaN.
+    iterations : ndarray
+        Number of F(z) evaluations spent on each cell
+    outcomes : ndarray
+        Only if return_outcomes is True. int8 outcome code of each cell, see
+        numerical_tools.outcome_codes. Cells whose z bracketing passes 1e6
+        are UNBRACKETED.
+    z, warm : ndarray
+        Only if return_z is True. Converged z of every cell, NaN where the
+        cell was not solved, and the mask of the cells solved from z0
+        without the cold path.
+    '''
+
+    # Ensure tolerance and maximum iterations are of the correct type
+    if not isinstance(tol, (float, int)) or tol <= 0:
+        raise ValueError("Tolerance 'tol' must be a positive number.")
+
+    if not isinstance(maxiter, int) or maxiter <= 0:
+        raise ValueError("Maximum iterations 'maxiter' must be a positive integer.")
+
+    if method not in _Z_SOLVERS:
+        raise ValueError(f"Unknown Lambert solver method '{method}'.")
+
+    R1 = np.asarray(R1, dtype=float)
+    R2 = np.asarray(R2, dtype=float)
+
+    if geometry is None:
+        geometry = lambert_geometry(R1, R2)
+    r1, r2, dtheta_pro, dtheta_retro = geometry
+
+    if trajectory == 'pro':
+        dtheta = dtheta_pro
+    elif trajectory == 'retro':
+        dtheta = dtheta_retro
+    else:
+        raise ValueError("Please indicate whether trajectory is prograde or retrograde with keyword argument.")
+
+    shape = np.broadcast_shapes(r1.shape, r2.shape, np.shape(dt))
+    R1 = np.broadcast_to(R1, shape + (3,))
+    R2 = np.broadcast_to(R2, shape + (3,))
+
+    # Flatten all per-cell quantities
+    r1 = np.broadcast_to(r1, shape).ravel()
+    r2 = np.broadcast_to(r2, shape).ravel()
+    dtheta = np.broadcast_to(dtheta, shape).ravel()
+    dt = np.broadcast_to(np.asarray(dt, dtype=float), shape).ravel()
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+
+        # Compute the auxiliary function, A(r1,r2,dtheta)
+        A = np.sin(dtheta) * np.sqrt(r1 * r2 / (1 - np.cos(dtheta)))
+        sqrt_mu_dt = np.sqrt(mu) * dt
+
+        # Only positive times of flight have a solution
+        invalid = ~(dt > 0) | ~np.isfinite(A)
+
+        if z0 is None:
+            z, failed, iterations, unbracketed = _Z_SOLVERS[method](
+                r1, r2, A, sqrt_mu_dt, dtheta, invalid.copy(), tol, maxiter
+            )
+            warm = np.zeros(shape, dtype=bool).ravel()
+        else:
+            z0 = np.broadcast_to(np.asarray(z0, dtype=float), shape).ravel()
+            z, failed, iterations, unbracketed, warm = _solve_z_warm(
+                method, r1, r2, A, sqrt_mu_dt, dtheta, invalid.copy(), tol, maxiter, z0
+            )
+
+        # Compute the Lagrangian coefficients
+        y = _y_vec(z, r1, r2, A)
+        f = 1 - y / r1
+        g = A * np.sqrt(y / mu)
+        gdot = 1 - y / r2
+
+        # Compute the velocities V1 & V2
+        R1 = R1.reshape(-1, 3)
+        R2 = R2.reshape(-1, 3)
+        V1 = (R2 - f[:, None] * R1) / g[:, None]
+        V2 = (gdot[:, None] * R2 - R1) / g[:, None]
+
+    converged = ~failed & np.isfinite(V1).all(axis=-1) & np.isfinite(V2).all(axis=-1)
+    V1[~converged] = np.nan
+    V2[~converged] = np.nan
+
+    solution = V1.reshape(shape + (3,)), V2.reshape(shape + (3,)), converged.reshape(shape), iterations.reshape(shape)
+
+    if return_outcomes:
+        solution += (outcome_codes(converged, invalid, unbracketed).reshape(shape),)
+
+    if return_z:
+        solution += (np.where(converged, z, np.nan).reshape(shape), (warm & converged).reshape(shape))
+
+    return solution
+
+def lambert_grid(R_depart, R_arrive, dt, mu, tol=1e-6, maxiter=10000, method='curtis', revs=0, low_path=True):
+    '''
+    Solves Lambert's problem for every (arrival, departure) pair of a porkchop
+    grid, both prograde and retrograde. The transfer geometry is computed once
+    per pair and shared by the two branches.
+
+    Parameters:
+    R_depart : ndarray
+        Departure position vectors (km), shape (nd, 3)
+    R_arrive : ndarray
+        Arrival position vectors (km), shape (na, 3)
+    dt : ndarray
+        Time of flight for each pair (s), shape (na, nd)
+    mu : float
+        Gravitational parameter (km^3/s^2)
+    tol : float, optional
+        Tolerance for the solver
+    maxiter : int, optional
+        Maximum number of iterations for Newton's method
+    method : str, optional
+        Root finder passed to lambert_solver_batch, or 'izzo' to use
+        izzo_tools.izzo_solver_batch instead
+    revs : int, optional
+        Number of complete revolutions ('izzo' only)
+    low_path : bool, optional
+        Low or high energy multi-revolution branch ('izzo' only)
+
+    Returns:
+    V1, V2 : ndarray
+        Departure and arrival velocity vectors (km/s), shape (2, na, nd, 3).
+        Index 0 holds the prograde (short way) solutions, index 1 the
+        retrograde (long way) solutions.
+    converged : ndarray
+        Boolean mask of solved cells, shape (2, na, nd)
+    iterations : ndarray
+        Number of iterations spent on each cell, shape (2, na, nd)
+    '''
+
+    R1 = np.asarray(R_depart, dtype=float)[None, :, :]
+    R2 = np.asarray(R_arrive, dtype=float)[:, None, :]
+
+    return lambert_pairs(R1, R2, dt, mu, tol, maxiter, method, revs, low_path)
+
+def lambert_pairs(R1, R2, dt, mu, tol=1e-6, maxiter=10000, method='curtis', revs=0, low_path=True,
+                  return_outcomes=False):
+    '''
+    Solves Lambert's problem both prograde and retrograde for broadcastable
+    arrays of position vectors, e.g. an arbitrary list of (departure,
+    arrival) pairs. See lambert_grid for the parameters.
+
+    Parameters:
+    R1, R2 : ndarray
+        Departure and arrival position vectors (km), shape (..., 3)
+    dt : ndarray
+        Time of flight (s), shape (...)
+    return_outcomes : bool, optional
+        Also return the outcome code of every cell
+
+    Returns:
+    V1, V2, converged, iterations : ndarray
+        As for lambert_grid, with a leading axis of 2 for the two branches
+    outcomes : ndarray
+        Only if return_outcomes is True, see lambert_solver_batch
+    '''
+
+    if method == 'izzo':
+        geometry = izzo_tools.izzo_geometry(R1, R2)
+        solutions = [
+            izzo_tools.izzo_solver_batch(R1, R2, dt, mu, tol, maxiter, trajectory, revs, low_path, geometry=geometry,
+                                         return_outcomes=return_outcomes)
+            for trajectory in ('pro', 'retro')
+        ]
+    elif revs:
+        raise ValueError("Multi-revolution transfers require the 'izzo' solver.")
+    else:
+        geometry = lambert_geometry(R1, R2)
+        solutions = [
+            lambert_solver_batch(R1, R2, dt, mu, tol, maxiter, trajectory, geometry=geometry, method=method,
+                                 return_outcomes=return_outcomes)
+            for trajectory in ('pro', 'retro')
+        ]
+
+    return tuple(np.stack(arrays) for arrays in zip(*solutions))
+
+def lambert_continuation(R_depart, R_arrive, dt, mu, tol=1e-6, maxiter=10000, method='curtis',
+                         return_outcomes=False):
+    '''
+    Solves the prograde and retrograde Lambert problems of a porkchop grid by
+    continuation: the departure columns are swept in order and each cell is
+    started from the converged z of the same arrival in the previous column,
+    falling back to the cold root finder of method where that fails. Adjacent
+    cells have nearly the same geometry, so most cells converge in a few
+    Newton iterations instead of being bracketed from scratch.
+
+    Parameters:
+    R_depart, R_arrive, dt, mu, tol, maxiter :
+        See lambert_grid
+    method : str, optional
+        'curtis' or 'safeguarded', the cold root finder
+    return_outcomes : bool, optional
+        Also return the outcome code of every cell
+
+    Returns:
+    V1, V2, converged, iterations : ndarray
+        As for lambert_grid
+    outcomes : ndarray
+        Only if return_outcomes is True, see lambert_solver_batch
+    warm : ndarray
+        Mask of the cells solved from the z of their neighbour, shape
+        (2, na, nd)
+    '''
+
+    if method not in _Z_SOLVERS:
+        raise ValueError(f"Continuation requires the 'curtis' or 'safeguarded' solver, not '{method}'.")
+
+    R_depart = np.asarray(R_depart, dtype=float)
+    R_arrive = np.asarray(R_arrive, dtype=float)
+    dt = np.asarray(dt, dtype=float)
+
+    columns = []
+    z_prev = [None, None]
+
+    for j in range(R_depart.shape[0]):
+        geometry = lambert_geometry(R_depart[j], R_arrive)
+        column = []
+
+        for k, trajectory in enumerate(('pro', 'retro')):
+            *solution, z, warm = lambert_solver_batch(
+                R_depart[j], R_arrive, dt[:, j], mu, tol, maxiter, trajectory, geometry=geometry, method=method,
+                return_outcomes=return_outcomes, z0=z_prev[k], return_z=True
+            )
+            z_prev[k] = z
+            column.append(solution + [warm])
+
+        columns.append([np.stack(arrays) for arrays in zip(*column)])
+
+    # Columns become the departure axis, before the vector axis of V1 and V2
+    return tuple(np.stack(arrays, axis=2) for arrays in zip(*columns))
+
 def C(z):
     '''
     Stumpff Function
@@ -135,4 +662,42 @@ def S(z):
     elif z < 0:
         return (np.sinh(np.sqrt(-z)) - np.sqrt(-z)) / (np.sqrt(-z)) ** 3
     else:
-        return 1 / 6
\ No newline at end of file
+        return 1 / 6
+
+def C_vec(z):
+    '''
+    Stumpff Function (array-valued)
+    '''
+
+    z = np.asarray(z, dtype=float)
+    out = np.full(z.shape, 1 / 2)
+
+    pos = z > 0
+    neg = z < 0
+
+    sz = np.sqrt(z[pos])
+    out[pos] = (1 - np.cos(sz)) / z[pos]
+
+    sz = np.sqrt(-z[neg])
+    out[neg] = (np.cosh(sz) - 1) / (-z[neg])
+
+    return out
+
+def S_vec(z):
+    '''
+    Stumpff Function (array-valued)
+    '''
+
+    z = np.asarray(z, dtype=float)
+    out = np.full(z.shape, 1 / 6)
+
+    pos = z > 0
+    neg = z < 0
+
+    sz = np.sqrt(z[pos])
+    out[pos] = (sz - np.sin(sz)) / sz ** 3
+
+    sz = np.sqrt(-z[neg])
+    out[neg] = (np.sinh(sz) - sz) / sz ** 3
+
+    return out
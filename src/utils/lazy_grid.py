@@ -0,0 +1,186 @@
+'''
+Lazily evaluated porkchop grids
+
+A LazyGrid solves Lambert's problem only for the (departure, arrival) cells
+that are requested and remembers every solved cell. Requesting a window of
+the grid, for example a zoom into a basin at a finer step, reuses all cells
+solved by earlier requests and solves only the new ones. States at epochs
+that are not in the ephemeris tables are interpolated.
+'''
+
+# Third-party Libraries
+import numpy as np
+
+# Porkchop-Plot-Generator Libraries
+from utils import grid_tools as gt
+from utils.survey_tools import window_states
+from utils.time_tools import EPOCH_TOL, date_to_jd
+
+# Stored solver statistics of each cell, per branch
+STAT_KEYS = ('iterations', 'converged', 'outcomes')
+
+
+def _epochs(start, stop, step):
+    # Epochs from start to stop (inclusive) every step days, as
+    # time_tools.requested_epochs but also taking Julian dates
+    jd0, jd1 = (date_to_jd(date) if isinstance(date, str) else float(date) for date in (start, stop))
+    return jd0 + step * np.arange(int(np.floor((jd1 - jd0) / step + EPOCH_TOL)) + 1)
+
+class LazyGrid:
+    '''
+    Porkchop grid solved on demand and memoized per (departure, arrival)
+    pair of epochs.
+
+    Parameters:
+    departure_table, arrival_table : tuple
+        (julianDates, states) ephemeris tables of the departure and arrival
+        bodies, covering every epoch that will be requested
+    mu, cutoff_v, tof_min, tof_max :
+        See grid_tools.porkchop_grid
+    kwargs :
+        Further keyword arguments passed to porkchop_pairs (tol, maxiter,
+        solver, revs, low_path)
+    '''
+
+    def __init__(self, departure_table, arrival_table, mu, cutoff_v, tof_min=None, tof_max=None, **kwargs):
+        self.tables = {
+            'departure' : tuple(np.asarray(array, dtype=float) for array in departure_table),
+            'arrival'   : tuple(np.asarray(array, dtype=float) for array in arrival_table)
+        }
+        self.mu = mu
+        self.cutoff_v = cutoff_v
+        self.tof_min = tof_min
+        self.tof_max = tof_max
+        self.kwargs = kwargs
+
+        # Index of every epoch seen, per axis, keyed by the epoch in units of
+        # EPOCH_TOL so that epochs computed differently still match
+        self._epochs = {'departure': {}, 'arrival': {}}
+
+        # Solved cells sorted by key (departure index << 32 | arrival index)
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._values = {key: np.zeros(0, dtype=np.float32) for key in gt.GRID_KEYS}
+        self._values.update({
+            'iterations' : np.zeros((2, 0), dtype=int),
+            'converged'  : np.zeros((2, 0), dtype=bool),
+            'outcomes'   : np.zeros((2, 0), dtype=np.int8)
+        })
+
+        # Cells solved and cells served from memory over all requests
+        self.solved = 0
+        self.reused = 0
+
+    def __len__(self):
+        return self._keys.size
+
+    def _index(self, axis, epochs):
+        # Registry index of each epoch, registering new epochs
+        registry = self._epochs[axis]
+        return np.array([registry.setdefault(key, len(registry)) for key in
+                         np.rint(epochs / EPOCH_TOL).astype(np.int64).tolist()], dtype=np.int64)
+
+    def _solve(self, et_departures, et_arrivals, rows, cols, keys):
+        # Solve the cells (rows, cols) of a window and insert them in memory
+        states_depart = window_states(*self.tables['departure'], et_departures[np.unique(cols)])
+        states_arrive = window_states(*self.tables['arrival'], et_arrivals[np.unique(rows)])
+
+        # Rows of the unique states of each cell
+        cols_states = np.searchsorted(np.unique(cols), cols)
+        rows_states = np.searchsorted(np.unique(rows), rows)
+
+        grids, stats = gt.porkchop_pairs(
+            et_departures[cols],
+            states_depart[cols_states],
+            et_arrivals[rows],
+            states_arrive[rows_states],
+            self.mu,
+            self.cutoff_v,
+            **self.kwargs
+        )
+
+        order = np.argsort(np.concatenate([self._keys, keys]), kind='stable')
+        self._keys = np.concatenate([self._keys, keys])[order]
+
+        for key in gt.GRID_KEYS:
+            self._values[key] = np.concatenate([self._values[key], grids[key].astype(np.float32)])[order]
+        for key in STAT_KEYS:
+            self._values[key] = np.concatenate([self._values[key], stats[key]], axis=1)[:, order]
+
+        self.solved += keys.size
+
+    def evaluate(self, et_departures, et_arrivals, return_stats=False):
+        '''
+        Grids of every combination of et_departures and et_arrivals, solving
+        only the cells that were not solved by an earlier request.
+
+        Parameters:
+        et_departures, et_arrivals : ndarray
+            Departure and arrival Julian dates, within the ephemeris tables
+        return_stats : bool, optional
+            Also return the solver statistics
+
+        Returns:
+        grids : dict
+            See grid_tools.porkchop_grid
+        stats : dict
+            Only if return_stats is True. 'iterations', 'converged' and
+            'outcomes' as porkchop_grid, recorded when each cell was solved,
+            and the 'reused' mask of the cells that were already solved
+        '''
+
+        et_departures = np.atleast_1d(np.asarray(et_departures, dtype=float))
+        et_arrivals = np.atleast_1d(np.asarray(et_arrivals, dtype=float))
+        shape = (et_arrivals.size, et_departures.size)
+
+        # Only feasible cells are solved or stored
+        rows, cols = np.nonzero(gt.feasible(et_arrivals[:, None] - et_departures[None, :], self.tof_min, self.tof_max))
+        keys = (self._index('departure', et_departures)[cols] << 32) | self._index('arrival', et_arrivals)[rows]
+
+        pos = np.searchsorted(self._keys, keys)
+        found = pos < self._keys.size
+        found[found] = self._keys[pos[found]] == keys[found]
+
+        self.reused += int(found.sum())
+
+        if not found.all():
+            # Each new cell is solved once, even if its epochs are repeated
+            missing = np.flatnonzero(~found)
+            missing = missing[np.unique(keys[missing], return_index=True)[1]]
+
+            self._solve(et_departures, et_arrivals, rows[missing], cols[missing], keys[missing])
+            pos = np.searchsorted(self._keys, keys)
+
+        grids = {}
+        for key in gt.GRID_KEYS:
+            grids[key] = np.full(shape, np.nan, dtype=np.float32)
+            grids[key][rows, cols] = self._values[key][pos]
+
+        if return_stats:
+            stats = {key: np.zeros((2,) + shape, dtype=self._values[key].dtype) for key in STAT_KEYS}
+            for key in STAT_KEYS:
+                stats[key][:, rows, cols] = self._values[key][:, pos]
+
+            stats['reused'] = np.zeros(shape, dtype=bool)
+            stats['reused'][rows, cols] = found
+            return grids, stats
+
+        return grids
+
+    def window(self, departure0, departure1, arrival0, arrival1, step, return_stats=False):
+        '''
+        Grids of the departure and arrival windows every step days, see
+        evaluate. Window bounds are dates ('YYYY-MM-DD') or Julian dates.
+
+        Returns:
+        et_departures, et_arrivals, grids[, stats]
+        '''
+
+        et_departures = _epochs(departure0, departure1, step)
+        et_arrivals = _epochs(arrival0, arrival1, step)
+
+        result = self.evaluate(et_departures, et_arrivals, return_stats)
+
+        if return_stats:
+            return (et_departures, et_arrivals) + result
+
+        return et_departures, et_arrivals, result
@@ -4,6 +4,10 @@ Numerical tools
 
 import numpy as np
 
+# Outcome of every cell of the batch root finders, see outcome_codes
+SOLVED, INVALID, UNBRACKETED, NOT_CONVERGED = 0, 1, 2, 3
+OUTCOMES = ('solved', 'invalid', 'unbracketed', 'not_converged')
+
 
 def newtonRaphson(y, dydx, init_guess, tol, maxiter=1000):
     '''
@@ -18,7 +22,211 @@ def newtonRaphson(y, dydx, init_guess, tol, maxiter=1000):
             return x_new
         x = x_new
     raise RuntimeError("newtonRaphson: This function did not converge to a solution.")
-    
+
+def outcome_codes(converged, invalid, unbracketed):
+    '''
+    Outcome of every cell of a batch root finder: SOLVED, INVALID (no
+    solution was attempted), UNBRACKETED (no bracket of the root was found)
+    or NOT_CONVERGED (the iteration diverged or ran out of iterations).
+    '''
+
+    return np.select([converged, invalid, unbracketed], [SOLVED, INVALID, UNBRACKETED], NOT_CONVERGED).astype(np.int8)
+
+def bracketedNewton(y, dydx, init_guess, lower, upper, tol, maxiter=50):
+    '''
+    Calculate roots of many increasing single variable functions at once using
+    a Newton-Raphson iteration safeguarded by bisection.
+
+    Each root must be bracketed, y(lower) < 0 < y(upper). Newton steps that
+    leave the bracket, or that cannot be computed, are replaced by bisection,
+    so every root is found in at most maxiter iterations.
+
+    Parameters:
+    y, dydx : callable
+        Functions of (x, idx) returning the function value and derivative of
+        the cells idx at x
+    init_guess, lower, upper : ndarray
+        Initial guesses and brackets
+    tol : float
+        Convergence tolerance on the step size
+    maxiter : int, optional
+        Maximum number of iterations
+
+    Returns:
+    x : ndarray
+        Roots
+    converged : ndarray
+        Boolean mask of converged cells
+    iterations : ndarray
+        Number of iterations taken by each cell
+    '''
+
+    lo = np.array(lower, dtype=float)
+    hi = np.array(upper, dtype=float)
+    x = np.clip(np.array(init_guess, dtype=float), lo, hi)
+
+    converged = np.zeros(x.shape, dtype=bool)
+    iterations = np.zeros(x.shape, dtype=int)
+
+    # Cells still iterating
+    idx = np.arange(x.size)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for _ in range(maxiter):
+            if not idx.size:
+                break
+
+            xi = x[idx]
+            fi = y(xi, idx)
+            iterations[idx] += 1
+
+            # Shrink the bracket around the root
+            below = ~(fi > 0)
+            lo[idx[below]] = xi[below]
+            hi[idx[~below]] = xi[~below]
+
+            # Newton step, falling back to bisection outside the bracket
+            x_new = xi - fi / dydx(xi, idx)
+            mid = 0.5 * (lo[idx] + hi[idx])
+            bisect = ~((x_new >= lo[idx]) & (x_new <= hi[idx]))
+            x_new[bisect] = mid[bisect]
+
+            # Exact roots stay where they are
+            exact = fi == 0
+            x_new[exact] = xi[exact]
+
+            x[idx] = x_new
+            done = (np.abs(x_new - xi) < tol) | exact
+            converged[idx[done]] = True
+            idx = idx[~done]
+
+    return x, converged, iterations
+
+def stencilNewton(f, init_guess, step, tol, maxiter=100):
+    '''
+    Minimize many functions of several variables at once using Newton's
+    method on finite-difference derivatives.
+
+    Each iteration evaluates a 3**n stencil of points around every current
+    point in a single call of f. The gradient and Hessian of the stencil
+    give a Newton step, and the stencil spacing follows the step size down
+    to tol. Where the Hessian is not positive definite the best point of the
+    stencil is taken instead, and steps that increase the function are
+    undone with a smaller stencil. Infinite values are allowed, e.g. to
+    reject points outside a feasible region.
+
+    Parameters:
+    f : callable
+        Function of (x, idx) returning the values of the functions idx at the
+        points x, shape (len(idx), points, n) -> (len(idx), points)
+    init_guess : ndarray
+        Initial points, shape (m, n)
+    step : ndarray or float
+        Initial stencil spacing of each function
+    tol : float
+        Convergence tolerance on the step size
+    maxiter : int, optional
+        Maximum number of iterations
+
+    Returns:
+    x : ndarray
+        Best points found, shape (m, n)
+    fx : ndarray
+        Function values at x
+    converged : ndarray
+        Boolean mask of converged functions
+    iterations : ndarray
+        Number of iterations taken by each function
+    '''
+
+    x = np.array(init_guess, dtype=float)
+    m, n = x.shape
+    h = np.broadcast_to(np.asarray(step, dtype=float), (m,)).copy()
+
+    # Stencil offsets in units of h, the centre first
+    offsets = np.stack(np.meshgrid(*[[0, -1, 1]] * n, indexing='ij'), axis=-1).reshape(-1, n)
+    position = {tuple(o): k for k, o in enumerate(offsets)}
+
+    def value(fv, *terms):
+        # Stencil value at the offset made of (axis, sign) terms
+        o = np.zeros(n, dtype=int)
+        for axis, sign in terms:
+            o[axis] = sign
+        return fv[:, position[tuple(o)]]
+
+    best_x = x.copy()
+    best_f = np.full(m, np.inf)
+    converged = np.zeros(m, dtype=bool)
+    iterations = np.zeros(m, dtype=int)
+
+    # Functions still iterating
+    idx = np.arange(m)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for _ in range(maxiter):
+            if not idx.size:
+                break
+
+            hi = h[idx]
+            points = x[idx, None, :] + hi[:, None, None] * offsets[None]
+            fv = np.asarray(f(points, idx), dtype=float)
+            iterations[idx] += 1
+
+            # Steps that made things worse are undone with a smaller stencil
+            f0 = fv[:, 0]
+            worse = ~(f0 <= best_f[idx])
+            retry = worse & np.isfinite(best_f[idx])
+            x[idx[retry]] = best_x[idx[retry]]
+            h[idx[retry]] /= 4
+
+            accept = ~retry
+            best_x[idx[accept]] = x[idx[accept]]
+            best_f[idx[accept]] = np.where(worse[accept], best_f[idx[accept]], f0[accept])
+
+            # Finite-difference gradient and Hessian
+            g = np.stack([(value(fv, (i, 1)) - value(fv, (i, -1))) / (2 * hi) for i in range(n)], axis=-1)
+            H = np.empty((idx.size, n, n))
+            for i in range(n):
+                H[:, i, i] = (value(fv, (i, 1)) - 2 * f0 + value(fv, (i, -1))) / hi ** 2
+                for j in range(i + 1, n):
+                    H[:, i, j] = H[:, j, i] = (
+                        value(fv, (i, 1), (j, 1)) - value(fv, (i, 1), (j, -1)) -
+                        value(fv, (i, -1), (j, 1)) + value(fv, (i, -1), (j, -1))
+                    ) / (4 * hi ** 2)
+
+            newton = accept & np.all(np.isfinite(g), axis=-1) & np.all(np.isfinite(H), axis=(-2, -1))
+            s = np.zeros((idx.size, n))
+            if np.any(newton):
+                H_ok = H[newton]
+                definite = np.all(np.linalg.eigvalsh(H_ok) > 0, axis=-1)
+                s_ok = np.zeros((H_ok.shape[0], n))
+                s_ok[definite] = -np.linalg.solve(H_ok[definite], g[newton][definite][..., None])[..., 0]
+                s[newton] = s_ok
+                newton[np.flatnonzero(newton)[~definite]] = False
+
+            # Newton steps are limited to twice the stencil size
+            size = np.max(np.abs(s), axis=-1)
+            s *= np.minimum(1, 2 * hi / np.where(size > 0, size, 1))[:, None]
+
+            cells = idx[newton]
+            x[cells] += s[newton]
+            h[cells] = np.clip(size[newton], tol / 2, hi[newton])
+            done = newton & (size < tol)
+
+            # Otherwise move to the best point of the stencil, or shrink it
+            pattern = accept & ~newton
+            j = np.argmin(np.where(np.isnan(fv), np.inf, fv), axis=-1)
+            moved = pattern & (j > 0) & (fv[np.arange(idx.size), j] < f0)
+            x[idx[moved]] = points[moved, j[moved]]
+            h[idx[pattern & ~moved]] /= 2
+
+            # Stencils shrunk below tol, e.g. at a bound, are converged too
+            done |= h[idx] < tol / 4
+            converged[idx[done]] = np.isfinite(best_f[idx[done]])
+            idx = idx[~done]
+
+    return best_x, best_f, converged, iterations
+
 def norm(vec):
     '''
     Vector norm
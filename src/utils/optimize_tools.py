@@ -0,0 +1,196 @@
+'''
+Transfer optimization
+
+Finds the departure and arrival dates minimizing C3, arrival v_infinity or
+total delta-v over continuous dates, instead of reading the minimum off a
+dense porkchop grid. A coarse grid on every few ephemeris epochs provides the
+starting points, and all of them are refined together by a finite-difference
+Newton search on states interpolated from the ephemeris tables, so that each
+iteration is a single vectorized Lambert solve.
+'''
+
+# Third-party Libraries
+import numpy as np
+
+# Porkchop-Plot-Generator Libraries
+from utils import grid_tools as gt
+from utils.interpolation_tools import hermite_interpolate
+from utils.numerical_tools import stencilNewton
+
+# Quantities that can be minimized
+OBJECTIVES = ('C3', 'v_inf', 'dv')
+
+# Transfer branches, in the order of the grids
+BRANCHES = ('short', 'long')
+
+
+def _objective(grids, objective):
+    # Objective of both branches, stacked short way first
+    C3 = np.stack([grids['C3_shorts'], grids['C3_longs']])
+    v_inf = np.stack([grids['v_inf_shorts'], grids['v_inf_longs']])
+
+    if objective == 'C3':
+        return C3
+    if objective == 'v_inf':
+        return v_inf
+    return np.sqrt(C3) + v_inf
+
+def _seeds(values, count):
+    # Indices of the lowest local minima of a grid, best first. Pruned
+    # cells count as infinitely bad neighbours.
+    values = np.where(np.isnan(values), np.inf, values)
+    padded = np.pad(values, 1, constant_values=np.inf)
+    rows, cols = values.shape
+    neighbours = np.stack([
+        padded[1 + di:1 + di + rows, 1 + dj:1 + dj + cols]
+        for di in (-1, 0, 1) for dj in (-1, 0, 1) if di or dj
+    ])
+    minima = np.isfinite(values) & np.all(values <= neighbours, axis=0)
+
+    idx = np.flatnonzero(minima)
+    idx = idx[np.argsort(values.ravel()[idx])][:count]
+
+    return [np.unravel_index(i, values.shape) for i in idx]
+
+def optimize_transfer(et_departures, states_depart, et_arrivals, states_arrive, mu, objective='dv', branch=None,
+                      seeds=3, coarse_step=10.0, tol=1e-4, maxiter=100, **kwargs):
+    '''
+    Finds the transfer minimizing an objective over continuous departure and
+    arrival dates within the ephemeris tables.
+
+    Parameters:
+    et_departures, states_depart, et_arrivals, states_arrive : ndarray
+        Ephemeris tables of the departure and arrival bodies, see
+        porkchop_grid. The coarse seeding grid is taken from their epochs.
+    mu : float
+        Gravitational parameter (km^3/s^2)
+    objective : str, optional
+        Quantity to minimize: 'C3', 'v_inf' (arrival) or 'dv' (total)
+    branch : str, optional
+        'short' or 'long' way transfers only (default is the best of both)
+    seeds : int, optional
+        Number of local minima of the coarse grid to refine
+    coarse_step : float, optional
+        Spacing of the coarse seeding grid (days), rounded to a whole number
+        of table steps; None seeds from every epoch of the tables. The local
+        search starts from a stencil of this spacing.
+    tol : float, optional
+        Convergence tolerance on the dates (days)
+    maxiter : int, optional
+        Maximum number of iterations of the local search
+    kwargs :
+        Further keyword arguments passed to porkchop_pairs (tol is replaced
+        by lambert_tol, maxiter by lambert_maxiter, solver, revs, low_path,
+        tof_min, tof_max)
+
+    Returns:
+    dict
+        'departure' and 'arrival' Julian dates, 'tof' (days), 'branch',
+        'C3', 'v_inf' and 'dv' of the optimal transfer, whether the search
+        'converged', and the number of Lambert 'evaluations' spent
+    '''
+
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}', expected one of {OBJECTIVES}.")
+
+    if branch is not None and branch not in BRANCHES:
+        raise ValueError(f"Unknown branch '{branch}', expected one of {BRANCHES}.")
+
+    branches = [BRANCHES.index(branch)] if branch is not None else [0, 1]
+
+    # Lambert settings
+    if 'lambert_tol' in kwargs:
+        kwargs['tol'] = kwargs.pop('lambert_tol')
+    if 'lambert_maxiter' in kwargs:
+        kwargs['maxiter'] = kwargs.pop('lambert_maxiter')
+
+    et_departures = np.asarray(et_departures, dtype=float)
+    et_arrivals = np.asarray(et_arrivals, dtype=float)
+
+    # Coarse grid on every stride-th epoch of the tables
+    steps = [np.diff(et[:2]).item() if et.size > 1 else 1.0 for et in (et_departures, et_arrivals)]
+    if coarse_step is None:
+        strides = [1, 1]
+    else:
+        strides = [max(1, int(round(coarse_step / step))) for step in steps]
+    coarse_departures = slice(None, None, strides[0])
+    coarse_arrivals = slice(None, None, strides[1])
+
+    # Unsolved transfers are infinitely bad rather than clamped to a cutoff
+    grids = gt.porkchop_grid(
+        et_departures[coarse_departures],
+        np.asarray(states_depart)[coarse_departures],
+        et_arrivals[coarse_arrivals],
+        np.asarray(states_arrive)[coarse_arrivals],
+        mu,
+        np.inf,
+        **kwargs
+    )
+    coarse = _objective(grids, objective)
+
+    # Transfers solved, pruned cells excluded
+    evaluations = np.count_nonzero(~np.isnan(grids['tofs']))
+
+    bounds = np.array([[et_departures[0], et_arrivals[0]], [et_departures[-1], et_arrivals[-1]]])
+
+    def evaluate(x):
+        # Grids of both branches at departures x[..., 0] and arrivals x[..., 1]
+        nonlocal evaluations
+        x = np.clip(x.reshape(-1, 2), bounds[0], bounds[1])
+        evaluations += x.shape[0]
+        return gt.porkchop_pairs(
+            x[:, 0],
+            hermite_interpolate(et_departures, states_depart, x[:, 0]),
+            x[:, 1],
+            hermite_interpolate(et_arrivals, states_arrive, x[:, 1]),
+            mu,
+            np.inf,
+            **kwargs
+        )[0]
+
+    # Starting points and branches of the local searches
+    starts = [
+        (k, et_departures[coarse_departures][j], et_arrivals[coarse_arrivals][i])
+        for k in branches for i, j in _seeds(coarse[k], seeds)
+    ]
+
+    if not starts:
+        raise RuntimeError("optimize_transfer: No transfer was found in the ephemeris window.")
+
+    branch_of = np.array([k for k, _, _ in starts])
+    x0 = np.array([[d, a] for _, d, a in starts])
+
+    def f(x, idx):
+        values = _objective(evaluate(x), objective).reshape(2, *x.shape[:2])
+        values = values[branch_of[idx], np.arange(idx.size)]
+
+        # Dates outside the ephemeris window or the time of flight limits
+        # are infeasible
+        outside = np.any((x < bounds[0]) | (x > bounds[1]), axis=-1)
+        return np.where(outside | np.isnan(values), np.inf, values)
+
+    # Stencil of one coarse grid step around the grid minima
+    step = min(steps[0] * strides[0], steps[1] * strides[1])
+    x, fx, converged, iterations = stencilNewton(f, x0, step, tol, maxiter)
+
+    best = np.argmin(fx)
+
+    if not np.isfinite(fx[best]):
+        raise RuntimeError("optimize_transfer: No transfer was found in the ephemeris window.")
+
+    k = branch_of[best]
+    grids = evaluate(x[best])
+    C3 = np.stack([grids['C3_shorts'], grids['C3_longs']])[k, 0]
+    v_inf = np.stack([grids['v_inf_shorts'], grids['v_inf_longs']])[k, 0]
+
+    return {
+        'departure'   : x[best, 0],
+        'arrival'     : x[best, 1],
+        'tof'         : x[best, 1] - x[best, 0],
+        'branch'      : BRANCHES[k],
+        'C3'          : C3,
+        'v_inf'       : v_inf,
+        'dv'          : np.sqrt(C3) + v_inf,
+        'converged'   : bool(converged[best]),
+        'evaluations' : evaluations
+    }
@@ -9,7 +9,15 @@ import math
 G_meters = 6.67430e-11       # m**3 / kg / s**2
 G        = G_meters * 10**-9 # km**3/ kg / s**2
 
+# astronomical unit
+AU = 149597870.7 # km
+
 # planet dictionaries
+# 'elements' are the mean Keplerian elements at J2000 and 'element_rates' their
+# rates per Julian century, valid 1800-2050 (Standish, "Keplerian Elements for
+# Approximate Positions of the Major Planets", JPL): a (AU), e, I (deg),
+# mean longitude L (deg), longitude of perihelion (deg), longitude of the
+# ascending node (deg). Earth uses the Earth-Moon barycenter elements.
 
 mercury = {
 		'name'            : 'Mercury',
@@ -20,6 +28,8 @@ mercury = {
 		'sma'             : 57.91e6,   # km
 		'SOI'             : 1.1241e5, # km
 		'cmap'            : 'Wistia',
+		'elements'        : ( 0.38709927, 0.20563593, 7.00497902, 252.25032350, 77.45779628, 48.33076593 ),
+		'element_rates'   : ( 0.00000037, 0.00001906, -0.00594749, 149472.67411175, 0.16047689, -0.12534081 ),
 		'traj_color'      : 'y'
 		}
 
@@ -32,6 +42,8 @@ venus = {
 		'sma'             : 108.209e6,   # km
 		'SOI'             : 617183.2511, # km
 		'cmap'            : 'Wistia',
+		'elements'        : ( 0.72333566, 0.00677672, 3.39467605, 181.97909950, 131.60246718, 76.67984255 ),
+		'element_rates'   : ( 0.00000390, -0.00004107, -0.00078890, 58517.81538729, 0.00268329, -0.27769418 ),
 		'traj_color'      : 'y'
 		}
 
@@ -45,6 +57,8 @@ earth = {
 		'sma'             : 149.596e6, # km
 		'SOI'             : 926006.6608, # km
 		'cmap'            : 'Blues',
+		'elements'        : ( 1.00000261, 0.01671123, -0.00001531, 100.46457166, 102.93768193, 0.0 ),
+		'element_rates'   : ( 0.00000562, -0.00004392, -0.01294668, 35999.37244981, 0.32327364, 0.0 ),
 		'traj_color'      : 'b'
 		}
 
@@ -57,6 +71,8 @@ mars = {
 		'sma'             : 227.923e6, # km
 		'SOI'             : 0.578e6,   # km
 		'cmap'            : 'Reds',
+		'elements'        : ( 1.52371034, 0.09339410, 1.84969142, -4.55343205, -23.94362959, 49.55953891 ),
+		'element_rates'   : ( 0.00001847, 0.00007882, -0.00813131, 19140.30268499, 0.44441088, -0.29257343 ),
 		'traj_color'      : 'r'
 		}
 
@@ -68,6 +84,8 @@ jupiter = {
 		'radius'          : 71490.0,   # km
 		'sma'             : 778.570e6, # km
 		'SOI'             : 48.2e6,    # km
+		'elements'        : ( 5.20288700, 0.04838624, 1.30439695, 34.39644051, 14.72847983, 100.47390909 ),
+		'element_rates'   : ( -0.00011607, -0.00013253, -0.00183714, 3034.74612775, 0.21252668, 0.20469106 ),
 		'traj_color'      : 'C3'
 }
 
@@ -90,6 +108,8 @@ uranus = {
 		'radius'          : 25560,   # km
 		'sma'             : 2872e6, # km
 		'SOI'             : 5.1785e7,  # km
+		'elements'        : ( 19.18916464, 0.04725744, 0.77263783, 313.23810451, 170.95427630, 74.01692503 ),
+		'element_rates'   : ( -0.00196176, -0.00004397, -0.00242939, 428.48202785, 0.40805281, 0.04240589 ),
 		'traj_color'      : 'C3'
 }
 
@@ -101,6 +121,8 @@ neptune = {
 		'radius'          : 24760,   # km
 		'sma'             : 4495e6, # km
 		'SOI'             : 8.6589e7, # km
+		'elements'        : ( 30.06992276, 0.00859048, 1.77004347, -55.12002969, 44.96476227, 131.78422574 ),
+		'element_rates'   : ( 0.00026291, 0.00005105, 0.00035372, 218.45945325, -0.32241464, -0.00508664 ),
 		'traj_color'      : 'C3'
 }
 
@@ -111,6 +133,8 @@ pluto = {
 		'mu'              : 1.3029e21 * G,
 		'radius'          : 1188,   # km
 		'sma'             : 5.90638e9, # km
+		'elements'        : ( 39.48211675, 0.24882730, 17.14001206, 238.92903833, 224.06891629, 110.30393684 ),
+		'element_rates'   : ( -0.00031596, 0.00005170, 0.00004818, 145.20780515, -0.04062942, -0.01183482 ),
 		'traj_color'      : 'C3'
 } 
 
@@ -170,6 +194,8 @@ saturn = {
 	'mu'              : 37.931e6,
 	'sma'             : 1433.529e6,
 	'SOI'             : 54890347.727,
+	'elements'        : ( 9.53667594, 0.05386179, 2.48599187, 49.95424423, 92.59887831, 113.66242448 ),
+	'element_rates'   : ( -0.00125060, -0.00050991, 0.00193609, 1222.49362201, -0.41897216, -0.28867794 ),
 	'traj_color'      : 'C2'
 }
 
@@ -0,0 +1,167 @@
+'''
+Porkchop figure rendering
+
+The contour lines of a porkchop grid are computed once, as geometry that can
+be shared by several figures (the time of flight contours appear on both the
+C3/v_infinity and the delta-v figures), and drawn from that geometry either
+on pyplot figures or on headless Agg figures. Headless figures do not touch
+the pyplot state and can be rendered concurrently in separate processes.
+'''
+
+# Python Standard Libraries
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Third-party Libraries
+import numpy as np
+import contourpy
+from matplotlib import style
+from matplotlib.contour import ContourSet
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Matplotlib style of the figures
+STYLE = 'dark_background'
+
+
+def contour_geometry(x, y, z, levels):
+    '''
+    Contour lines of z at levels, computed with the same algorithm as
+    Axes.contour.
+
+    Parameters:
+    x, y : ndarray
+        Coordinates of the grid, shape (rows, cols)
+    z : ndarray
+        Values of the grid, NaN where undefined
+    levels : array_like
+        Contour levels
+
+    Returns:
+    tuple
+        (levels, allsegs, allkinds), the arguments of a line ContourSet
+    '''
+
+    generator = contourpy.contour_generator(
+        x, y, np.ma.masked_invalid(z),
+        name        = 'mpl2014',
+        corner_mask = True,
+        line_type   = contourpy.LineType.SeparateCode
+    )
+
+    levels = np.asarray(levels, dtype=float)
+    allsegs, allkinds = [], []
+    for level in levels:
+        segs, kinds = generator.lines(level)
+        allsegs.append(segs)
+        allkinds.append(kinds)
+
+    return levels, allsegs, allkinds
+
+def _stage(timings, name, start):
+    timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+def draw_figure(fig, ax, spec, timings=None):
+    '''
+    Draws a porkchop figure on fig and ax from a figure specification.
+
+    Parameters:
+    fig, ax :
+        Matplotlib figure and axes
+    spec : dict
+        'layers', a list of (geometry, fmt, kwargs) with geometry from
+        contour_geometry, labelled with fmt and drawn with the ContourSet
+        keyword arguments kwargs; 'xlim' and 'ylim'; optional 'legend',
+        a list of (label, line format); 'title', 'xlabel', 'ylabel' and
+        'fontsize'
+    timings : dict, optional
+        The time spent in 'plot.contour' and 'plot.clabel' is added to it
+    '''
+
+    timings = {} if timings is None else timings
+
+    start = time.perf_counter()
+    contours = []
+    for (levels, allsegs, allkinds), fmt, kwargs in spec['layers']:
+        # Layers without any line are skipped, as Axes.contour draws nothing
+        if any(len(segs) for segs in allsegs):
+            contours.append((ContourSet(ax, levels, allsegs, allkinds, **kwargs), fmt))
+    _stage(timings, 'plot.contour', start)
+
+    start = time.perf_counter()
+    for contour, fmt in contours:
+        ax.clabel(contour, fmt=fmt)
+    _stage(timings, 'plot.clabel', start)
+
+    if spec.get('legend'):
+        for _, line in spec['legend']:
+            ax.plot([0], [0], line)
+
+        ax.legend(
+            [label for label, _ in spec['legend']],
+            bbox_to_anchor = (1.005, 1.01),
+            fontsize       = 10
+        )
+
+    # Axes span the grid rather than the contour lines
+    ax.set_xlim(spec['xlim'])
+    ax.set_ylim(spec['ylim'])
+
+    ax.set_title(spec['title'], fontsize=spec['fontsize'])
+    ax.set_ylabel(spec['ylabel'], fontsize=spec['fontsize'])
+    ax.set_xlabel(spec['xlabel'], fontsize=spec['fontsize'])
+
+def render_figure(spec):
+    '''
+    Draws a figure specification (see draw_figure, with 'figsize', 'path'
+    and 'dpi') on a headless Agg figure and saves it to spec['path'].
+
+    Returns:
+    dict
+        Time spent in each plotting stage (s)
+    '''
+
+    timings = {}
+
+    with style.context(STYLE):
+        fig = Figure(figsize=spec['figsize'])
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+
+        draw_figure(fig, ax, spec, timings)
+
+        start = time.perf_counter()
+        fig.savefig(spec['path'], dpi=spec['dpi'])
+        _stage(timings, 'plot.savefig', start)
+
+    return timings
+
+def render_figures(specs, workers=None):
+    '''
+    Renders figure specifications headlessly, in up to workers processes at
+    once (None for one process per figure, up to the number of CPUs).
+
+    Returns:
+    dict
+        Time spent in each plotting stage, summed over the figures (s)
+    '''
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if not isinstance(workers, int) or workers <= 0:
+        raise ValueError("Number of 'workers' must be a positive integer.")
+
+    if workers == 1 or len(specs) <= 1:
+        results = [render_figure(spec) for spec in specs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(specs))) as executor:
+            results = list(executor.map(render_figure, specs))
+
+    timings = {}
+    for result in results:
+        for name, value in result.items():
+            timings[name] = timings.get(name, 0.0) + value
+
+    return timings
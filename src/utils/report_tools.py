@@ -0,0 +1,136 @@
+'''
+Run instrumentation
+
+Wall time of the stages of a porkchop run, and statistics of the Lambert
+solver over the grid: histograms of the iteration counts and the number of
+cells that failed to bracket z, failed to converge, or were clamped to the
+cutoff. The report is written as JSON.
+'''
+
+# Python Standard Libraries
+import json
+import time
+from contextlib import contextmanager
+
+# Third-party Libraries
+import numpy as np
+
+# Porkchop-Plot-Generator Libraries
+from utils.numerical_tools import OUTCOMES
+
+# Transfer branches, in the order of the solver statistics
+BRANCHES = ('short', 'long')
+
+
+@contextmanager
+def stage(timings, name):
+    '''
+    Adds the wall time of the enclosed block to timings[name] (s). Does
+    nothing if timings is None.
+    '''
+
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+def iteration_histogram(iterations, bins=50):
+    '''
+    Histogram of iteration counts with at most bins integer-aligned bins.
+
+    Returns:
+    dict
+        'edges' of the bins, each bin covering [edges[k], edges[k + 1]), and
+        their 'counts'
+    '''
+
+    iterations = np.asarray(iterations).ravel()
+
+    if not iterations.size:
+        return {'edges': [], 'counts': []}
+
+    lo, hi = int(iterations.min()), int(iterations.max())
+    edges = np.unique(np.linspace(lo, hi + 1, min(hi - lo + 1, bins) + 1).astype(int))
+    counts, _ = np.histogram(iterations, edges)
+
+    return {'edges': edges.tolist(), 'counts': counts.tolist()}
+
+def solver_report(grids, stats, cutoff_v):
+    '''
+    Statistics of the Lambert solver over the feasible cells of a grid, per
+    branch.
+
+    Parameters:
+    grids, stats : dict
+        Output of porkchop_grid with return_stats=True. Cells outside the
+        'evaluated' mask of adaptive grids are left out.
+    cutoff_v : float
+        v_infinity cutoff of the grid (km/s)
+
+    Returns:
+    dict
+        For each branch, the number of 'cells' solved, the histogram of
+        their 'iterations' (see iteration_histogram) with its 'mean' and
+        'max', the count of each outcome of numerical_tools.OUTCOMES, the
+        number of converged cells 'clamped' to the cutoff, and with
+        continuation the number of cells solved from the z of their
+        neighbour ('warm') and their mean iterations ('warm_mean')
+    '''
+
+    cells = ~np.isnan(grids['tofs'])
+    if 'evaluated' in stats:
+        cells &= stats['evaluated']
+
+    report = {}
+
+    for k, branch in enumerate(BRANCHES):
+        iterations = stats['iterations'][k][cells]
+        converged = stats['converged'][k][cells]
+
+        # Solved transfers beyond the cutoff are stored at the cutoff
+        clamped = converged & (
+            (grids['C3_' + branch + 's'][cells] >= np.float32(cutoff_v ** 2)) |
+            (grids['v_inf_' + branch + 's'][cells] >= np.float32(cutoff_v))
+        )
+
+        report[branch] = {
+            'cells'      : int(cells.sum()),
+            'iterations' : dict(
+                iteration_histogram(iterations),
+                mean = float(iterations.mean()) if iterations.size else None,
+                max  = int(iterations.max()) if iterations.size else None
+            ),
+            'clamped'    : int(clamped.sum())
+        }
+
+        if 'warm' in stats:
+            warm = stats['warm'][k][cells]
+            report[branch].update(
+                warm      = int(warm.sum()),
+                warm_mean = float(iterations[warm].mean()) if warm.any() else None
+            )
+
+        outcomes = stats['outcomes'][k][cells]
+        report[branch].update({name: int(np.sum(outcomes == code)) for code, name in enumerate(OUTCOMES)})
+
+    return report
+
+def write_report(path, report):
+    '''
+    Writes a report dictionary as JSON, converting NumPy scalars and arrays.
+    '''
+
+    def default(value):
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2, default=default)
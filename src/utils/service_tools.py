@@ -0,0 +1,228 @@
+'''
+Service building blocks
+
+A size-bounded in-memory LRU cache, coalescing of concurrent identical
+computations on an asyncio event loop, and the minimal HTTP/1.1 request
+parsing and response formatting of the porkchop service (one request per
+connection, no external web framework).
+'''
+
+# Python Standard Libraries
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qsl
+
+# Third-party Libraries
+import numpy as np
+
+# Largest request head and body accepted (bytes)
+MAX_HEAD = 64 * 1024
+MAX_BODY = 1024 ** 2
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error'
+}
+
+
+def nbytes(value):
+    '''
+    Approximate memory held by the arrays and bytes of a value (bytes)
+    '''
+
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes(item) for item in value)
+    return 0
+
+def request_key(settings):
+    '''
+    Hexadecimal SHA-256 digest of JSON-serializable settings
+    '''
+
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()
+
+class LRUCache:
+    '''
+    Least recently used cache bounded by the total size of its values (see
+    nbytes). Values larger than the bound are not stored.
+    '''
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key):
+        '''
+        Returns the value of key, or None on a miss
+        '''
+
+        if key not in self._items:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._items.move_to_end(key)
+        return self._items[key][0]
+
+    def put(self, key, value):
+        '''
+        Stores value under key, evicting the least recently used entries
+        until the cache fits its bound
+        '''
+
+        size = nbytes(value)
+
+        if key in self._items:
+            self.size -= self._items.pop(key)[1]
+
+        if size > self.max_bytes:
+            return
+
+        self._items[key] = (value, size)
+        self.size += size
+
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._items.popitem(last=False)
+            self.size -= evicted
+
+    def stats(self):
+        return {
+            'entries'   : len(self._items),
+            'bytes'     : self.size,
+            'max_bytes' : self.max_bytes,
+            'hits'      : self.hits,
+            'misses'    : self.misses
+        }
+
+class Coalescer:
+    '''
+    Runs at most one computation per key at a time: callers requesting a key
+    whose computation is in flight wait for that computation instead of
+    starting another one.
+    '''
+
+    def __init__(self):
+        self.coalesced = 0
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._pending)
+
+    async def run(self, key, factory):
+        '''
+        Returns the result of the coroutine factory(), shared by all
+        concurrent callers with the same key. Exceptions are raised in every
+        caller.
+        '''
+
+        task = self._pending.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        # A caller that disconnects does not cancel the shared computation
+        return await asyncio.shield(task)
+
+class HTTPError(Exception):
+    '''
+    Error answered with an HTTP status and a JSON message
+    '''
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+async def read_request(reader):
+    '''
+    Reads an HTTP/1.1 request.
+
+    Returns:
+    method, path, query, body
+        query is a dict of the URL parameters (the last value of repeated
+        names), body the raw request body
+
+    Raises:
+    HTTPError
+        If the request is malformed or too large
+    '''
+
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.LimitOverrunError as err:
+        raise HTTPError(413, 'Request head too large.') from err
+    except asyncio.IncompleteReadError as err:
+        raise HTTPError(400, 'Incomplete request.') from err
+
+    if len(head) > MAX_HEAD:
+        raise HTTPError(413, 'Request head too large.')
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, _ = lines[0].split(' ')
+    except ValueError as err:
+        raise HTTPError(400, f"Malformed request line '{lines[0]}'.") from err
+
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError as err:
+        raise HTTPError(400, 'Malformed Content-Length.') from err
+
+    if length > MAX_BODY:
+        raise HTTPError(413, 'Request body too large.')
+
+    try:
+        body = await reader.readexactly(length) if length else b''
+    except asyncio.IncompleteReadError as err:
+        raise HTTPError(400, 'Incomplete request body.') from err
+
+    url = urlsplit(target)
+    return method.upper(), url.path, dict(parse_qsl(url.query)), body
+
+def response(status, body, content_type='application/json', headers=None):
+    '''
+    Formats an HTTP/1.1 response closing the connection
+    '''
+
+    if not isinstance(body, bytes):
+        body = json.dumps(body).encode()
+
+    head = [
+        f'HTTP/1.1 {status} {REASONS.get(status, "")}',
+        f'Content-Type: {content_type}',
+        f'Content-Length: {len(body)}',
+        'Connection: close'
+    ]
+    head += [f'{name}: {value}' for name, value in (headers or {}).items()]
+
+    return ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
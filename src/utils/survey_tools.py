@@ -0,0 +1,209 @@
+'''
+Mission surveys
+
+Computes porkchop grids for many (departure body, arrival body, window) jobs
+from ephemeris tables that are loaded once per body and shared by every job,
+and summarizes each grid by its best C3, arrival v_infinity and total
+delta-v.
+'''
+
+# Python Standard Libraries
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Third-party Libraries
+import numpy as np
+
+# Porkchop-Plot-Generator Libraries
+from utils import grid_tools as gt
+from utils.interpolation_tools import hermite_interpolate
+from utils.time_tools import EPOCH_TOL, jd_to_date, requested_epochs
+
+# Quantities summarized for every job
+SUMMARY_KEYS = ('C3', 'v_inf', 'dv')
+
+
+def window_states(julianDates, states, epochs):
+    '''
+    States of a body at epochs, taken from the rows of its ephemeris table
+    when every epoch is in the table and interpolated otherwise.
+    '''
+
+    idx = np.clip(np.searchsorted(julianDates, epochs), 0, julianDates.size - 1)
+    idx_left = np.clip(idx - 1, 0, julianDates.size - 1)
+    idx = np.where(np.abs(julianDates[idx_left] - epochs) < np.abs(julianDates[idx] - epochs), idx_left, idx)
+
+    if np.all(np.abs(julianDates[idx] - epochs) <= EPOCH_TOL):
+        return states[idx]
+
+    return hermite_interpolate(julianDates, states, epochs)
+
+def grid_minima(grids, et_departures, et_arrivals):
+    '''
+    Best C3, arrival v_infinity and total delta-v of a porkchop grid over
+    both branches.
+
+    Returns:
+    dict
+        For each of SUMMARY_KEYS, a dict with the 'value', 'departure' and
+        'arrival' Julian dates, 'tof' (days) and 'branch' of the minimum, or
+        None if no cell was solved
+    '''
+
+    quantities = {
+        'C3'    : (grids['C3_shorts'], grids['C3_longs']),
+        'v_inf' : (grids['v_inf_shorts'], grids['v_inf_longs']),
+        'dv'    : (
+            grids['v_inf_shorts'] + np.sqrt(grids['C3_shorts']),
+            grids['v_inf_longs'] + np.sqrt(grids['C3_longs'])
+        )
+    }
+
+    minima = {}
+
+    for key, branches in quantities.items():
+        values = np.stack(branches)
+
+        if np.all(np.isnan(values)):
+            minima[key] = None
+            continue
+
+        k, i, j = np.unravel_index(np.nanargmin(values), values.shape)
+        minima[key] = {
+            'value'     : float(values[k, i, j]),
+            'departure' : float(et_departures[j]),
+            'arrival'   : float(et_arrivals[i]),
+            'tof'       : float(et_arrivals[i] - et_departures[j]),
+            'branch'    : ('short', 'long')[k]
+        }
+
+    return minima
+
+def run_job(job, tables, mu, cutoff_v, keep_grids=False, **kwargs):
+    '''
+    Computes the porkchop grid of one survey job.
+
+    Parameters:
+    job : dict
+        'planet0', 'planet1', 'departure0', 'departure1', 'arrival0',
+        'arrival1' and 'step' (grid step in days) of the job
+    tables : dict
+        Ephemeris tables (julianDates, states) by body ID
+    mu, cutoff_v :
+        See porkchop_grid
+    keep_grids : bool, optional
+        Also return the grids and their epochs
+    kwargs :
+        Further keyword arguments passed to porkchop_grid
+
+    Returns:
+    dict
+        The 'job', its 'summary' (see grid_minima) and, if keep_grids is True,
+        its 'grids', 'et_departures' and 'et_arrivals'
+    '''
+
+    et_departures = requested_epochs(job['departure0'], job['departure1'], job['step'])
+    et_arrivals = requested_epochs(job['arrival0'], job['arrival1'], job['step'])
+
+    grids = gt.porkchop_grid(
+        et_departures,
+        window_states(*tables[job['planet0']], et_departures),
+        et_arrivals,
+        window_states(*tables[job['planet1']], et_arrivals),
+        mu,
+        cutoff_v,
+        **kwargs
+    )
+
+    result = {'job': job, 'summary': grid_minima(grids, et_departures, et_arrivals)}
+
+    if keep_grids:
+        result.update(grids=grids, et_departures=et_departures, et_arrivals=et_arrivals)
+
+    return result
+
+# Ephemeris tables and settings shared by the survey worker processes
+_worker_data = {}
+
+def _init_worker(tables, kwargs):
+    _worker_data.update(tables=tables, kwargs=kwargs)
+
+def _run_job(job):
+    return run_job(job, _worker_data['tables'], **_worker_data['kwargs'])
+
+def run_survey(jobs, tables, mu, cutoff_v, workers=1, keep_grids=False, **kwargs):
+    '''
+    Runs many survey jobs over shared ephemeris tables. With several workers
+    the tables are sent to each worker process once and the jobs are
+    scheduled across the pool.
+
+    Parameters:
+    jobs : list of dict
+        Jobs, see run_job
+    tables : dict
+        Ephemeris tables (julianDates, states) by body ID, covering every
+        window of the jobs
+    mu, cutoff_v :
+        See porkchop_grid
+    workers : int, optional
+        Number of worker processes (None for all CPUs)
+    keep_grids : bool, optional
+        Also return the grids of every job
+    kwargs :
+        Further keyword arguments passed to porkchop_grid
+
+    Returns:
+    list of dict
+        Results of run_job, in the order of jobs
+    '''
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if not isinstance(workers, int) or workers <= 0:
+        raise ValueError("Number of 'workers' must be a positive integer.")
+
+    kwargs = dict(kwargs, mu=mu, cutoff_v=cutoff_v, keep_grids=keep_grids)
+
+    if workers == 1 or len(jobs) <= 1:
+        return [run_job(job, tables, **kwargs) for job in jobs]
+
+    with ProcessPoolExecutor(
+        max_workers = min(workers, len(jobs)),
+        initializer = _init_worker,
+        initargs    = (tables, kwargs)
+    ) as executor:
+        return list(executor.map(_run_job, jobs))
+
+def format_summary(results):
+    '''
+    Formats the summaries of survey results as a text table.
+    '''
+
+    header = '%-16s %-23s %-23s' % ('Job', 'Departure window', 'Arrival window')
+    for key in SUMMARY_KEYS:
+        header += ' %9s %-21s' % (key, 'departure / tof')
+
+    lines = [header, '-' * len(header)]
+
+    for result in results:
+        job = result['job']
+        line = '%-16s %-23s %-23s' % (
+            '%s -> %s' % (job['planet0'], job['planet1']),
+            '%s / %s' % (job['departure0'], job['departure1']),
+            '%s / %s' % (job['arrival0'], job['arrival1'])
+        )
+
+        for key in SUMMARY_KEYS:
+            best = result['summary'][key]
+            if best is None:
+                line += ' %9s %-21s' % ('-', '')
+            else:
+                line += ' %9.3f %-21s' % (
+                    best['value'],
+                    '%s / %.0f d' % (jd_to_date(best['departure'])[:10], best['tof'])
+                )
+
+        lines.append(line)
+
+    return '\n'.join(lines)
@@ -0,0 +1,58 @@
+'''
+Time Tools
+'''
+
+# Python Standard Libraries
+import datetime
+
+# Third-party Libraries
+import numpy as np
+
+# Julian date of 2000-01-01 00:00
+JD_J2000_MIDNIGHT = 2451544.5
+
+# Epochs closer than this are the same epoch (days)
+EPOCH_TOL = 1e-6
+
+
+def date_to_jd(date):
+    '''
+    Converts a 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM[:SS]' date to a Julian date.
+    '''
+
+    for fmt in ('%Y-%m-%d', '%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S'):
+        try:
+            dt = datetime.datetime.strptime(date, fmt)
+            break
+        except ValueError:
+            continue
+    else:
+        raise ValueError(f"Unrecognized date '{date}'.")
+
+    delta = dt - datetime.datetime(2000, 1, 1)
+    return JD_J2000_MIDNIGHT + delta.total_seconds() / 86400.0
+
+def jd_to_date(jd):
+    '''
+    Converts a Julian date to a 'YYYY-MM-DD' date, or 'YYYY-MM-DD HH:MM:SS'
+    away from midnight, accepted by Horizons.
+    '''
+
+    seconds = round((float(jd) - JD_J2000_MIDNIGHT) * 86400.0)
+    dt = datetime.datetime(2000, 1, 1) + datetime.timedelta(seconds=seconds)
+
+    if dt.time() == datetime.time(0):
+        return dt.strftime('%Y-%m-%d')
+
+    return dt.strftime('%Y-%m-%d %H:%M:%S')
+
+def requested_epochs(start, stop, step):
+    '''
+    Epochs of a Horizons table from start to stop (inclusive) every step days.
+    '''
+
+    jd0 = date_to_jd(start)
+    jd1 = date_to_jd(stop)
+    n = int(np.floor((jd1 - jd0) / step + EPOCH_TOL)) + 1
+
+    return jd0 + step * np.arange(n)
@@ -0,0 +1,186 @@
+'''
+Launch window detection
+
+Finds the launch opportunities between two bodies over a long span. Synodic
+periods and Hohmann times of flight estimated from the semi-major axes in
+planetary_data set the resolution of a cheap coarse pass over the whole span,
+whose minima are expanded into departure and arrival windows for
+full-resolution grids.
+'''
+
+# Third-party Libraries
+import numpy as np
+
+# Porkchop-Plot-Generator Libraries
+from utils import grid_tools as gt
+from utils.analytic_ephemeris import find_body
+from utils.survey_tools import window_states
+from utils.time_tools import jd_to_date
+
+
+def orbital_period(body, mu):
+    '''
+    Period of a circular orbit at the semi-major axis of a body (s).
+    '''
+
+    return 2 * np.pi * np.sqrt(body['sma'] ** 3 / mu)
+
+def synodic_period(body0, body1, mu):
+    '''
+    Time between launch opportunities from body0 to body1 (days).
+    '''
+
+    n0 = 1 / orbital_period(body0, mu)
+    n1 = 1 / orbital_period(body1, mu)
+
+    return 1 / abs(n0 - n1) / (3600 * 24)
+
+def hohmann_tof(body0, body1, mu):
+    '''
+    Time of flight of the Hohmann transfer between the circular orbits of
+    body0 and body1 (days).
+    '''
+
+    a = (body0['sma'] + body1['sma']) / 2
+
+    return np.pi * np.sqrt(a ** 3 / mu) / (3600 * 24)
+
+def coarse_scan(et_span, tables, planet0, planet1, mu, step=None, tof_range=None, **kwargs):
+    '''
+    Cheap pass over a long span: the best total delta-v of every coarse
+    departure date over a range of times of flight.
+
+    Parameters:
+    et_span : tuple
+        First and last departure Julian dates
+    tables : dict
+        Ephemeris tables (julianDates, states) by body ID, the arrival body
+        covering the span plus the longest time of flight
+    planet0, planet1 : int
+        Horizons IDs of the departure and arrival bodies
+    mu : float
+        Gravitational parameter (km^3/s^2)
+    step : float, optional
+        Departure step (days), default a sixtieth of the synodic period
+    tof_range : tuple, optional
+        Shortest and longest time of flight (days), default 0.4 to 1.6 times
+        the Hohmann time of flight
+    kwargs :
+        Further keyword arguments passed to porkchop_pairs
+
+    Returns:
+    et_departures : ndarray
+        Coarse departure dates
+    tofs : ndarray
+        Coarse times of flight (days)
+    dv : ndarray
+        Best total delta-v over both branches, shape (departures, tofs)
+    '''
+
+    body0, body1 = find_body(planet0), find_body(planet1)
+    t_hohmann = hohmann_tof(body0, body1, mu)
+
+    if step is None:
+        step = synodic_period(body0, body1, mu) / 60
+
+    if tof_range is None:
+        tof_range = (0.4 * t_hohmann, 1.6 * t_hohmann)
+
+    et_departures = np.arange(et_span[0], et_span[1] + 1e-9, step)
+    tofs = np.linspace(tof_range[0], tof_range[1], 40)
+
+    # Every (departure, time of flight) pair at once
+    et_d = np.repeat(et_departures, tofs.size)
+    et_a = et_d + np.tile(tofs, et_departures.size)
+
+    # Arrivals past the end of the arrival table are skipped
+    inside = et_a <= tables[planet1][0][-1]
+    dv = np.full(et_d.shape, np.nan)
+
+    grids, _ = gt.porkchop_pairs(
+        et_d[inside],
+        window_states(*tables[planet0], et_d[inside]),
+        et_a[inside],
+        window_states(*tables[planet1], et_a[inside]),
+        mu,
+        np.inf,
+        **kwargs
+    )
+
+    dv[inside] = np.fmin(
+        grids['v_inf_shorts'] + np.sqrt(grids['C3_shorts']),
+        grids['v_inf_longs'] + np.sqrt(grids['C3_longs'])
+    )
+
+    return et_departures, tofs, dv.reshape(et_departures.size, tofs.size)
+
+def detect_windows(et_departures, tofs, dv, synodic, margin=1.0, dv_max=None, pad=2):
+    '''
+    Launch windows from a coarse scan: one per local minimum of the best
+    total delta-v over departure dates, at least half a synodic period
+    apart, covering the cells within margin of that minimum.
+
+    Parameters:
+    et_departures, tofs, dv :
+        Output of coarse_scan
+    synodic : float
+        Synodic period (days)
+    margin : float, optional
+        Delta-v above the window minimum still inside the window (km/s)
+    dv_max : float, optional
+        Windows whose minimum exceeds this are dropped (km/s)
+    pad : int, optional
+        Coarse steps added on every side of the windows
+
+    Returns:
+    list of dict
+        'departure0', 'departure1', 'arrival0' and 'arrival1' dates and the
+        coarse 'dv' minimum of every window, in chronological order
+    '''
+
+    # Best delta-v of every departure, infinite where nothing was solved
+    dv = np.where(np.isnan(dv), np.inf, dv)
+    best = dv.min(axis=1)
+
+    # Local minima of the departure curve, best first
+    padded = np.pad(best, 1, constant_values=np.inf)
+    minima = np.flatnonzero(np.isfinite(best) & (best <= padded[:-2]) & (best <= padded[2:]))
+    minima = minima[np.argsort(best[minima])]
+
+    step = et_departures[1] - et_departures[0] if et_departures.size > 1 else 1.0
+    tof_step = tofs[1] - tofs[0] if tofs.size > 1 else 1.0
+
+    accepted = []
+    for i in minima:
+        if dv_max is not None and best[i] > dv_max:
+            continue
+        if all(abs(et_departures[i] - et_departures[j]) >= synodic / 2 for j in accepted):
+            accepted.append(i)
+
+    windows = []
+    for i in sorted(accepted):
+        # Contiguous departures within margin of the minimum
+        lo = hi = i
+        while lo > 0 and best[lo - 1] <= best[i] + margin:
+            lo -= 1
+        while hi < best.size - 1 and best[hi + 1] <= best[i] + margin:
+            hi += 1
+
+        cells = dv[lo:hi + 1] <= best[i] + margin
+        tof_cells = np.flatnonzero(np.any(cells, axis=0))
+
+        # Padded, kept inside the scan, and widened to whole days
+        departure0 = max(et_departures[lo] - pad * step, et_departures[0])
+        departure1 = min(et_departures[hi] + pad * step, et_departures[-1])
+        arrival0 = departure0 + max(tofs[tof_cells[0]] - pad * tof_step, tofs[0])
+        arrival1 = departure1 + min(tofs[tof_cells[-1]] + pad * tof_step, tofs[-1])
+
+        windows.append({
+            'departure0' : jd_to_date(np.floor(departure0 - 0.5) + 0.5),
+            'departure1' : jd_to_date(np.ceil(departure1 - 0.5) + 0.5),
+            'arrival0'   : jd_to_date(np.floor(arrival0 - 0.5) + 0.5),
+            'arrival1'   : jd_to_date(np.ceil(arrival1 - 0.5) + 0.5),
+            'dv'         : float(best[i])
+        })
+
+    return windows
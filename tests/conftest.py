@@ -0,0 +1,89 @@
+'''
+Shared test fixtures
+
+Tests import the modules of src/ the way main.py does, and read the
+committed Earth and Mars fixture ephemerides of the benchmarks, so no
+network access is needed.
+'''
+
+# Python Standard Libraries
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Third-party Libraries
+import numpy as np
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'fixtures')
+
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+# Porkchop-Plot-Generator Libraries
+from utils import ephemeris_query as eq
+from utils import grid_tools      as gt
+from utils import planetary_data  as pd
+
+
+@pytest.fixture(scope='session')
+def earth_mars():
+    '''
+    Small Earth to Mars grid of the 2020 opportunity: every 20th departure
+    and every 30th arrival of the fixtures, so that some arrivals precede
+    their departure.
+
+    Returns:
+    et_departures, states_depart, et_arrivals, states_arrive, mu
+    '''
+
+    et_departures, states_depart = eq.stateReader(os.path.join(FIXTURE_DIR, '399_2020-06-01_2021-03-01.txt'),
+                                                  sidecar=False)
+    et_arrivals, states_arrive = eq.stateReader(os.path.join(FIXTURE_DIR, '499_2020-11-01_2022-03-01.txt'),
+                                                sidecar=False)
+
+    return (et_departures[::20], np.array(states_depart[::20]), et_arrivals[::30], np.array(states_arrive[::30]),
+            pd.sun['mu'])
+
+@pytest.fixture(scope='session')
+def earth_mars_pairs(earth_mars):
+    '''
+    Position vectors and times of flight of every (arrival, departure) cell
+    of the earth_mars grid.
+
+    Returns:
+    R1 : ndarray
+        Departure positions (km), shape (1, nd, 3)
+    R2 : ndarray
+        Arrival positions (km), shape (na, 1, 3)
+    dt : ndarray
+        Times of flight (s), shape (na, nd)
+    mu : float
+    '''
+
+    et_departures, states_depart, et_arrivals, states_arrive, mu = earth_mars
+    dt = (et_arrivals[:, None] - et_departures[None, :]) * 86400.0
+
+    return states_depart[None, :, :3], states_arrive[:, None, :3], dt, mu
+
+class CountingExecutor(ThreadPoolExecutor):
+    '''
+    Thread pool standing in for the process pool, counting the chunks
+    submitted so far.
+    '''
+
+    submitted = 0
+
+    def submit(self, *args, **kwargs):
+        type(self).submitted += 1
+        return super().submit(*args, **kwargs)
+
+@pytest.fixture
+def counting_executor(monkeypatch):
+    '''
+    Replaces the process pool of grid_tools by a CountingExecutor.
+    '''
+
+    executor = type('Executor', (CountingExecutor,), {'submitted': 0})
+    monkeypatch.setattr(gt, 'ProcessPoolExecutor', executor)
+    return executor
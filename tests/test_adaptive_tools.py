@@ -0,0 +1,59 @@
+'''
+Tests of the adaptive porkchop grid
+'''
+
+# Third-party Libraries
+import numpy as np
+
+# Porkchop-Plot-Generator Libraries
+from utils import adaptive_tools as at
+from utils import grid_tools     as gt
+
+# Grid values interpolated between tile corners
+VALUES = ('C3_shorts', 'C3_longs', 'v_inf_shorts', 'v_inf_longs')
+
+
+def test_refining_everywhere_gives_the_full_grid(earth_mars):
+    et_departures, states_depart, et_arrivals, states_arrive, mu = earth_mars
+
+    full = gt.porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, 50.0)
+    grids, stats = at.adaptive_porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, 50.0,
+                                             coarse=4, dv_max=np.inf, return_stats=True)
+
+    # Tiles with every corner pruned are pruned throughout
+    assert np.all(stats['evaluated'] | np.isnan(full['tofs']))
+    for key in gt.GRID_KEYS:
+        assert grids[key].dtype == np.float32
+        np.testing.assert_array_equal(grids[key], full[key])
+
+def test_refined_cells_match_and_filled_cells_stay_inside_their_tile(earth_mars):
+    et_departures, states_depart, et_arrivals, states_arrive, mu = earth_mars
+    coarse = 4
+
+    full = gt.porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, 50.0)
+    grids, stats = at.adaptive_porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, 50.0,
+                                             coarse=coarse, dv_max=12.0, jump=None, return_stats=True)
+
+    evaluated = stats['evaluated']
+    feasible = ~np.isnan(full['tofs'])
+    filled = feasible & ~evaluated
+    assert evaluated.any() and filled.any()
+
+    # Pruned cells are NaN, solved cells are those of the full grid
+    for key in gt.GRID_KEYS:
+        np.testing.assert_array_equal(np.isnan(grids[key]), ~feasible)
+        np.testing.assert_array_equal(grids[key][evaluated], full[key][evaluated])
+
+    # Bilinear values lie between the solved corners of their tile, which
+    # are at most coarse cells away
+    for i, j in zip(*np.nonzero(filled)):
+        rows = slice(max(i - coarse, 0), i + coarse + 1)
+        cols = slice(max(j - coarse, 0), j + coarse + 1)
+        corners = evaluated[rows, cols] & feasible[rows, cols]
+        for key in VALUES:
+            around = grids[key][rows, cols][corners]
+            assert around.min() - 1e-3 <= grids[key][i, j] <= around.max() + 1e-3
+
+    # Low delta-v regions were refined down to solved cells
+    dv = np.fmin(np.sqrt(full['C3_shorts']) + full['v_inf_shorts'], np.sqrt(full['C3_longs']) + full['v_inf_longs'])
+    assert np.all(evaluated[dv < 8.0])
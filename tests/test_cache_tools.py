@@ -0,0 +1,94 @@
+'''
+Tests of the persistent grid cache
+'''
+
+# Python Standard Libraries
+import os
+
+# Third-party Libraries
+import numpy as np
+import pytest
+
+# Porkchop-Plot-Generator Libraries
+import porkchop
+from utils import cache_tools as ct
+
+
+@pytest.fixture
+def compute(earth_mars, tmp_path):
+    '''
+    Computes the earth_mars grid through porkchop._compute_grids with a
+    cache under tmp_path.
+
+    Returns:
+    callable
+        compute(**config) -> ( grids, cached )
+    '''
+
+    ephemerides = earth_mars[:4]
+
+    def compute(**config):
+        _config = porkchop._merge_config({'mu': earth_mars[4], **config})
+        _, _, grids, _, cached = porkchop._compute_grids(_config, str(tmp_path), ephemerides)
+        return grids, cached
+
+    return compute
+
+def test_hit_returns_the_computed_grid(compute):
+    grids, cached = compute()
+    assert not cached
+
+    hit, cached = compute()
+    assert cached
+    for key in grids:
+        np.testing.assert_array_equal(hit[key], grids[key])
+
+@pytest.mark.parametrize('setting', [{'solver': 'safeguarded'}, {'solver': 'izzo', 'revs': 1}, {'tof_max': 300},
+                                     {'cutoff_v': 10.0}])
+def test_settings_changing_the_grid_miss(compute, setting):
+    compute()
+
+    _, cached = compute(**setting)
+    assert not cached
+
+    _, cached = compute(**setting)
+    assert cached
+
+def test_settings_not_changing_the_grid_hit(compute):
+    compute()
+
+    _, cached = compute(workers=2, chunk_size=3, title='Mars')
+    assert cached
+
+def test_format_change_misses(compute, monkeypatch):
+    compute()
+
+    monkeypatch.setattr(ct, 'FORMAT', ct.FORMAT + 1)
+    _, cached = compute()
+    assert not cached
+
+def test_lru_eviction_by_mtime(tmp_path):
+    cache_dir = str(tmp_path)
+    arrays = {'values': np.zeros(1000)}
+
+    for i, key in enumerate(('a', 'b', 'c')):
+        ct.save_grid(cache_dir, key, arrays)
+        os.utime(os.path.join(cache_dir, f'{key}.npz'), (1000 + i, 1000 + i))
+    size = os.path.getsize(os.path.join(cache_dir, 'a.npz'))
+
+    # Reading 'a' makes 'b' the least recently used entry
+    assert ct.load_grid(cache_dir, 'a') is not None
+
+    ct.save_grid(cache_dir, 'd', arrays, max_bytes=3 * size)
+    assert sorted(os.listdir(cache_dir)) == ['a.npz', 'c.npz', 'd.npz']
+
+    # The entry just written is kept even when it alone exceeds max_bytes
+    ct.save_grid(cache_dir, 'e', arrays, max_bytes=size // 2)
+    assert os.listdir(cache_dir) == ['e.npz']
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    with open(tmp_path / 'bad.npz', 'wb') as file:
+        file.write(b'not an npz archive')
+
+    assert ct.load_grid(str(tmp_path), 'bad') is None
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,212 @@
+'''
+Tests of the Horizons fetch layer, against a local stand-in server, and of
+the table parser
+'''
+
+# Python Standard Libraries
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Third-party Libraries
+import numpy as np
+import pytest
+
+# Porkchop-Plot-Generator Libraries
+from conftest import FIXTURE_DIR
+from utils import ephemeris_query as eq
+from utils.time_tools import date_to_jd
+
+# Canned Horizons response: header, rows of the fixture, footer
+with open(os.path.join(FIXTURE_DIR, '399_2020-06-01_2021-03-01.txt')) as file:
+    FIXTURE = file.read()
+
+HEAD = FIXTURE[:FIXTURE.index('$$SOE')] + '$$SOE\n'
+ROWS = FIXTURE[len(HEAD):FIXTURE.index('$$EOE')].splitlines(keepends=True)
+TAIL = FIXTURE[FIXTURE.index('$$EOE'):]
+
+ERROR_BODY = 'API VERSION: 1.2\n\nNo ephemeris for target "Mars" prior to A.D. 1600-JAN-01\n'
+
+
+class HorizonsStub(BaseHTTPRequestHandler):
+    '''
+    Serves the fixture rows between START_TIME and STOP_TIME, after
+    answering the first `failures` requests with a 503.
+    '''
+
+    failures = 0
+    error = False
+    queries = []
+
+    def do_GET(self):
+        params = {key: value[0].strip("'") for key, value in parse_qs(urlparse(self.path).query).items()}
+        type(self).queries.append(params)
+
+        if type(self).failures > 0:
+            type(self).failures -= 1
+            self._reply(503, 'Service Unavailable')
+        elif self.error:
+            self._reply(200, ERROR_BODY)
+        else:
+            first, last = date_to_jd(params['START_TIME']), date_to_jd(params['STOP_TIME'])
+            rows = [row for row in ROWS if first - 1e-6 <= float(row.split(',')[0]) <= last + 1e-6]
+            self._reply(200, HEAD + ''.join(rows) + TAIL)
+
+    def _reply(self, status, text):
+        body = text.encode()
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def horizons():
+    '''
+    Stand-in Horizons server on a free local port, reset for every test.
+
+    Returns:
+    handler : type
+        HorizonsStub, whose attributes configure and record the requests
+    base_url : str
+    '''
+
+    pytest.importorskip('requests')
+
+    handler = type('Handler', (HorizonsStub,), {'failures': 0, 'error': False, 'queries': []})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield handler, f'http://127.0.0.1:{server.server_port}/api/horizons.api'
+
+    server.shutdown()
+    server.server_close()
+
+def test_fetch_retries_transient_failures(horizons):
+    handler, base_url = horizons
+    handler.failures = 1
+
+    text = eq.fetch(eq.generate_url('399', '2020-07-01', '2020-07-10', 1, base_url), backoff=0.01)
+
+    assert len(handler.queries) == 2
+    assert text.count('\n', text.index('$$SOE'), text.index('$$EOE')) == 11
+
+def test_fetch_gives_up_after_retries(horizons):
+    handler, base_url = horizons
+    handler.failures = 10
+
+    with pytest.raises(eq.HorizonsError, match='503'):
+        eq.fetch(eq.generate_url('399', '2020-07-01', '2020-07-10', 1, base_url), retries=2, backoff=0.01)
+
+    assert len(handler.queries) == 3
+
+def test_fetch_raises_on_error_body(horizons):
+    handler, base_url = horizons
+    handler.error = True
+
+    with pytest.raises(eq.HorizonsError, match='no ephemeris table'):
+        eq.fetch(eq.generate_url('499', '1500-01-01', '1500-02-01', 1, base_url), backoff=0.01)
+
+    # Bad queries are not retried
+    assert len(handler.queries) == 1
+
+def test_chunked_fetch_stitches_without_duplicates(horizons, tmp_path):
+    handler, base_url = horizons
+    chunked = str(tmp_path / 'chunked.txt')
+    whole = str(tmp_path / 'whole.txt')
+
+    eq.fetch_ephemerides(
+        [('399', '2020-07-01', '2020-09-15', 1, chunked)],
+        chunk_days  = 20,
+        base_url    = base_url,
+        backoff     = 0.01
+    )
+    assert len(handler.queries) == 4
+
+    eq.fetch_ephemerides([('399', '2020-07-01', '2020-09-15', 1, whole)], chunk_days=None, base_url=base_url)
+
+    et_chunked, states_chunked = eq.stateReader(chunked, sidecar=False)
+    et_whole, states_whole = eq.stateReader(whole, sidecar=False)
+
+    assert et_chunked.size == 77
+    assert np.all(np.diff(et_chunked) > 0)
+    np.testing.assert_array_equal(et_chunked, et_whole)
+    np.testing.assert_array_equal(states_chunked, states_whole)
+
+def test_concurrent_fetch_raises_horizons_error(horizons, tmp_path):
+    handler, base_url = horizons
+    handler.error = True
+
+    with pytest.raises(eq.HorizonsError):
+        eq.fetch_ephemerides(
+            [('399', '2020-07-01', '2020-08-01', 1, str(tmp_path / '399.txt')),
+             ('499', '2020-07-01', '2020-08-01', 1, str(tmp_path / '499.txt'))],
+            base_url = base_url,
+            backoff  = 0.01
+        )
+
+    assert not os.listdir(tmp_path)
+
+def test_state_reader_parses_the_table(tmp_path):
+    path = tmp_path / '399.txt'
+    path.write_text(FIXTURE)
+
+    jd, states = eq.stateReader(str(path), sidecar=False)
+
+    assert jd.size == len(ROWS) == states.shape[0]
+    assert states.shape[1] == 6
+    fields = ROWS[-1].split(',')
+    assert jd[-1] == float(fields[0])
+    np.testing.assert_array_equal(states[-1], [float(value) for value in fields[2:8]])
+    assert not (tmp_path / '399.npy').exists()
+
+def test_state_reader_writes_and_reuses_the_sidecar(tmp_path, monkeypatch):
+    path = tmp_path / '399.txt'
+    path.write_text(FIXTURE)
+
+    jd, states = eq.stateReader(str(path))
+    assert (tmp_path / '399.npy').exists()
+
+    # The second read memory-maps the sidecar without parsing the text
+    def no_parse(*args, **kwargs):
+        raise AssertionError('the text table was parsed again')
+
+    monkeypatch.setattr(eq.np, 'loadtxt', no_parse)
+    jd_cached, states_cached = eq.stateReader(str(path))
+
+    assert isinstance(jd_cached.base, np.memmap)
+    np.testing.assert_array_equal(jd_cached, jd)
+    np.testing.assert_array_equal(states_cached, states)
+
+def test_state_reader_rebuilds_a_stale_sidecar(tmp_path):
+    path = tmp_path / '399.txt'
+    path.write_text(FIXTURE)
+    eq.stateReader(str(path))
+
+    # A newer table with only the first ten rows
+    path.write_text(HEAD + ''.join(ROWS[:10]) + TAIL)
+    sidecar = os.path.getmtime(tmp_path / '399.npy')
+    os.utime(path, (sidecar + 10, sidecar + 10))
+
+    jd, _ = eq.stateReader(str(path))
+
+    assert jd.size == 10
+    assert np.load(tmp_path / '399.npy').shape == (10, 7)
+
+@pytest.mark.parametrize('text, message', [
+    (ERROR_BODY, 'no \\$\\$SOE/\\$\\$EOE data markers'),
+    (HEAD + TAIL, 'contains no data'),
+    (HEAD + ROWS[0] + '2459001.5, A.D. 2020-Jun-01, 1.0, 2.0,\n' + TAIL, 'malformed data')
+], ids=['error body', 'empty table', 'short row'])
+def test_state_reader_rejects_malformed_tables(tmp_path, text, message):
+    path = tmp_path / '399.txt'
+    path.write_text(text)
+
+    with pytest.raises(ValueError, match=message):
+        eq.stateReader(str(path))
+
+    assert not (tmp_path / '399.npy').exists()
@@ -0,0 +1,111 @@
+'''
+Tests of the range-aware ephemeris store
+'''
+
+# Python Standard Libraries
+import os
+
+# Third-party Libraries
+import numpy as np
+import pytest
+
+# Porkchop-Plot-Generator Libraries
+from conftest import FIXTURE_DIR
+from utils import ephemeris_query as eq
+from utils import ephemeris_store as es
+from utils.time_tools import date_to_jd, requested_epochs
+
+FIXTURE = os.path.join(FIXTURE_DIR, '399_2020-06-01_2021-03-01.txt')
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    '''
+    Replaces the Horizons download by a copy of the fixture rows of every
+    query, every step days.
+
+    Returns:
+    list
+        (start, stop, step) of every query fetched
+    '''
+
+    with open(FIXTURE) as file:
+        text = file.read()
+    head = text[:text.index('$$SOE')] + '$$SOE\n'
+    rows = text[len(head):text.index('$$EOE')].splitlines(keepends=True)
+    tail = text[text.index('$$EOE'):]
+
+    queries = []
+
+    def fetch_ephemerides(fetch_queries, **kwargs):
+        for ID, start_time, stop_time, step_size, output_filename in fetch_queries:
+            queries.append((start_time, stop_time, step_size))
+            epochs = requested_epochs(start_time, stop_time, step_size)
+            selected = [row for row in rows if np.any(np.abs(float(row.split(',')[0]) - epochs) < 1e-6)]
+            with open(output_filename, 'w') as file:
+                file.write(head + ''.join(selected) + tail)
+
+    monkeypatch.setattr(eq, 'fetch_ephemerides', fetch_ephemerides)
+    return queries
+
+def _expected(start, stop, step):
+    # Epochs and states of the fixture from start to stop every step days
+    jd, states = eq.stateReader(FIXTURE, sidecar=False)
+    idx = np.searchsorted(jd, requested_epochs(start, stop, step))
+    return jd[idx], states[idx]
+
+def test_contained_request_is_not_fetched(fetched, tmp_path):
+    es.get_states(str(tmp_path), 399, '2020-07-01', '2020-09-01', 1)
+    assert len(fetched) == 1
+
+    # Sub-range at a coarser step of what is stored
+    jd, states = es.get_states(str(tmp_path), 399, '2020-07-11', '2020-08-20', 5)
+
+    assert len(fetched) == 1
+    np.testing.assert_array_equal(jd, _expected('2020-07-11', '2020-08-20', 5)[0])
+    np.testing.assert_array_equal(states, _expected('2020-07-11', '2020-08-20', 5)[1])
+
+def test_partial_overlap_fetches_only_the_gap(fetched, tmp_path):
+    es.get_states(str(tmp_path), 399, '2020-07-01', '2020-09-01', 1)
+    jd, states = es.get_states(str(tmp_path), 399, '2020-08-01', '2020-10-01', 1)
+
+    assert fetched[1] == ('2020-09-02', '2020-10-01', 1)
+    np.testing.assert_array_equal(jd, _expected('2020-08-01', '2020-10-01', 1)[0])
+    np.testing.assert_array_equal(states, _expected('2020-08-01', '2020-10-01', 1)[1])
+
+    # Both windows are merged into one store without duplicated epochs
+    jd_store, states_store = es.load_body(str(tmp_path), 399)
+    np.testing.assert_array_equal(jd_store, _expected('2020-07-01', '2020-10-01', 1)[0])
+    assert states_store.shape == (jd_store.size, 6)
+
+def test_disjoint_range_is_fetched_and_merged(fetched, tmp_path):
+    es.get_states(str(tmp_path), 399, '2020-07-01', '2020-07-31', 1)
+    es.get_states(str(tmp_path), 399, '2020-12-01', '2020-12-31', 1)
+
+    assert fetched == [('2020-07-01', '2020-07-31', 1), ('2020-12-01', '2020-12-31', 1)]
+
+    jd_store, _ = es.load_body(str(tmp_path), 399)
+    assert jd_store.size == 62
+    assert np.all(np.diff(jd_store) > 0)
+
+    # The gap between the two windows is still missing
+    epochs = requested_epochs('2020-07-30', '2020-12-02', 1)
+    ranges = es.missing_ranges(jd_store, epochs)
+    assert ranges == [(2, epochs.size - 3)]
+    assert epochs[2] == date_to_jd('2020-08-01')
+
+def test_missing_epochs_without_fetch_raise(fetched, tmp_path):
+    es.get_states(str(tmp_path), 399, '2020-07-01', '2020-07-31', 1)
+
+    with pytest.raises(LookupError):
+        es.get_states(str(tmp_path), 399, '2020-07-15', '2020-08-15', 1, fetch=False)
+
+    assert len(fetched) == 1
+
+def test_missing_ranges():
+    jd_store = np.array([10.5, 11.5, 12.5, 15.5, 16.5])
+    epochs = np.arange(8.5, 19.5)
+
+    assert es.missing_ranges(jd_store, epochs) == [(0, 1), (5, 6), (9, 10)]
+    assert es.missing_ranges(np.empty(0), epochs) == [(0, epochs.size - 1)]
+    assert es.missing_ranges(jd_store, jd_store[1:3]) == []
@@ -0,0 +1,71 @@
+'''
+Tests of the out-of-core grid store
+'''
+
+# Python Standard Libraries
+import os
+
+# Third-party Libraries
+import numpy as np
+import pytest
+
+# Porkchop-Plot-Generator Libraries
+from utils import grid_store as gs
+from utils import grid_tools as gt
+
+
+class Interrupted(Exception):
+    pass
+
+@pytest.fixture
+def store(earth_mars, tmp_path):
+    et_departures, _, et_arrivals, _, mu = earth_mars
+    return gs.GridStore.create(str(tmp_path / 'store'), et_departures, et_arrivals, {'mu': mu}, tile_rows=2,
+                               tile_cols=4)
+
+def test_write_grid_bounds_blocks_in_flight(earth_mars, store, counting_executor):
+    et_departures, states_depart, et_arrivals, states_arrive, mu = earth_mars
+    workers = 2
+    written = []
+
+    def progress(done, total):
+        written.append(done)
+        assert counting_executor.submitted - len(written) < 2 * workers
+
+    gs.write_grid(store, et_departures, states_depart, et_arrivals, states_arrive, mu, 1e3, workers=workers,
+                  progress=progress)
+
+    assert counting_executor.submitted == len(written) == len(store.blocks())
+
+    grids = gt.porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, 1e3)
+    stored = store.read(gt.GRID_KEYS)
+    for key in gt.GRID_KEYS:
+        np.testing.assert_array_equal(stored[key], grids[key])
+
+def test_write_grid_resumes_from_done_markers(earth_mars, store, counting_executor):
+    et_departures, states_depart, et_arrivals, states_arrive, mu = earth_mars
+    blocks = store.blocks()
+
+    def interrupt(done, total):
+        if done >= 6:
+            raise Interrupted
+
+    with pytest.raises(Interrupted):
+        gs.write_grid(store, et_departures, states_depart, et_arrivals, states_arrive, mu, 1e3, progress=interrupt)
+
+    stored = [start for start, _ in blocks if store.complete(start)]
+    assert stored == [0, 2, 4]
+
+    # A block without its marker is solved again
+    os.remove(os.path.join(store.path, 'tiles', 'r2.done'))
+
+    reopened = gs.GridStore.create(store.path, et_departures, et_arrivals, {'mu': mu}, tile_rows=2, tile_cols=4)
+    gs.write_grid(reopened, et_departures, states_depart, et_arrivals, states_arrive, mu, 1e3, workers=2)
+
+    assert counting_executor.submitted == len(blocks) - 2
+    assert all(reopened.complete(start) for start, _ in blocks)
+
+    grids = gt.porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, 1e3)
+    stored = reopened.read(gt.GRID_KEYS)
+    for key in gt.GRID_KEYS:
+        np.testing.assert_array_equal(stored[key], grids[key])
@@ -0,0 +1,113 @@
+'''
+Tests of the chunked porkchop grid iterator
+'''
+
+# Third-party Libraries
+import numpy as np
+import pytest
+
+# Porkchop-Plot-Generator Libraries
+from utils import grid_tools as gt
+
+
+def test_chunks_in_flight_are_bounded(earth_mars, counting_executor):
+    et_departures, states_depart, et_arrivals, states_arrive, mu = earth_mars
+    workers = 2
+
+    chunks = gt.iter_porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, 1e3,
+                                   workers=workers, chunk_size=1)
+
+    yielded = 0
+    for start, stop, grids, stats in chunks:
+        yielded += 1
+        assert counting_executor.submitted - yielded < 2 * workers
+
+    assert yielded == counting_executor.submitted == len(et_arrivals)
+
+def test_closing_stops_submitting(earth_mars, counting_executor):
+    et_departures, states_depart, et_arrivals, states_arrive, mu = earth_mars
+
+    chunks = gt.iter_porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, 1e3,
+                                   workers=2, chunk_size=1)
+    next(chunks)
+    chunks.close()
+
+    assert counting_executor.submitted <= 4 < len(et_arrivals)
+
+def test_parallel_grid_matches_serial(earth_mars, counting_executor):
+    et_departures, states_depart, et_arrivals, states_arrive, mu = earth_mars
+
+    serial = gt.porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, 1e3)
+    parallel = gt.parallel_porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, 1e3,
+                                         workers=3, chunk_size=2)
+
+    for key in gt.GRID_KEYS:
+        np.testing.assert_array_equal(parallel[key], serial[key])
+
+def test_continuation_matches_cold_grid(earth_mars):
+    et_departures, states_depart, et_arrivals, states_arrive, mu = earth_mars
+
+    cold, cold_stats = gt.porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, 1e3,
+                                        tol=1e-10, return_stats=True)
+    warm, stats = gt.porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, 1e3, tol=1e-10,
+                                   continuation=True, return_stats=True)
+
+    assert stats['warm'].any()
+    assert np.count_nonzero(cold['C3_shorts'] < 100) > 10
+
+    # Cells solved both ways within the contours of a porkchop plot, short
+    # way then long way. Far outside them, where F(z) has several roots, the
+    # two may converge to different roots.
+    solved = cold_stats['converged'] & stats['converged']
+    for k, keys in enumerate((('C3_shorts', 'v_inf_shorts'), ('C3_longs', 'v_inf_longs'))):
+        cells = solved[k] & (cold[keys[0]] < 100)
+        for key in keys:
+            np.testing.assert_allclose(warm[key][cells], cold[key][cells], rtol=1e-5)
+
+def test_continuation_rejects_multi_revolution(earth_mars):
+    et_departures, states_depart, et_arrivals, states_arrive, mu = earth_mars
+
+    with pytest.raises(ValueError, match='revs'):
+        gt.porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, 1e3, revs=1,
+                         continuation=True)
+
+def test_feasible_window():
+    tofs = np.array([-10.0, 0.0, 50.0, 100.0, 300.0, 500.0])
+
+    np.testing.assert_array_equal(gt.feasible(tofs), [False, False, True, True, True, True])
+    np.testing.assert_array_equal(gt.feasible(tofs, tof_min=100, tof_max=300),
+                                  [False, False, False, True, True, False])
+
+@pytest.mark.parametrize('continuation', [False, True], ids=['cold', 'continuation'])
+def test_pruned_cells_never_reach_the_solver(earth_mars, monkeypatch, continuation):
+    et_departures, states_depart, et_arrivals, states_arrive, mu = earth_mars
+    tof_min, tof_max = 150.0, 350.0
+    solved = []
+
+    lambert_pairs, lambert_continuation = gt.lt.lambert_pairs, gt.lt.lambert_continuation
+    def recording_pairs(R1, R2, dt, *args, **kwargs):
+        solved.append(np.asarray(dt) / 86400.0)
+        return lambert_pairs(R1, R2, dt, *args, **kwargs)
+
+    def recording_continuation(R1, R2, dt, *args, **kwargs):
+        solved.append(dt[~np.isnan(dt)] / 86400.0)
+        return lambert_continuation(R1, R2, dt, *args, **kwargs)
+
+    monkeypatch.setattr(gt.lt, 'lambert_pairs', recording_pairs)
+    monkeypatch.setattr(gt.lt, 'lambert_continuation', recording_continuation)
+
+    grids = gt.porkchop_grid(et_departures, states_depart, et_arrivals, states_arrive, mu, 1e3,
+                             tof_min=tof_min, tof_max=tof_max, continuation=continuation)
+
+    keep = gt.feasible(et_arrivals[:, None] - et_departures[None, :], tof_min, tof_max)
+    assert keep.any() and not keep.all()
+
+    # Only the feasible times of flight were solved
+    solved = np.concatenate(solved)
+    assert solved.size == np.count_nonzero(keep)
+    assert np.all((solved >= tof_min) & (solved <= tof_max))
+
+    for key in gt.GRID_KEYS:
+        assert grids[key].dtype == np.float32
+        assert np.isnan(grids[key][~keep]).all()
+        assert not np.isnan(grids[key][keep]).any()
@@ -0,0 +1,87 @@
+'''
+Tests of Izzo's Lambert solver, single and multi-revolution
+'''
+
+# Third-party Libraries
+import numpy as np
+import pytest
+
+# Porkchop-Plot-Generator Libraries
+from utils import lambert_tools as lt
+from utils import planetary_data as pd
+from utils.analytic_ephemeris import solve_kepler
+
+AU = 1.495978707e8
+
+
+def _propagate(R0, V0, dt, mu):
+    # Position after dt on the elliptic orbit of (R0, V0), and the change in
+    # eccentric anomaly, revolutions included
+    r0 = np.linalg.norm(R0)
+    a = 1 / (2 / r0 - V0 @ V0 / mu)
+    n = np.sqrt(mu / a ** 3)
+
+    e_cosE = 1 - r0 / a
+    e_sinE = R0 @ V0 / np.sqrt(mu * a)
+    e = np.hypot(e_cosE, e_sinE)
+    E0 = np.arctan2(e_sinE, e_cosE)
+
+    dE = solve_kepler(E0 - e_sinE + n * dt, e) - E0
+    f = 1 - a / r0 * (1 - np.cos(dE))
+    g = dt - (dE - np.sin(dE)) / n
+
+    return f * R0 + g * V0, dE
+
+def test_zero_revolutions_match_curtis(earth_mars):
+    et_departures, states_depart, et_arrivals, states_arrive, mu = earth_mars
+    dt = (et_arrivals[:, None] - et_departures[None, :]) * 86400.0
+
+    curtis = lt.lambert_grid(states_depart[:, :3], states_arrive[:, :3], dt, mu, tol=1e-10)
+    izzo = lt.lambert_grid(states_depart[:, :3], states_arrive[:, :3], dt, mu, tol=1e-12, method='izzo')
+
+    # Cells arriving before departure are not solved by either
+    assert not izzo[2][:, dt <= 0].any()
+
+    solved = curtis[2] & izzo[2]
+    assert solved.sum() > 0.9 * curtis[2].sum()
+    for V_curtis, V_izzo in zip(curtis[:2], izzo[:2]):
+        np.testing.assert_allclose(V_izzo[solved], V_curtis[solved], rtol=1e-6)
+
+@pytest.mark.parametrize('low_path', [True, False], ids=['low', 'high'])
+def test_one_revolution_reaches_r2_in_time(low_path):
+    mu = pd.sun['mu']
+    theta = np.radians(120)
+    R1 = np.array([[AU, 0.0, 0.0]])
+    R2 = np.array([[1.524 * AU * np.cos(theta), 1.524 * AU * np.sin(theta), 0.05 * AU]])
+    dt = np.array([900.0, 1200.0]) * 86400.0
+
+    V1, V2, converged, _ = lt.lambert_pairs(R1, R2, dt, mu, method='izzo', revs=1, low_path=low_path)
+
+    assert converged.all()
+    for k in range(2):
+        for i in range(dt.size):
+            R, dE = _propagate(R1[0], V1[k, i], dt[i], mu)
+            np.testing.assert_allclose(R, R2[0], atol=1e-3)
+
+            # One complete revolution, then the transfer angle
+            assert 2 * np.pi < dE < 4 * np.pi
+
+def test_one_revolution_branches_differ():
+    mu = pd.sun['mu']
+    R1 = np.array([AU, 0.0, 0.0])
+    R2 = np.array([0.0, 1.524 * AU, 0.0])
+
+    low = lt.lambert_pairs(R1, R2, 1000 * 86400.0, mu, method='izzo', revs=1, low_path=True)
+    high = lt.lambert_pairs(R1, R2, 1000 * 86400.0, mu, method='izzo', revs=1, low_path=False)
+
+    assert low[2].all() and high[2].all()
+    assert not np.allclose(low[0], high[0])
+
+def test_too_short_for_one_revolution():
+    mu = pd.sun['mu']
+    R1 = np.array([AU, 0.0, 0.0])
+    R2 = np.array([0.0, 1.524 * AU, 0.0])
+
+    converged = lt.lambert_pairs(R1, R2, 100 * 86400.0, mu, method='izzo', revs=1)[2]
+
+    assert not converged.any()
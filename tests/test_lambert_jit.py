@@ -0,0 +1,79 @@
+'''
+Shared correctness tests of the NumPy and Numba Curtis iterations
+'''
+
+# Third-party Libraries
+import numpy as np
+import pytest
+
+pytest.importorskip('numba')
+
+# Porkchop-Plot-Generator Libraries
+from utils import lambert_jit
+from utils import lambert_tools as lt
+from utils.numerical_tools import outcome_codes, SOLVED, INVALID
+
+
+@pytest.fixture(scope='module')
+def cases(earth_mars_pairs):
+    '''
+    Inputs of _solve_z_curtis: the geocentric transfer of Example 5.2 of
+    Curtis, then the prograde transfers of the earth_mars grid, some of
+    which arrive before departing.
+
+    Returns:
+    r1, r2, A, sqrt_mu_dt, dtheta, invalid
+    '''
+
+    R1, R2, dt, mu = earth_mars_pairs
+    R1 = np.broadcast_to(R1, dt.shape + (3,)).reshape(-1, 3)
+    R2 = np.broadcast_to(R2, dt.shape + (3,)).reshape(-1, 3)
+    dt = dt.ravel()
+
+    # Curtis Example 5.2 around the Earth, scaled to the Sun's mu
+    scale = mu / 398600.0
+    R1 = np.vstack([[5000.0, 10000.0, 2100.0], R1])
+    R2 = np.vstack([[-14600.0, 2500.0, 7000.0], R2])
+    dt = np.concatenate([[3600.0 / np.sqrt(scale)], dt])
+
+    r1, r2, dtheta, _ = lt.lambert_geometry(R1, R2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        A = np.sin(dtheta) * np.sqrt(r1 * r2 / (1 - np.cos(dtheta)))
+    invalid = ~(dt > 0) | ~np.isfinite(A)
+
+    return r1, r2, A, np.sqrt(mu) * dt, dtheta, invalid
+
+def _solve(cases, monkeypatch, jit):
+    # z, failed, iterations and outcome codes of the NumPy or Numba iteration
+    r1, r2, A, sqrt_mu_dt, dtheta, invalid = cases
+    monkeypatch.setattr(lambert_jit, 'ENABLED', jit)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        z, failed, iterations, unbracketed = lt._solve_z_curtis(
+            r1, r2, A, sqrt_mu_dt, dtheta, invalid.copy(), 1e-8, 1000
+        )
+
+    return z, failed, iterations, outcome_codes(~failed, invalid, unbracketed)
+
+@pytest.mark.parametrize('jit', [False, True], ids=['numpy', 'numba'])
+def test_solve_z_curtis(cases, monkeypatch, jit):
+    r1, r2, A, sqrt_mu_dt, dtheta, invalid = cases
+
+    z, failed, iterations, outcomes = _solve(cases, monkeypatch, jit)
+    z_ref, failed_ref, iterations_ref, outcomes_ref = _solve(cases, monkeypatch, False)
+
+    assert outcomes[0] == SOLVED
+    np.testing.assert_array_equal(outcomes[invalid], INVALID)
+    assert np.count_nonzero(outcomes == SOLVED) > invalid.size // 2
+
+    # Converged cells solve the time of flight equation
+    solved = outcomes == SOLVED
+    residual = lt._F_vec(z[solved], r1[solved], r2[solved], A[solved], sqrt_mu_dt[solved])
+    np.testing.assert_allclose(residual / sqrt_mu_dt[solved], 0, atol=1e-9)
+
+    # Same iteration in both implementations
+    np.testing.assert_array_equal(outcomes, outcomes_ref)
+    np.testing.assert_array_equal(failed, failed_ref)
+    np.testing.assert_array_equal(iterations, iterations_ref)
+    np.testing.assert_allclose(z[solved], z_ref[solved], rtol=1e-10)
@@ -0,0 +1,109 @@
+'''
+Tests of the batch Lambert solvers against the scalar solver of Curtis
+'''
+
+# Third-party Libraries
+import numpy as np
+import pytest
+
+# Porkchop-Plot-Generator Libraries
+from utils import lambert_tools as lt
+from utils.numerical_tools import SOLVED, INVALID, NOT_CONVERGED
+
+# Geocentric transfer of Example 5.2 of Curtis
+R1_CURTIS = np.array([5000.0, 10000.0, 2100.0])
+R2_CURTIS = np.array([-14600.0, 2500.0, 7000.0])
+MU_EARTH = 398600.0
+
+
+@pytest.fixture(scope='module')
+def transfers(earth_mars_pairs):
+    '''
+    A handful of Earth to Mars transfers of the earth_mars grid, of 100 to
+    400 days, with their departure and arrival positions.
+
+    Returns:
+    R1, R2 : ndarray
+        Shape (n, 3)
+    dt : ndarray
+        Shape (n,)
+    mu : float
+    '''
+
+    R1, R2, dt, mu = earth_mars_pairs
+    R1 = np.broadcast_to(R1, dt.shape + (3,)).reshape(-1, 3)
+    R2 = np.broadcast_to(R2, dt.shape + (3,)).reshape(-1, 3)
+    dt = dt.ravel()
+
+    cells = np.flatnonzero((dt > 100 * 86400) & (dt < 400 * 86400))[::7][:8]
+
+    return R1[cells], R2[cells], dt[cells], mu
+
+def test_curtis_example():
+    V1, V2, converged, _ = lt.lambert_solver_batch(R1_CURTIS[None], R2_CURTIS[None], 3600.0, MU_EARTH, tol=1e-8)
+
+    assert converged.all()
+    np.testing.assert_allclose(V1[0], [-5.9925, 1.9254, 3.2456], atol=1e-4)
+    np.testing.assert_allclose(V2[0], [-3.3125, -4.1966, -0.38529], atol=1e-4)
+
+@pytest.mark.parametrize('trajectory', ['pro', 'retro'])
+def test_batch_matches_scalar_solver(transfers, trajectory):
+    R1, R2, dt, mu = transfers
+
+    V1, V2, converged, _ = lt.lambert_solver_batch(R1, R2, dt, mu, tol=1e-8, trajectory=trajectory)
+
+    assert converged.all()
+    for i in range(dt.size):
+        V1_scalar, V2_scalar = lt.lambert_solver(R1[i], R2[i], dt[i], mu, tol=1e-8, trajectory=trajectory)
+        np.testing.assert_allclose(V1[i], V1_scalar, rtol=1e-7)
+        np.testing.assert_allclose(V2[i], V2_scalar, rtol=1e-7)
+
+def test_lambert_grid_matches_scalar_solver(transfers):
+    R1, R2, dt, mu = transfers
+
+    # Grid of the first departures and arrivals, both branches at once
+    dt_grid = dt[None, :3] + np.array([0.0, 86400.0])[:, None]
+    V1, V2, converged, _ = lt.lambert_grid(R1[:3], R2[:2], dt_grid, mu, tol=1e-8)
+
+    assert V1.shape == (2, 2, 3, 3)
+    assert converged.all()
+    for k, trajectory in enumerate(('pro', 'retro')):
+        for i in range(2):
+            for j in range(3):
+                V1_scalar, V2_scalar = lt.lambert_solver(R1[j], R2[i], dt_grid[i, j], mu, tol=1e-8,
+                                                         trajectory=trajectory)
+                np.testing.assert_allclose(V1[k, i, j], V1_scalar, rtol=1e-7)
+                np.testing.assert_allclose(V2[k, i, j], V2_scalar, rtol=1e-7)
+
+def test_batch_flags_cells_the_scalar_solver_rejects():
+    # The scalar solver raises on a negative or a far too short time of
+    # flight; the batch solver marks those cells and solves the others
+    for dt in (-3600.0, 1.0):
+        with pytest.raises(RuntimeError):
+            with np.errstate(invalid='ignore'):
+                lt.lambert_solver(R1_CURTIS, R2_CURTIS, dt, MU_EARTH)
+
+    V1, V2, converged, _, outcomes = lt.lambert_solver_batch(
+        R1_CURTIS[None], R2_CURTIS[None], np.array([-3600.0, 1.0, 3600.0]), MU_EARTH, return_outcomes=True
+    )
+
+    np.testing.assert_array_equal(converged, [False, False, True])
+    np.testing.assert_array_equal(outcomes, [INVALID, NOT_CONVERGED, SOLVED])
+    assert np.isnan(V1[:2]).all() and np.isnan(V2[:2]).all()
+
+def test_safeguarded_matches_curtis(earth_mars):
+    et_departures, states_depart, et_arrivals, states_arrive, mu = earth_mars
+    dt = (et_arrivals[:, None] - et_departures[None, :]) * 86400.0
+
+    curtis = lt.lambert_grid(states_depart[:, :3], states_arrive[:, :3], dt, mu, tol=1e-10)
+    safeguarded = lt.lambert_grid(states_depart[:, :3], states_arrive[:, :3], dt, mu, tol=1e-10, maxiter=50,
+                                  method='safeguarded')
+
+    # Every cell solved by curtis is solved by the safeguarded iteration,
+    # within its bound of iterations
+    assert np.all(safeguarded[2][curtis[2]])
+    assert safeguarded[3].max() <= 50
+
+    solved = curtis[2]
+    for V_curtis, V_safeguarded in zip(curtis[:2], safeguarded[:2]):
+        np.testing.assert_allclose(V_safeguarded[solved], V_curtis[solved], rtol=1e-8)
@@ -0,0 +1,92 @@
+'''
+Tests of the memoized porkchop grid
+'''
+
+# Python Standard Libraries
+import os
+
+# Third-party Libraries
+import numpy as np
+import pytest
+
+# Porkchop-Plot-Generator Libraries
+from conftest import FIXTURE_DIR
+from utils import ephemeris_query as eq
+from utils import grid_tools as gt
+from utils import planetary_data as pd
+from utils.lazy_grid import LazyGrid
+from utils.time_tools import date_to_jd
+
+
+@pytest.fixture(scope='module')
+def tables():
+    '''
+    Daily Earth and Mars ephemeris tables of the fixtures.
+
+    Returns:
+    departure_table, arrival_table : tuple
+        (julianDates, states)
+    '''
+
+    return tuple(
+        eq.stateReader(os.path.join(FIXTURE_DIR, name), sidecar=False)
+        for name in ('399_2020-06-01_2021-03-01.txt', '499_2020-11-01_2022-03-01.txt')
+    )
+
+def _porkchop_grid(tables, et_departures, et_arrivals):
+    # porkchop_grid on the table rows of the requested epochs
+    (jd_depart, states_depart), (jd_arrive, states_arrive) = tables
+    cols = np.searchsorted(jd_depart, et_departures)
+    rows = np.searchsorted(jd_arrive, et_arrivals)
+
+    return gt.porkchop_grid(et_departures, states_depart[cols], et_arrivals, states_arrive[rows], pd.sun['mu'],
+                            1e3, tof_max=400)
+
+def _assert_grids_equal(grids, expected):
+    for key in gt.GRID_KEYS:
+        np.testing.assert_array_equal(grids[key], expected[key])
+
+def test_zoom_reuses_solved_cells(tables):
+    lazy = LazyGrid(*tables, pd.sun['mu'], 1e3, tof_max=400)
+
+    # Wide window every 10 days
+    et_departures, et_arrivals, grids, stats = lazy.window('2020-06-01', '2020-10-29', '2020-12-01', '2021-09-27',
+                                                           10, return_stats=True)
+    _assert_grids_equal(grids, _porkchop_grid(tables, et_departures, et_arrivals))
+
+    cells = np.count_nonzero(~np.isnan(grids['tofs']))
+    assert lazy.solved == len(lazy) == cells
+    assert lazy.reused == 0 and not stats['reused'].any()
+
+    # Zoom every 5 days into a basin: the cells on the 10-day lattice are
+    # reused, the others are solved
+    zoom_departures, zoom_arrivals, zoom, zoom_stats = lazy.window('2020-07-21', '2020-08-20', '2021-03-01',
+                                                                   '2021-05-10', 5, return_stats=True)
+    _assert_grids_equal(zoom, _porkchop_grid(tables, zoom_departures, zoom_arrivals))
+
+    zoom_cells = ~np.isnan(zoom['tofs'])
+    on_lattice = (np.isin(zoom_arrivals, et_arrivals)[:, None] & np.isin(zoom_departures, et_departures)[None, :])
+    reused = np.count_nonzero(zoom_cells & on_lattice)
+
+    assert 0 < reused < np.count_nonzero(zoom_cells)
+    np.testing.assert_array_equal(zoom_stats['reused'], zoom_cells & on_lattice)
+    assert lazy.reused == reused
+    assert lazy.solved == len(lazy) == cells + np.count_nonzero(zoom_cells) - reused
+
+    # The same zoom again solves nothing
+    lazy.window('2020-07-21', '2020-08-20', '2021-03-01', '2021-05-10', 5)
+    assert lazy.solved == len(lazy)
+    assert lazy.reused == reused + np.count_nonzero(zoom_cells)
+
+def test_repeated_epochs_are_solved_once(tables):
+    lazy = LazyGrid(*tables, pd.sun['mu'], 1e3)
+
+    et_departures = date_to_jd('2020-07-01') + np.array([0.0, 10.0, 0.0, 10.0])
+    et_arrivals = date_to_jd('2021-03-01') + np.array([0.0, 20.0, 20.0])
+
+    grids = lazy.evaluate(et_departures, et_arrivals)
+
+    assert lazy.solved == len(lazy) == 4
+    for key in gt.GRID_KEYS:
+        np.testing.assert_array_equal(grids[key][:, :2], grids[key][:, 2:])
+        np.testing.assert_array_equal(grids[key][1], grids[key][2])
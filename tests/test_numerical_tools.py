@@ -0,0 +1,54 @@
+'''
+Tests of the batch root finders
+'''
+
+# Third-party Libraries
+import numpy as np
+
+# Porkchop-Plot-Generator Libraries
+from utils.numerical_tools import bracketedNewton
+
+
+def test_bracketed_newton_falls_back_to_bisection():
+    # Newton's method on arctan overshoots and diverges from |x| > 1.39;
+    # on x**3 - 1 it cannot step from the flat point x = 0
+    def y(x, idx):
+        return np.where(idx == 0, np.arctan(x - 0.5), x ** 3 - 1)
+
+    def dydx(x, idx):
+        return np.where(idx == 0, 1 / (1 + (x - 0.5) ** 2), 3 * x ** 2)
+
+    steps = []
+    def y_logged(x, idx):
+        steps.append(x.copy())
+        return y(x, idx)
+
+    x, converged, iterations = bracketedNewton(y_logged, dydx, [5.0, 0.0], [-20.0, -20.0], [20.0, 20.0], 1e-12,
+                                               maxiter=60)
+
+    assert converged.all()
+    np.testing.assert_allclose(x, [0.5, 1.0], atol=1e-10)
+    assert np.all(iterations <= 60)
+
+    # Every iterate stayed inside the initial bracket
+    assert all(np.all(np.abs(step) <= 20) for step in steps)
+
+def test_bracketed_newton_finds_every_bracketed_root_within_maxiter():
+    # Steep arctans, on which most Newton steps leave the bracket, for many
+    # cells at once. Bisection alone halves the bracket of width 40 below
+    # the tolerance in 46 iterations.
+    roots = np.linspace(-15, 15, 101)
+    slopes = np.logspace(0, 3, roots.size)
+
+    def y(x, idx):
+        return np.arctan(slopes[idx] * (x - roots[idx]))
+
+    def dydx(x, idx):
+        return slopes[idx] / (1 + (slopes[idx] * (x - roots[idx])) ** 2)
+
+    x, converged, iterations = bracketedNewton(y, dydx, np.full(roots.size, 19.0), np.full(roots.size, -20.0),
+                                               np.full(roots.size, 20.0), 1e-12, maxiter=50)
+
+    assert converged.all()
+    assert iterations.max() <= 50
+    np.testing.assert_allclose(x, roots, atol=1e-10)
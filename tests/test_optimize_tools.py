@@ -0,0 +1,49 @@
+'''
+Tests of the transfer optimizer
+'''
+
+# Third-party Libraries
+import numpy as np
+
+# Porkchop-Plot-Generator Libraries
+from utils import grid_tools as gt
+from utils import optimize_tools as ot
+
+
+def test_evaluations_count_every_transfer_solved(earth_mars, monkeypatch):
+    et_departures, states_depart, et_arrivals, states_arrive, mu = earth_mars
+    solved = []
+
+    porkchop_pairs = gt.porkchop_pairs
+    def counting_pairs(et_departures, *args, **kwargs):
+        solved.append(len(et_departures))
+        return porkchop_pairs(et_departures, *args, **kwargs)
+
+    monkeypatch.setattr(gt, 'porkchop_pairs', counting_pairs)
+
+    result = ot.optimize_transfer(et_departures, states_depart, et_arrivals, states_arrive, mu, seeds=2)
+
+    assert result['converged']
+    # The coarse grid, every stencil and the final transfer, pruned cells
+    # of the coarse grid excluded
+    assert len(solved) > 2
+    assert result['evaluations'] == sum(solved)
+
+def test_coarse_grid_is_subsampled(earth_mars, monkeypatch):
+    et_departures, states_depart, et_arrivals, states_arrive, mu = earth_mars
+    departures = []
+
+    porkchop_pairs = gt.porkchop_pairs
+    def recording_pairs(et_departures, *args, **kwargs):
+        departures.append(np.unique(et_departures))
+        return porkchop_pairs(et_departures, *args, **kwargs)
+
+    monkeypatch.setattr(gt, 'porkchop_pairs', recording_pairs)
+
+    # Departures every 20 days, arrivals every 30 days: strides of 2 and 1
+    result = ot.optimize_transfer(et_departures, states_depart, et_arrivals, states_arrive, mu, seeds=2,
+                                  coarse_step=40)
+
+    assert result['converged']
+    assert np.isin(departures[0], et_departures[::2]).all()
+    assert not np.isin(departures[0], et_departures[1::2]).any()
@@ -0,0 +1,22 @@
+'''
+Tests of the porkchop entry points
+'''
+
+# Third-party Libraries
+import pytest
+
+# Porkchop-Plot-Generator Libraries
+import porkchop
+
+
+def test_headless_show_fails_before_computing(monkeypatch):
+    def no_ephemerides(*args, **kwargs):
+        raise AssertionError('the ephemerides were loaded')
+
+    monkeypatch.setattr(porkchop, '_load_ephemerides', no_ephemerides)
+
+    with pytest.raises(ValueError, match="'show'"):
+        porkchop.interplanetary_porkchop({'render': 'headless', 'show': True})
+
+    with pytest.raises(ValueError, match="Unknown 'render'"):
+        porkchop.interplanetary_porkchop({'render': 'svg'})
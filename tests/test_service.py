@@ -0,0 +1,37 @@
+'''
+Tests of the request handling of the porkchop service
+'''
+
+# Third-party Libraries
+import pytest
+
+# Porkchop-Plot-Generator Libraries
+import service
+from utils import planetary_data as pd
+from utils import service_tools  as sv
+
+
+@pytest.fixture
+def porkchop_service():
+    porkchop_service = service.PorkchopService({'planet1': 'venus'}, workers=1, cache_size=1)
+    yield porkchop_service
+    porkchop_service.close()
+
+def test_request_overrides(porkchop_service):
+    _config = porkchop_service.request_config({'step': '2', 'format': 'npz'}, b'{"solver": "izzo"}')
+
+    assert _config['step'] == 2
+    assert _config['solver'] == 'izzo'
+    assert _config['planet1'] == pd.venus['ID']
+
+@pytest.mark.parametrize('query, body', [
+    ({'workers': '64'}, b''),
+    ({}, b'{"cache_dir": "/tmp"}'),
+    ({'step': '2'}, b'{"filename": "/etc/c3.png"}'),
+    ({}, b'["step", 2]')
+])
+def test_request_rejects_service_keys(porkchop_service, query, body):
+    with pytest.raises(sv.HTTPError) as err:
+        porkchop_service.request_config(query, body)
+
+    assert err.value.status == 400